@@ -23,9 +23,14 @@ printf '{"sha":"%s","short_sha":"%s","tags":%s,"deployed_at":"%s"}\n' \
   > "$PROJECT_DIR/dist/version.json"
 
 echo "Deploying to ${DEPLOY_USER}@${DEPLOY_HOST}:${DEPLOY_PATH}"
+# Files written by the exporter (see deploy/README.md) are left alone
 rsync -avz --delete \
-  --exclude='jobs-export.json' \
+  --exclude='jobs-*.json*' \
   --exclude='job/' \
+  --exclude='job-data/' \
+  --exclude='sitemap*.xml*' \
+  --exclude='feed.xml*' \
+  --exclude='.export-state/' \
   "$PROJECT_DIR/dist/" \
   "${DEPLOY_USER}@${DEPLOY_HOST}:${DEPLOY_PATH}"
 
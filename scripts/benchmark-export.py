@@ -0,0 +1,596 @@
+#!/usr/bin/env python3
+"""
+Benchmark the job export pipeline against synthetic CampOS data
+
+Generates a synthetic organization tree (area/committee/team/workgroup) and
+job export with Danish HTML descriptions, and measures how the pipeline
+scales with the number of organizations and jobs.
+
+By default hierarchy resolution is timed for each org/job count pair.
+
+With --stages, each stage of a run (build_org_lookup, build_org_map,
+process_jobs, write_output, generate_og_pages) is timed (best of --repeat)
+and memory-profiled with tracemalloc separately, on an org tree of the
+given --depth and --width. Pass --json to also write the results as JSON,
+e.g. to compare against an earlier run.
+
+With --memory, a full export run is traced with tracemalloc instead, loading
+the job export as a list and with the stream_jobs setting, to compare peak
+memory use.
+
+With --faults, the exporter's fetch phase is run against the CampOS
+stand-in (campos-stand-in.py) once per fault scenario (latency, rate
+limiting, 5xx bursts, truncated and corrupted bodies, a slow drip, an
+outage), reporting how long the fetches took, the requests and retries
+they needed, and whether they ended with fresh exports, the cached
+(stale) copies, or a failed run.
+
+With --parallel, processing the job export serially is compared with the
+process pool (the process_workers setting) for each job count and worker
+count. The CPU time of the run's own process and of its workers is
+measured; splitting the workers' share over --cores CPUs projects the
+time on a bigger machine, so the crossover (the smallest job count where
+the pool wins) can be found for the parallel_min_jobs setting even on a
+machine with one CPU.
+
+Usage:
+    python3 scripts/benchmark-export.py
+    python3 scripts/benchmark-export.py --orgs 250 1000 4000 --jobs 200 2000
+    python3 scripts/benchmark-export.py --stages --depth 4 --width 6 --jobs 1000 10000 --json results.json
+    python3 scripts/benchmark-export.py --memory 100000
+    python3 scripts/benchmark-export.py --faults 2000
+    python3 scripts/benchmark-export.py --parallel --jobs 1000 5000 20000 --workers 2 4 --cores 4
+"""
+
+import argparse
+import gzip
+import importlib.util
+import io
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import redirect_stdout
+from datetime import datetime, timezone
+from pathlib import Path
+
+STAGES = ('build_org_lookup', 'build_org_map', 'process_jobs', 'write_output', 'generate_og_pages')
+
+# --faults: stand-in Faults arguments per scenario; the drip is given in
+# seconds per job export body, so it scales with the export size
+FAULT_SCENARIOS = {
+    'clean': {},
+    'latency': {'latency': 0.5, 'latency_jitter': 0.5},
+    'rate-limit': {'rate_limit': 1},
+    '5xx-burst': {'error_rate': 0.5, 'error_burst': 2},
+    'truncated': {'truncate_rate': 0.5},
+    'corrupted': {'corrupt_rate': 0.5},
+    'slow-drip': {'drip': 5.0},
+    'outage': {'error_rate': 1.0, 'error_burst': 1000},
+}
+
+# Fetch settings for --faults, scaled down from the defaults so a scenario
+# takes seconds rather than minutes
+FAULT_FETCH_SETTINGS = {
+    'fetch_attempts': 3,
+    'fetch_backoff_seconds': 0.25,
+    'fetch_timeout_seconds': 2,
+    'fetch_body_timeout_seconds': 2,
+    'fetch_deadline_seconds': 10,
+}
+
+RESULTS_VERSION = 1
+
+AREA_NAMES = [
+    'Lejrplads & Lejrliv (LEJ)', 'Infrastruktur & Beredskab (IB)', 'Aktiviteter (AKT)',
+    'Kommunikation & Presse (KOM)', 'Mad & Forplejning (MAD)', 'Frivillige & Trivsel (FRI)',
+    'Økonomi & Administration (ØKA)', 'Internationalt (INT)',
+]
+UNIT_WORDS = [
+    'Handel', 'Indkøb', 'Køkken', 'Værksted', 'Sø', 'Bål', 'Førstehjælp', 'Logistik',
+    'Vagt', 'Café', 'Scene', 'Strøm', 'Vand', 'Affald', 'Skovtur', 'Børneby', 'Bar',
+]
+JOB_TITLES = [
+    'Barchef', 'Kok i køkkenet', 'Vagt ved indgangen', 'Frivillig på værkstedet',
+    'Sølivredder', 'Elektriker', 'Chauffør', 'Fotograf', 'Caféhjælper', 'Bålmester',
+]
+SENTENCES = [
+    'Vi søger frivillige, der har lyst til at gøre en forskel for tusindvis af spejdere.',
+    'Du bliver en del af et stærkt hold, hvor vi hjælper hinanden og har det sjovt.',
+    'Opgaverne spænder fra planlægning før lejren til praktisk arbejde på pladsen.',
+    'Erfaring er ikke et krav – vi lærer dig det, du skal bruge.',
+    'Du får mad, kaffe og en plads i lejrens fællesskab under hele ugen.',
+    'Vi arbejder i vagter på 6–8 timer, så der også er tid til at opleve lejren.',
+    'Har du spørgsmål, er du velkommen til at kontakte teamlederen på forhånd.',
+]
+BULLETS = [
+    'Du er mødestabil &amp; glad for at arbejde med andre',
+    'Du kan tage ansvar og holde overblikket i travle perioder',
+    'Du har lyst til at lære nyt',
+    'Du er fyldt 18 år',
+    'Du taler dansk eller engelsk',
+]
+
+
+def load_stand_in_module():
+    """Import campos-stand-in.py (hyphenated, so not importable by name)"""
+    script_path = Path(__file__).parent / 'campos-stand-in.py'
+    spec = importlib.util.spec_from_file_location('campos_stand_in', script_path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def load_fetcher_module():
+    """Import fetch-job-export.py (hyphenated, so not importable by name)"""
+    # Loaded once and registered by name, so the job records sent back by
+    # process workers unpickle as this module's classes
+    if 'fetch_job_export' in sys.modules:
+        return sys.modules['fetch_job_export']
+    script_path = Path(__file__).parent / 'fetch-job-export.py'
+    spec = importlib.util.spec_from_file_location('fetch_job_export', script_path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def generate_orgs(count, seed=2026):
+    """Generate an org export with roughly `count` organizations
+
+    Mirrors the CampOS structure: 1 (root) / 2 (camp) / area / committee /
+    team / workgroup, with names like '5532 - GRAS'.
+    """
+    rng = random.Random(seed)
+    orgs = [
+        {'name': 'Spejderne', 'parent_path': '1/'},
+        {'name': '0002 - Spejdernes Lejr 2026', 'parent_path': '1/2/'},
+    ]
+    next_id = 3
+    frontier = ['1/2/']
+
+    while len(orgs) < count:
+        parent = rng.choice(frontier)
+        org_id = next_id
+        next_id += 1
+        path = f"{parent}{org_id}/"
+        orgs.append({'name': f"{5000 + org_id:04d} - Enhed {org_id}", 'parent_path': path})
+        # Workgroups (depth 6) are leaves
+        if path.count('/') < 6:
+            frontier.append(path)
+
+    return orgs
+
+
+def generate_org_tree(depth=4, width=5, seed=2026):
+    """Generate an org export as a full tree below the camp
+
+    Every organization down to `depth` levels below the camp (4 is area /
+    committee / team / workgroup) gets `width` children, so the export has
+    width + width**2 + ... + width**depth organizations besides the root
+    and camp. Areas are named like the real ones, other units get Danish
+    names with the numbering CampOS uses ('5590 - Handel, mad & Indkøb').
+    """
+    rng = random.Random(seed)
+    orgs = [
+        {'name': 'Spejderne', 'parent_path': '1/'},
+        {'name': '0002 - Spejdernes Lejr 2026', 'parent_path': '1/2/'},
+    ]
+    next_id = 3
+    level = [('1/2/', '')]
+
+    for level_number in range(1, depth + 1):
+        children = []
+        for parent_path, parent_number in level:
+            for position in range(1, width + 1):
+                org_id = next_id
+                next_id += 1
+                if level_number == 1:
+                    number = str(5500 + position * 10)
+                    name = AREA_NAMES[(position - 1) % len(AREA_NAMES)]
+                else:
+                    number = f"{parent_number}{position}"
+                    name = ', '.join(rng.sample(UNIT_WORDS, 2)) + f" & {rng.choice(UNIT_WORDS).lower()}"
+                path = f"{parent_path}{org_id}/"
+                orgs.append({'name': f"{number} - {name}", 'parent_path': path})
+                children.append((path, number))
+        level = children
+
+    return orgs
+
+
+def generate_description(rng):
+    """A Danish HTML job description like the ones written in CampOS"""
+    paragraphs = [
+        f"<p>{' '.join(rng.sample(SENTENCES, rng.randint(2, 4)))}</p>"
+        for _ in range(rng.randint(1, 3))
+    ]
+    bullets = ''.join(f"<li>{bullet}</li>" for bullet in rng.sample(BULLETS, rng.randint(2, 4)))
+    return (
+        f"<p><strong>{rng.choice(SENTENCES)}</strong></p>"
+        + ''.join(paragraphs)
+        + f"<p>Vi forventer, at:</p><ul>{bullets}</ul>"
+    )
+
+
+def generate_jobs(count, orgs, seed=2026):
+    """Generate a job export referencing organizations by name"""
+    rng = random.Random(seed)
+    org_names = [org['name'] for org in orgs[2:]] or [orgs[-1]['name']]
+    return [
+        {
+            'id': job_id,
+            'name': f"{rng.choice(JOB_TITLES)} {job_id}",
+            'teaser': rng.choice(SENTENCES),
+            'description': generate_description(rng),
+            'description_time_and_scope': f"<p>{rng.randint(2, 9)} dage på lejren, vagter på 6–8 timer</p>",
+            'requirements': rng.choice([None, '<p>Børneattest</p>', '<p>Kørekort til bus</p>']),
+            'organization_id': rng.choice(org_names),
+            'application_count': rng.randint(0, 10),
+            'no_of_recruitment': rng.randint(1, 10),
+            'no_of_hired_employee': rng.randint(0, 5),
+            'min_age': rng.choice([15, 16, 18]),
+            'website_url': f"/jobs/detail/{job_id}",
+            'create_date': '2025-05-06T23:59:57.525504+02:00',
+        }
+        for job_id in range(1, count + 1)
+    ]
+
+
+def bench_org_hierarchy(module, org_counts, job_counts):
+    """Time org index build and process_jobs for each org/job count pair"""
+    print(f"{'orgs':>8} {'jobs':>8} {'index ms':>10} {'jobs ms':>10} {'us/job':>8}")
+
+    for org_count in org_counts:
+        orgs = generate_orgs(org_count)
+        for job_count in job_counts:
+            jobs = generate_jobs(job_count, orgs)
+            fetcher = module.JobExportFetcher(None, None)
+
+            with redirect_stdout(io.StringIO()):
+                start = time.perf_counter()
+                fetcher.build_org_lookup(orgs)
+                fetcher.build_org_map()
+                index_time = time.perf_counter() - start
+
+                start = time.perf_counter()
+                fetcher.process_jobs(jobs)
+                jobs_time = time.perf_counter() - start
+
+            print(
+                f"{org_count:>8} {job_count:>8} {index_time * 1000:>10.1f} "
+                f"{jobs_time * 1000:>10.1f} {jobs_time / job_count * 1e6:>8.1f}"
+            )
+
+
+def run_stages(module, orgs, jobs, output_dir, measure):
+    """Run each pipeline stage once in a fresh output dir, through measure(name, fn)"""
+    output_dir = Path(output_dir)
+    index_html = Path(__file__).parent.parent / 'index.html'
+    (output_dir / 'index.html').write_text(index_html.read_text(encoding='utf-8'), encoding='utf-8')
+
+    fetcher = module.JobExportFetcher(None, output_dir / 'jobs-export.json')
+    with redirect_stdout(io.StringIO()):
+        measure('build_org_lookup', lambda: fetcher.build_org_lookup(orgs))
+        org_map = measure('build_org_map', fetcher.build_org_map)
+        processed = measure('process_jobs', lambda: fetcher.process_jobs(jobs))
+        measure('write_output', lambda: fetcher.write_output(processed, org_map))
+        measure('generate_og_pages', lambda: fetcher.generate_og_pages(processed, str(output_dir)))
+
+
+def bench_stages(module, depth, width, job_counts, repeat=3, seed=2026):
+    """Time and memory-profile each pipeline stage for each job count
+
+    Timing is the best of `repeat` runs without tracing; memory is the
+    tracemalloc peak of each stage above what was allocated before it, from
+    one extra traced run. Every run starts from an empty output dir.
+
+    Returns: the results, as written by --json
+    """
+    orgs = generate_org_tree(depth, width, seed)
+    results = {
+        'version': RESULTS_VERSION,
+        'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'params': {'depth': depth, 'width': width, 'orgs': len(orgs), 'repeat': repeat, 'seed': seed},
+        'runs': [],
+    }
+
+    print(f"{len(orgs)} orgs (depth {depth}, width {width})")
+    print(f"{'jobs':>8} {'stage':<18} {'ms':>10} {'peak MB':>10}")
+
+    for job_count in job_counts:
+        jobs = generate_jobs(job_count, orgs, seed)
+        seconds = {stage: float('inf') for stage in STAGES}
+        peak_bytes = {}
+
+        def timed(name, fn):
+            start = time.perf_counter()
+            result = fn()
+            seconds[name] = min(seconds[name], time.perf_counter() - start)
+            return result
+
+        def traced(name, fn):
+            before = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            result = fn()
+            peak_bytes[name] = tracemalloc.get_traced_memory()[1] - before
+            return result
+
+        for _ in range(repeat):
+            with tempfile.TemporaryDirectory() as output_dir:
+                run_stages(module, orgs, jobs, output_dir, timed)
+
+        with tempfile.TemporaryDirectory() as output_dir:
+            tracemalloc.start()
+            try:
+                run_stages(module, orgs, jobs, output_dir, traced)
+            finally:
+                tracemalloc.stop()
+
+        stages = {
+            stage: {'seconds': round(seconds[stage], 6), 'peak_bytes': peak_bytes[stage]}
+            for stage in STAGES
+        }
+        results['runs'].append({'jobs': job_count, 'stages': stages})
+        for stage in STAGES:
+            print(
+                f"{job_count:>8} {stage:<18} {seconds[stage] * 1000:>10.1f} "
+                f"{peak_bytes[stage] / 1e6:>10.1f}"
+            )
+
+    return results
+
+
+def bench_memory(module, job_count, org_count=1000):
+    """Trace peak memory of a full export run with the default settings, list vs stream_jobs"""
+    orgs = generate_orgs(org_count)
+    jobs = generate_jobs(job_count, orgs)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        job_export = tmp / 'jobs.json'
+        job_export.write_text(json.dumps(jobs), encoding='utf-8')
+        org_raw = json.dumps(orgs).encode('utf-8')
+        export_size = job_export.stat().st_size
+        del jobs
+
+        print(f"{job_count} jobs, {export_size / 1e6:.1f} MB export")
+        print(f"{'mode':>8} {'peak MB':>10} {'time s':>8}")
+
+        for streaming in (False, True):
+            config_file = tmp / 'config.json'
+            config_file.write_text(json.dumps({
+                'org_export_url': 'orgs',
+                'job_export_url': 'jobs',
+                'stream_jobs': streaming,
+            }))
+            fetcher = module.JobExportFetcher(config_file, tmp / 'public' / 'jobs-export.json', full=True)
+            (tmp / 'public').mkdir(exist_ok=True)
+
+            def fetch_bytes(url, spool=False):
+                if url == 'orgs':
+                    return org_raw
+                if spool:
+                    sha256 = module.file_hash(job_export)
+                    return module.SpooledBody(job_export, sha256, export_size)
+                return job_export.read_bytes()
+
+            fetcher.fetch_bytes = fetch_bytes
+
+            with redirect_stdout(io.StringIO()):
+                tracemalloc.start()
+                start = time.perf_counter()
+                fetcher.run()
+                elapsed = time.perf_counter() - start
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+
+            mode = 'stream' if streaming else 'list'
+            print(f"{mode:>8} {peak / 1e6:>10.1f} {elapsed:>8.2f}")
+
+
+def bench_faults(module, job_count, scenarios=None, rounds=5, seed=2026):
+    """Fetch the exports from a CampOS stand-in under each fault scenario
+
+    Each scenario fetches both exports `rounds` times, against one stand-in
+    without ETags, so every request downloads the body; the clean first
+    scenario leaves a copy in the HTTP cache for the stale fallback.
+    Returns {scenario: result}.
+    """
+    stand_in_module = load_stand_in_module()
+    exports = stand_in_module.generate_exports(job_count, seed=seed)
+    job_export = exports[stand_in_module.JOB_EXPORT_PATH]
+    # The stand-in sends the body gzipped, which is what the drip slows down
+    sent_size = len(gzip.compress(job_export))
+    print(f"{job_count} jobs, {len(job_export) / 1e6:.1f} MB job export ({sent_size / 1e6:.2f} MB gzipped)")
+    print(f"{rounds} fetches of both exports per scenario")
+    print(f"{'scenario':<12} {'mean s':>8} {'max s':>8} {'requests':>9} {'retries':>8}  results")
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp, stand_in_module.CampOSStandIn(exports, etags=False) as stand_in:
+        for name in scenarios or FAULT_SCENARIOS:
+            faults = dict(FAULT_SCENARIOS[name])
+            if 'drip' in faults:
+                faults['drip'] = sent_size / faults['drip']
+            stand_in.server.faults = stand_in_module.Faults(seed=seed, **faults)
+            requests_before = sum(stand_in.stats.values())
+
+            seconds, retries, outcomes = [], 0, {}
+            for _ in range(rounds):
+                fetcher = module.JobExportFetcher(None, None, state_dir=tmp)
+                fetcher.config = dict(
+                    FAULT_FETCH_SETTINGS,
+                    org_export_url=stand_in.org_export_url,
+                    job_export_url=stand_in.job_export_url,
+                )
+                start = time.perf_counter()
+                with redirect_stdout(io.StringIO()):
+                    try:
+                        fetcher.fetch_exports()
+                        stale = any(
+                            value for (counter, _), value in fetcher.metrics.counters.items()
+                            if counter == 'stale_exports'
+                        )
+                        outcome = 'stale' if stale else 'fresh'
+                    except SystemExit:
+                        outcome = 'failed'
+                seconds.append(time.perf_counter() - start)
+                retries += fetcher.metrics.counters.get(('fetch_retries', ()), 0)
+                outcomes[outcome] = outcomes.get(outcome, 0) + 1
+
+            results[name] = {
+                'mean_seconds': round(sum(seconds) / rounds, 3),
+                'max_seconds': round(max(seconds), 3),
+                'requests': sum(stand_in.stats.values()) - requests_before,
+                'retries': retries,
+                'outcomes': outcomes,
+            }
+            row = results[name]
+            outcome_text = ', '.join(f"{outcome} {count}" for outcome, count in sorted(outcomes.items()))
+            print(
+                f"{name:<12} {row['mean_seconds']:>8.2f} {row['max_seconds']:>8.2f} "
+                f"{row['requests']:>9} {row['retries']:>8}  {outcome_text}"
+            )
+
+    return results
+
+
+def bench_parallel(module, job_counts, worker_counts, cores=4, repeat=3, depth=4, width=5, seed=2026):
+    """Time serial vs process pool job processing, measured and projected to `cores` CPUs
+
+    Times process_jobs_incremental() of a full run (no previous state), the
+    best of `repeat` runs. For the pool, the CPU time of the run's own
+    process (splitting the export, merging the records the workers send
+    back) and of its workers (building the records, pickling them) is
+    measured too. The overhead is the CPU time the pool costs beyond the
+    serial run, and the projected time on c CPUs is the run's own CPU time
+    plus the workers' split over min(workers, c) processes.
+
+    The crossover is the smallest job count from which the pool (with the
+    best worker count) is faster at every larger job count, so a single
+    lucky run does not set it.
+
+    Returns: {'runs': {job_count: {'serial', 'parallel': {workers: {...}}}},
+    'crossover': {'measured', 'projected'}}, a crossover None when not reached
+    """
+    orgs = generate_org_tree(depth, width, seed)
+    local_cores = module.available_cpus()
+    fetcher = module.JobExportFetcher(None, None)
+    with redirect_stdout(io.StringIO()):
+        fetcher.build_org_lookup(orgs)
+
+    def best(fn):
+        """(seconds, CPU seconds of this process, of its workers) of the fastest run"""
+        runs = []
+        for _ in range(repeat):
+            with redirect_stdout(io.StringIO()):
+                before = os.times()
+                start = time.perf_counter()
+                fn()
+                seconds = time.perf_counter() - start
+                after = os.times()
+            runs.append((
+                seconds,
+                after.user + after.system - before.user - before.system,
+                after.children_user + after.children_system - before.children_user - before.children_system,
+            ))
+        return min(runs)
+
+    print(f"{local_cores} CPUs here, projecting to {cores}")
+    print(
+        f"{'jobs':>8} {'workers':>8} {'serial ms':>10} {'pool ms':>10} {'speedup':>8} "
+        f"{'overhead ms':>12} {'projected ms':>13} {'speedup':>8}"
+    )
+
+    results = {'runs': {}, 'crossover': {'measured': None, 'projected': None}}
+    for job_count in job_counts:
+        jobs = generate_jobs(job_count, orgs, seed)
+        fetcher.config = {'process_workers': 1}
+        serial = best(lambda: fetcher.process_jobs_incremental(jobs, {}))[0]
+        run = results['runs'][job_count] = {'serial': serial, 'parallel': {}}
+
+        for workers in worker_counts:
+            fetcher.config = {'process_workers': workers, 'parallel_min_jobs': 0}
+            used = fetcher.parallel_workers(job_count)
+            pool, own_cpu, worker_cpu = best(lambda: fetcher.process_jobs_incremental(jobs, {}))
+            if used:
+                overhead = max(0.0, own_cpu + worker_cpu - serial)
+                projected = own_cpu + worker_cpu / min(used, cores)
+            else:
+                overhead, projected = 0.0, serial
+            run['parallel'][workers] = {
+                'workers_used': used, 'seconds': pool, 'overhead': overhead, 'projected': projected,
+            }
+            print(
+                f"{job_count:>8} {used:>8} {serial * 1000:>10.1f} {pool * 1000:>10.1f} "
+                f"{serial / pool:>7.2f}x {overhead * 1000:>12.1f} {projected * 1000:>13.1f} "
+                f"{serial / projected:>7.2f}x"
+            )
+
+    for kind, key, cpus in (('measured', 'seconds', local_cores), ('projected', 'projected', cores)):
+        for job_count in reversed(job_counts):
+            run = results['runs'][job_count]
+            pools = [row[key] for row in run['parallel'].values() if row['workers_used']]
+            if not pools or min(pools) >= run['serial']:
+                break
+            results['crossover'][kind] = job_count
+        job_count = results['crossover'][kind]
+        found = f"from {job_count} jobs" if job_count is not None else "not reached"
+        print(f"Crossover ({kind}, {cpus} CPUs): {found}")
+    return results
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--orgs', type=int, nargs='+', default=[250, 1000, 4000])
+    parser.add_argument('--jobs', type=int, nargs='+')
+    parser.add_argument('--stages', action='store_true',
+                        help="time and memory-profile each pipeline stage")
+    parser.add_argument('--depth', type=int, default=4,
+                        help="org tree levels below the camp, for --stages (default: 4)")
+    parser.add_argument('--width', type=int, default=5,
+                        help="children per organization, for --stages (default: 5)")
+    parser.add_argument('--repeat', type=int, default=3,
+                        help="timed runs per job count, for --stages and --parallel (default: 3)")
+    parser.add_argument('--json', type=Path, metavar='PATH',
+                        help="write --stages results to this file")
+    parser.add_argument('--memory', type=int, metavar='JOBS',
+                        help="compare peak memory of list and stream_jobs runs")
+    parser.add_argument('--faults', type=int, metavar='JOBS',
+                        help="fetch from a CampOS stand-in under each fault scenario")
+    parser.add_argument('--parallel', action='store_true',
+                        help="compare serial and process pool job processing")
+    parser.add_argument('--workers', type=int, nargs='+', default=[2, 4],
+                        help="worker processes, for --parallel (default: 2 4)")
+    parser.add_argument('--cores', type=int, default=4,
+                        help="CPUs to project --parallel times to (default: 4)")
+    args = parser.parse_args()
+
+    module = load_fetcher_module()
+    if args.memory:
+        bench_memory(module, args.memory)
+    elif args.faults:
+        bench_faults(module, args.faults)
+    elif args.parallel:
+        bench_parallel(
+            module, args.jobs or [1000, 2000, 5000, 10000, 20000, 50000], args.workers, args.cores,
+            args.repeat, args.depth, args.width,
+        )
+    elif args.stages:
+        results = bench_stages(module, args.depth, args.width, args.jobs or [1000, 10000], args.repeat)
+        if args.json:
+            args.json.write_text(json.dumps(results, indent=2) + '\n', encoding='utf-8')
+            print(f"Wrote {args.json}")
+    else:
+        bench_org_hierarchy(module, args.orgs, args.jobs or [200, 2000, 20000])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+"""
+Tests for benchmark-export.py
+
+Run with:
+    python3 -m unittest discover -s scripts -p '*_test.py'
+"""
+
+import importlib.util
+import io
+import random
+import unittest
+from contextlib import redirect_stdout
+from pathlib import Path
+
+
+def load_benchmark_module():
+    """Import benchmark-export.py (hyphenated, so not importable by name)"""
+    script_path = Path(__file__).parent / 'benchmark-export.py'
+    spec = importlib.util.spec_from_file_location('benchmark_export', script_path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+benchmark_export = load_benchmark_module()
+
+
+class GeneratorTest(unittest.TestCase):
+    def test_org_tree_has_given_depth_and_width(self):
+        orgs = benchmark_export.generate_org_tree(depth=3, width=4)
+        self.assertEqual(len(orgs), 2 + 4 + 16 + 64)
+        self.assertEqual(max(org['parent_path'].count('/') for org in orgs), 2 + 3)
+        self.assertEqual(len({org['name'] for org in orgs}), len(orgs))
+
+    def test_jobs_resolve_against_the_tree(self):
+        orgs = benchmark_export.generate_org_tree(depth=4, width=2)
+        jobs = benchmark_export.generate_jobs(50, orgs)
+        fetcher = benchmark_export.load_fetcher_module().JobExportFetcher(None, None)
+        with redirect_stdout(io.StringIO()):
+            fetcher.build_org_lookup(orgs)
+            processed = fetcher.process_jobs(jobs)
+        self.assertTrue(all(job['org_hierarchy']['area'] for job in processed))
+
+    def test_generation_is_deterministic(self):
+        self.assertEqual(
+            benchmark_export.generate_jobs(5, benchmark_export.generate_org_tree(2, 3)),
+            benchmark_export.generate_jobs(5, benchmark_export.generate_org_tree(2, 3)),
+        )
+        description = benchmark_export.generate_description(random.Random(1))
+        self.assertTrue(description.startswith('<p>'))
+        self.assertIn('<ul><li>', description)
+
+
+class StagesTest(unittest.TestCase):
+    def test_every_stage_is_measured(self):
+        with redirect_stdout(io.StringIO()):
+            results = benchmark_export.bench_stages(
+                benchmark_export.load_fetcher_module(), depth=2, width=2, job_counts=[5], repeat=1
+            )
+        self.assertEqual(results['params']['orgs'], 2 + 2 + 4)
+        stages = results['runs'][0]['stages']
+        self.assertEqual(list(stages), list(benchmark_export.STAGES))
+        for stage in stages.values():
+            self.assertGreaterEqual(stage['seconds'], 0)
+            self.assertGreaterEqual(stage['peak_bytes'], 0)
+
+
+class FaultsTest(unittest.TestCase):
+    def test_outage_falls_back_to_the_cached_exports(self):
+        with redirect_stdout(io.StringIO()):
+            results = benchmark_export.bench_faults(
+                benchmark_export.load_fetcher_module(), 10, scenarios=['clean', 'outage'], rounds=1
+            )
+        self.assertEqual(results['clean']['outcomes'], {'fresh': 1})
+        self.assertEqual(results['clean']['requests'], 2)
+        self.assertEqual(results['outage']['outcomes'], {'stale': 1})
+        self.assertEqual(results['outage']['retries'], 4)
+
+
+
+class ParallelTest(unittest.TestCase):
+    def test_small_exports_stay_serial_and_large_ones_use_the_pool(self):
+        with redirect_stdout(io.StringIO()) as stdout:
+            results = benchmark_export.bench_parallel(
+                benchmark_export.load_fetcher_module(), [10, 2000], [2], cores=8, repeat=1, depth=2, width=2
+            )
+        self.assertEqual(results['runs'][10]['parallel'][2]['workers_used'], 0)
+        self.assertEqual(results['runs'][10]['parallel'][2]['projected'], results['runs'][10]['serial'])
+        pool = results['runs'][2000]['parallel'][2]
+        self.assertEqual(pool['workers_used'], 2)
+        self.assertGreaterEqual(pool['overhead'], 0)
+        self.assertEqual(set(results['crossover']), {'measured', 'projected'})
+        self.assertIn('Crossover (projected, 8 CPUs)', stdout.getvalue())
+
+
+if __name__ == '__main__':
+    unittest.main()
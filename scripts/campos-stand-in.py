@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the CampOS export API, with fault injection
+
+Serves a synthetic org export at /exports/9 and job export at /exports/6
+(the paths of the real exports, any ?api_key is ignored), generated like
+benchmark-export.py does, with ETag/304 and gzip like CampOS. Point a
+config.json at it to load-test the exporter, or to see how it copes with
+a misbehaving CampOS without touching production.
+
+Faults, each optional and combinable (random ones use --seed):
+- --latency: seconds before each response (plus up to --latency-jitter)
+- --rate-limit: requests per second; requests over it get 429 with a
+  Retry-After header
+- --error-rate/--error-burst: chance that a request starts a burst of
+  that many 503 responses in a row
+- --fail-first: answer the first this many requests with 503, like a
+  CampOS that is still starting up
+- --truncate-rate: chance that a body is cut off halfway, after sending
+  the full Content-Length
+- --corrupt-rate: chance that the second half of a body's JSON is blanked
+  out: the full Content-Length arrives (gzipped when accepted), but the
+  JSON is invalid
+- --drip: send bodies at this many bytes per second
+- --no-etag: send no validators, so every request downloads the body
+
+GET /stats returns the number of responses per status code.
+
+Usage:
+    python3 scripts/campos-stand-in.py --jobs 2000 --port 8900
+    python3 scripts/campos-stand-in.py --error-rate 0.2 --error-burst 3 --drip 50000
+"""
+
+import argparse
+import gzip
+import hashlib
+import importlib.util
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+ORG_EXPORT_PATH = '/exports/9'
+JOB_EXPORT_PATH = '/exports/6'
+
+
+def load_benchmark_module():
+    """Import benchmark-export.py (hyphenated, so not importable by name)"""
+    script_path = Path(__file__).parent / 'benchmark-export.py'
+    spec = importlib.util.spec_from_file_location('benchmark_export', script_path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def generate_exports(job_count, depth=4, width=5, seed=2026):
+    """Synthetic {path: body} exports for the stand-in to serve"""
+    benchmark = load_benchmark_module()
+    orgs = benchmark.generate_org_tree(depth, width, seed)
+    jobs = benchmark.generate_jobs(job_count, orgs, seed)
+    return {
+        ORG_EXPORT_PATH: json.dumps(orgs, ensure_ascii=False).encode('utf-8'),
+        JOB_EXPORT_PATH: json.dumps(jobs, ensure_ascii=False).encode('utf-8'),
+    }
+
+
+class Faults:
+    """The faults injected by a stand-in, decided per request
+
+    decide() is called once per request and returns what to do with it;
+    it is thread-safe, and with the same seed and request order it makes
+    the same decisions.
+    """
+
+    def __init__(self, latency=0.0, latency_jitter=0.0, rate_limit=None, error_rate=0.0,
+                 error_burst=1, fail_first=0, truncate_rate=0.0, corrupt_rate=0.0, drip=None, seed=None):
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.rate_limit = rate_limit
+        self.error_rate = error_rate
+        self.error_burst = error_burst
+        self.truncate_rate = truncate_rate
+        self.corrupt_rate = corrupt_rate
+        self.drip = drip
+        self.rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._burst_left = fail_first
+        # Token bucket of the rate limit, holding at most one second's worth
+        self._tokens = max(1.0, rate_limit or 0)
+        self._refilled_at = time.monotonic()
+
+    def _take_token(self):
+        """Seconds until a request is allowed, 0 when it is (and counted)"""
+        now = time.monotonic()
+        capacity = max(1.0, self.rate_limit)
+        self._tokens = min(capacity, self._tokens + (now - self._refilled_at) * self.rate_limit)
+        self._refilled_at = now
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return 0
+        return (1 - self._tokens) / self.rate_limit
+
+    def decide(self):
+        """Return {'delay', 'status', 'retry_after', 'truncate', 'corrupt'} for a request"""
+        with self._lock:
+            decision = {
+                'delay': self.latency + self.rng.uniform(0, self.latency_jitter),
+                'status': 200,
+                'retry_after': None,
+                'truncate': False,
+                'corrupt': False,
+            }
+            if self.rate_limit:
+                wait = self._take_token()
+                if wait:
+                    decision.update(status=429, retry_after=max(1, round(wait + 0.5)))
+                    return decision
+            if self._burst_left == 0 and self.error_rate and self.rng.random() < self.error_rate:
+                self._burst_left = self.error_burst
+            if self._burst_left:
+                self._burst_left -= 1
+                decision['status'] = 503
+                return decision
+            decision['truncate'] = bool(self.truncate_rate) and self.rng.random() < self.truncate_rate
+            decision['corrupt'] = bool(self.corrupt_rate) and self.rng.random() < self.corrupt_rate
+            return decision
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """Serves server.exports like CampOS, with server.faults injected"""
+
+    # Keep-alive like a real server, so truncated bodies must be detected
+    # from the Content-Length rather than the connection closing
+    protocol_version = 'HTTP/1.1'
+
+    def count(self, status):
+        with self.server.lock:
+            self.server.stats[status] = self.server.stats.get(status, 0) + 1
+
+    def send_status(self, status, headers=None):
+        self.count(status)
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def do_GET(self):
+        path = self.path.split('?')[0]
+        if path == '/stats':
+            body = json.dumps({str(status): count for status, count in sorted(self.server.stats.items())})
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body.encode('utf-8'))
+            return
+
+        body = self.server.exports.get(path)
+        if body is None:
+            self.send_status(404)
+            return
+
+        decision = self.server.faults.decide()
+        time.sleep(decision['delay'])
+        if decision['status'] == 429:
+            self.send_status(429, {'Retry-After': str(decision['retry_after'])})
+            return
+        if decision['status'] != 200:
+            self.send_status(decision['status'])
+            return
+
+        etag = '"%s"' % hashlib.sha256(body).hexdigest()[:16]
+        if self.server.etags and self.headers.get('If-None-Match') == etag:
+            self.send_status(304, {'ETag': etag})
+            return
+
+        self.count(200)
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        if self.server.etags:
+            self.send_header('ETag', etag)
+        if decision['corrupt']:
+            half = len(body) // 2
+            body = body[:half] + b' ' * (len(body) - half)
+        if 'gzip' in self.headers.get('Accept-Encoding', ''):
+            body = gzip.compress(body) if decision['corrupt'] else self.gzipped(etag, body)
+            self.send_header('Content-Encoding', 'gzip')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+
+        if decision['truncate']:
+            body = body[:len(body) // 2]
+            self.close_connection = True
+        self.write_body(body, self.server.faults.drip)
+
+    def gzipped(self, etag, body):
+        """The gzipped body of an export, compressed once per version (ETag)"""
+        with self.server.lock:
+            if etag not in self.server.gzipped:
+                self.server.gzipped[etag] = gzip.compress(body)
+            return self.server.gzipped[etag]
+
+    def write_body(self, body, drip=None):
+        """Write a body, at `drip` bytes per second when set"""
+        if not drip:
+            self.wfile.write(body)
+            return
+        chunk_size = max(1, int(drip) // 10)
+        try:
+            for offset in range(0, len(body), chunk_size):
+                self.wfile.write(body[offset:offset + chunk_size])
+                self.wfile.flush()
+                time.sleep(chunk_size / drip)
+        except (BrokenPipeError, ConnectionResetError):
+            # The client gave up waiting
+            self.close_connection = True
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+class CampOSStandIn:
+    """A stand-in CampOS server on a background thread
+
+    Usage:
+        with CampOSStandIn(generate_exports(1000), Faults(error_rate=0.1)) as stand_in:
+            config = {'org_export_url': stand_in.org_export_url, ...}
+    """
+
+    def __init__(self, exports, faults=None, host='127.0.0.1', port=0, etags=True, verbose=False):
+        self.server = ThreadingHTTPServer((host, port), StandInHandler)
+        self.server.daemon_threads = True
+        self.server.exports = exports
+        self.server.faults = faults or Faults()
+        self.server.etags = etags
+        self.server.verbose = verbose
+        self.server.stats = {}
+        self.server.lock = threading.Lock()
+        self.server.gzipped = {}
+        self.thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def org_export_url(self):
+        return self.base_url + ORG_EXPORT_PATH + '?api_key=stand-in'
+
+    @property
+    def job_export_url(self):
+        return self.base_url + JOB_EXPORT_PATH + '?api_key=stand-in'
+
+    @property
+    def stats(self):
+        """Responses so far by status code"""
+        with self.server.lock:
+            return dict(self.server.stats)
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, kwargs={'poll_interval': 0.05}, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8900)
+    parser.add_argument('--jobs', type=int, default=1000, help="jobs in the job export (default: 1000)")
+    parser.add_argument('--depth', type=int, default=4, help="org tree levels below the camp (default: 4)")
+    parser.add_argument('--width', type=int, default=5, help="children per organization (default: 5)")
+    parser.add_argument('--latency', type=float, default=0.0, metavar='SECONDS')
+    parser.add_argument('--latency-jitter', type=float, default=0.0, metavar='SECONDS')
+    parser.add_argument('--rate-limit', type=float, metavar='RPS')
+    parser.add_argument('--error-rate', type=float, default=0.0, metavar='P')
+    parser.add_argument('--error-burst', type=int, default=1, metavar='N')
+    parser.add_argument('--fail-first', type=int, default=0, metavar='N')
+    parser.add_argument('--truncate-rate', type=float, default=0.0, metavar='P')
+    parser.add_argument('--corrupt-rate', type=float, default=0.0, metavar='P')
+    parser.add_argument('--drip', type=float, metavar='BYTES_PER_SECOND')
+    parser.add_argument('--no-etag', action='store_true', help="send no ETag, so nothing is answered 304")
+    parser.add_argument('--seed', type=int, help="seed for the random faults")
+    args = parser.parse_args()
+
+    faults = Faults(
+        latency=args.latency, latency_jitter=args.latency_jitter, rate_limit=args.rate_limit,
+        error_rate=args.error_rate, error_burst=args.error_burst, fail_first=args.fail_first,
+        truncate_rate=args.truncate_rate,
+        corrupt_rate=args.corrupt_rate, drip=args.drip, seed=args.seed,
+    )
+    stand_in = CampOSStandIn(
+        generate_exports(args.jobs, args.depth, args.width), faults,
+        host=args.host, port=args.port, etags=not args.no_etag, verbose=True,
+    )
+    print("Serving CampOS stand-in; config.json:")
+    print(json.dumps({
+        'org_export_url': stand_in.org_export_url,
+        'job_export_url': stand_in.job_export_url,
+    }, indent=2), flush=True)
+    try:
+        stand_in.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stand_in.server.server_close()
+        print(f"Responses: {stand_in.stats}")
+
+
+if __name__ == '__main__':
+    main()
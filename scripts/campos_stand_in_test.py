@@ -0,0 +1,105 @@
+"""
+Tests for campos-stand-in.py
+
+Run with:
+    python3 -m unittest discover -s scripts -p '*_test.py'
+"""
+
+import gzip
+import http.client
+import importlib.util
+import json
+import unittest
+from pathlib import Path
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+
+def load_stand_in_module():
+    """Import campos-stand-in.py (hyphenated, so not importable by name)"""
+    script_path = Path(__file__).parent / 'campos-stand-in.py'
+    spec = importlib.util.spec_from_file_location('campos_stand_in', script_path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+campos_stand_in = load_stand_in_module()
+
+
+class FaultsTest(unittest.TestCase):
+    def test_no_faults_by_default(self):
+        decision = campos_stand_in.Faults().decide()
+        self.assertEqual(
+            decision, {'delay': 0.0, 'status': 200, 'retry_after': None, 'truncate': False, 'corrupt': False}
+        )
+
+    def test_error_bursts(self):
+        faults = campos_stand_in.Faults(error_rate=1.0, error_burst=3)
+        self.assertEqual([faults.decide()['status'] for _ in range(3)], [503, 503, 503])
+
+    def test_fail_first(self):
+        faults = campos_stand_in.Faults(fail_first=2)
+        self.assertEqual([faults.decide()['status'] for _ in range(3)], [503, 503, 200])
+
+    def test_rate_limit_answers_429_with_retry_after(self):
+        faults = campos_stand_in.Faults(rate_limit=0.1)
+        self.assertEqual(faults.decide()['status'], 200)
+        decision = faults.decide()
+        self.assertEqual(decision['status'], 429)
+        self.assertGreaterEqual(decision['retry_after'], 9)
+
+    def test_random_faults_follow_the_seed(self):
+        def statuses(seed):
+            faults = campos_stand_in.Faults(error_rate=0.3, truncate_rate=0.3, seed=seed)
+            return [tuple(faults.decide().values()) for _ in range(20)]
+
+        self.assertEqual(statuses(7), statuses(7))
+
+
+class StandInServerTest(unittest.TestCase):
+    def setUp(self):
+        self.exports = campos_stand_in.generate_exports(5, depth=2, width=2)
+        self.stand_in = campos_stand_in.CampOSStandIn(self.exports).start()
+        self.addCleanup(self.stand_in.stop)
+
+    def get(self, url, headers=None):
+        with urlopen(Request(url, headers=headers or {}), timeout=5) as response:
+            return response.status, dict(response.headers), response.read()
+
+    def test_serves_the_exports_with_etag_and_gzip(self):
+        status, headers, body = self.get(self.stand_in.job_export_url)
+        self.assertEqual(status, 200)
+        self.assertEqual(len(json.loads(body)), 5)
+
+        _, headers, body = self.get(self.stand_in.org_export_url, {'Accept-Encoding': 'gzip'})
+        self.assertEqual(gzip.decompress(body), self.exports[campos_stand_in.ORG_EXPORT_PATH])
+        with self.assertRaises(HTTPError) as raised:
+            self.get(self.stand_in.org_export_url, {'If-None-Match': headers['ETag']})
+        self.assertEqual(raised.exception.code, 304)
+        self.assertEqual(self.stand_in.stats, {200: 2, 304: 1})
+
+    def test_truncated_body_is_short_of_its_content_length(self):
+        self.stand_in.server.faults = campos_stand_in.Faults(truncate_rate=1.0)
+        with self.assertRaises(http.client.IncompleteRead):
+            self.get(self.stand_in.job_export_url)
+
+    def test_corrupt_body_has_its_content_length_but_invalid_json(self):
+        self.stand_in.server.faults = campos_stand_in.Faults(corrupt_rate=1.0)
+        for headers in ({}, {'Accept-Encoding': 'gzip'}):
+            _, response_headers, body = self.get(self.stand_in.job_export_url, headers)
+            if headers:
+                body = gzip.decompress(body)
+            self.assertEqual(len(body), len(self.exports[campos_stand_in.JOB_EXPORT_PATH]))
+            with self.assertRaises(ValueError):
+                json.loads(body)
+
+    def test_stats_endpoint(self):
+        self.stand_in.server.faults = campos_stand_in.Faults(error_rate=1.0)
+        with self.assertRaises(HTTPError):
+            self.get(self.stand_in.job_export_url)
+        self.assertEqual(json.loads(self.get(self.stand_in.base_url + '/stats')[2]), {'503': 1})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -8,30 +8,1981 @@ This script fetches data from the CampOS API:
 
 And generates:
 - jobs-export.json (for use by the jobbank Vue app)
+- jobs-search-index.json (prebuilt inverted index for job search)
+- jobs-list.json + job-data/<slug>.json (slim list payload and per-job details)
+- job/<slug>/index.html OG pages (when index.html is present)
+
+Runs are incremental: a state file in .export-state/ (next to the output, or
+STATE_DIR) records the export hashes and per-job content hashes of the last
+run, so only new, changed or removed jobs are reprocessed, and a run where
+both exports are byte-identical to last time does nothing. Large job
+exports are hashed and processed by a pool of worker processes.
+
+Both exports are fetched with conditional requests (ETag/Last-Modified) against
+an HTTP cache in .export-state/http-cache/, so unchanged exports are not
+downloaded again. The two exports are fetched concurrently, and transient
+errors (timeouts, connection errors, truncated bodies, 429/5xx) are retried
+with backoff. An export that still cannot be fetched falls back to its last
+good copy in the HTTP cache, if it is recent enough.
+
+Each stage of a run is timed and logged as a JSON line, followed by a run
+summary line with counters and peak RSS. With METRICS_FILE set, the same
+metrics are written there in the Prometheus text format (for node-exporter's
+textfile collector).
 
 Configuration:
 - API credentials are stored in config.json (not committed to git)
 - See config.example.json for the required structure
 
+With --daemon the script keeps running and re-fetches on an interval (with
+jitter), keeping the org index, OG page template and run state in memory
+between runs, until it gets SIGTERM. With trigger_port set, POST /refresh
+on that port brings the next run forward (debounced).
+
 Usage:
-    python3 scripts/fetch-job-export.py
+    python3 scripts/fetch-job-export.py [--full] [--daemon] [--config PATH]
 """
 
+import argparse
+import codecs
+import gzip
+import heapq
+import hmac
+import hashlib
 import html as html_module
+import http.client
+import ipaddress
+import itertools
 import json
+import multiprocessing
+import operator
 import os
+import pickle
+import queue
+import random
 import re
 import shutil
+import signal
 import sys
-from datetime import datetime
+import tempfile
+import threading
+import time
+import traceback
+import unicodedata
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from pathlib import Path
 from urllib.request import urlopen, Request
 from urllib.error import URLError, HTTPError
 
+try:
+    import brotli  # optional: enables the precompressed .br sibling
+except ImportError:
+    brotli = None
+
+try:
+    import resource  # optional: peak RSS in the run metrics (not on Windows)
+except ImportError:
+    resource = None
+
+try:
+    import fcntl  # optional: locks the state dir against concurrent runs (not on Windows)
+except ImportError:
+    fcntl = None
+
+
+def is_loopback_host(host):
+    """Whether a server bound to host only accepts connections from this machine"""
+    if host == 'localhost':
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def available_cpus():
+    """CPUs this process may run on (its affinity mask, e.g. a container's cpuset)"""
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def extract_org_id_from_path(path):
+    """Extract the last organization ID from the path
+
+    Example: '1/2/6/55/131/' -> '131'
+    """
+    if not path:
+        return None
+    # Remove trailing slash and split
+    parts = path.rstrip('/').split('/')
+    # Return the last part
+    return parts[-1] if parts else None
+
+
+# A well-formed parent_path: numeric IDs from the root down, ending with
+# the organization's own ID, e.g. "1/2/6/55/"
+ORG_PATH_PATTERN = re.compile(r'^(?:\d+/)*\d+/?$')
+
+# OrgHierarchy.key() of jobs whose organization is not in the org export
+UNKNOWN_HIERARCHY_KEY = ('Unknown', 'Unknown') + (None,) * 6
+
+
+class OrgNode:
+    """A single organization from the org export, with its parent link"""
+
+    __slots__ = ('id', 'name', 'path', 'clean_name', 'path_ids', 'ancestor_ids', 'parent_id')
+
+    def __init__(self, name, path, path_ids, clean_name):
+        self.id = path_ids[-1]
+        self.name = name
+        self.path = path
+        self.clean_name = clean_name
+        # Numeric IDs from the root down, including the node itself
+        self.path_ids = path_ids
+        self.ancestor_ids = path_ids[:-1]
+        self.parent_id = self.ancestor_ids[-1] if self.ancestor_ids else None
+
+
+class OrgHierarchy:
+    """Resolved area/committee/team/workgroup of an organization
+
+    One instance is shared by all jobs of an organization, so it must not be
+    modified. Fields can be read as attributes or, like the dict it
+    replaces, with hierarchy['area'] / hierarchy.get('area').
+    """
+
+    # Fields written to the export, in order ("org_hierarchy" of a job)
+    FIELDS = (
+        'area', 'area_full', 'committee', 'committee_full',
+        'team', 'team_full', 'workgroup', 'workgroup_full',
+    )
+    # full_path (the cleaned names from the area down) is not exported
+    READABLE = FIELDS + ('full_path',)
+    __slots__ = READABLE + ('_json',)
+
+    def __init__(self, area=None, area_full=None, committee=None, committee_full=None,
+                 team=None, team_full=None, workgroup=None, workgroup_full=None, full_path=None):
+        self.area = area
+        self.area_full = area_full
+        self.committee = committee
+        self.committee_full = committee_full
+        self.team = team
+        self.team_full = team_full
+        self.workgroup = workgroup
+        self.workgroup_full = workgroup_full
+        self.full_path = full_path if full_path is not None else []
+        self._json = None
+
+    def key(self):
+        """The exported field values, identifying equal hierarchies"""
+        return tuple(getattr(self, field) for field in self.FIELDS)
+
+    def to_json(self):
+        """The "org_hierarchy" object of the export (cached and shared, do not modify)"""
+        if self._json is None:
+            self._json = dict(zip(self.FIELDS, self.key()))
+        return self._json
+
+    def __reduce__(self):
+        return OrgHierarchy, self.key() + (self.full_path,)
+
+    def get(self, field, default=None):
+        return getattr(self, field) if field in self.READABLE else default
+
+    def __getitem__(self, field):
+        if field not in self.READABLE:
+            raise KeyError(field)
+        return getattr(self, field)
+
+
+class OrgTreeIndex:
+    """Read-only index over the organization export, built once per run.
+
+    Organizations are keyed by their numeric ID (the last parent_path
+    element); jobs refer to them by name, which maps to an ID. The
+    resolved area/committee/team/workgroup hierarchy of every organization
+    is computed up front, so per-job lookups never scan the whole export.
+
+    The export is validated while indexing, and problems are collected in
+    `issues` ({kind: [description, ...]}) instead of surfacing per job:
+    - missing_name: an entry without a name (skipped)
+    - malformed_path: parent_path missing or not numeric IDs (skipped)
+    - cycle: an ID repeated within a parent_path (skipped)
+    - duplicate_id / duplicate_name: the later entry wins
+    - dangling_parent: an ancestor missing from the export (shown as ID-<n>)
+    - path_mismatch: parent_path disagrees with the parent's own
+    Hierarchies are read from each organization's own path, never by
+    following parent links, so an inconsistent export cannot make
+    resolution loop.
+    """
+
+    ISSUE_KINDS = (
+        'missing_name', 'malformed_path', 'cycle', 'duplicate_id', 'duplicate_name',
+        'dangling_parent', 'path_mismatch',
+    )
+    # Descriptions kept per kind of issue (all are counted)
+    ISSUE_EXAMPLES = 20
+
+    def __init__(self, orgs, clean_org_name):
+        """Build the index from the org export ([{"name", "parent_path"}, ...])
+
+        clean_org_name is the (uncached) name cleaner, returning
+        (numeric_id, clean_name) for a raw organization name.
+        """
+        self.organizations = len(orgs)
+        self.nodes = {}
+        self.ids_by_name = {}
+        self.clean_names = {}
+        self.hierarchies = {}
+        self.area_names = {}
+        self.issues = {}
+        self.issue_counts = {}
+        # OrgHierarchy.key() -> the one shared instance with those values
+        self.interned = {}
+        # Hierarchies of names missing from the org export, by name
+        self.unknown_hierarchies = {}
+        self._clean_org_name = clean_org_name
+
+        for org in orgs:
+            self._add(org.get('name'), org.get('parent_path'))
+        self._validate_links()
+
+        for org_id, node in self.nodes.items():
+            self.hierarchies[org_id] = self._resolve_hierarchy(node)
+            self._map_to_area(node)
+
+    def _issue(self, kind, description):
+        self.issue_counts[kind] = self.issue_counts.get(kind, 0) + 1
+        examples = self.issues.setdefault(kind, [])
+        if len(examples) < self.ISSUE_EXAMPLES:
+            examples.append(description)
+
+    def _add(self, name, path):
+        """Index one org export entry, recording what is wrong with it"""
+        if not name:
+            self._issue('missing_name', f"entry with parent_path {path!r}")
+            return
+        if not isinstance(path, str) or not ORG_PATH_PATTERN.match(path):
+            self._issue('malformed_path', f"{name!r}: {path!r}")
+            return
+        path_ids = [int(part) for part in path.rstrip('/').split('/')]
+        if len(set(path_ids)) != len(path_ids):
+            self._issue('cycle', f"{name!r}: {path!r}")
+            return
+
+        node = OrgNode(name, path, path_ids, None)
+        previous = self.nodes.get(node.id)
+        if previous is not None:
+            self._issue('duplicate_id', f"ID {node.id}: {previous.name!r} and {name!r}")
+        previous_id = self.ids_by_name.get(name)
+        if previous_id is not None and previous_id != node.id:
+            self._issue('duplicate_name', f"{name!r}: IDs {previous_id} and {node.id}")
+
+        self.clean_names[name] = self._clean_org_name(name)
+        node.clean_name = self.clean_names[name][1]
+        self.nodes[node.id] = node
+        self.ids_by_name[name] = node.id
+
+    def _validate_links(self):
+        """Record ancestors missing from the export and disagreeing paths"""
+        for node in self.nodes.values():
+            missing = [org_id for org_id in node.ancestor_ids if org_id not in self.nodes]
+            if missing:
+                self._issue('dangling_parent', f"{node.name!r}: {', '.join(map(str, missing))} not in the export")
+            parent = self.nodes.get(node.parent_id)
+            if parent is not None and parent.path_ids != node.ancestor_ids:
+                self._issue('path_mismatch', f"{node.name!r}: {node.path!r}, parent {parent.path!r}")
+
+    def _clean(self, org_name):
+        """Cleaned (numeric_id, clean_name) for a name, cached or computed"""
+        cleaned = self.clean_names.get(org_name)
+        if cleaned is None:
+            cleaned = self._clean_org_name(org_name)
+        return cleaned
+
+    def _name_for_id(self, org_id):
+        node = self.nodes.get(org_id)
+        return node.name if node else f"ID-{org_id}"
+
+    def _map_to_area(self, node):
+        """Record the top-level area (short) name for an organization"""
+        # Strip the two fixed top levels: 1 (Spejderne root) and 2 (SL2026)
+        if len(node.path_ids) < 3:
+            # Root or camp level — no area to map to
+            return
+
+        area_node = self.nodes.get(node.path_ids[2])
+        if area_node and area_node.clean_name:
+            self.area_names[str(node.id)] = area_node.clean_name
+
+    def intern(self, hierarchy):
+        """The shared instance equal to hierarchy (hierarchy itself if it is the first)"""
+        return self.interned.setdefault(hierarchy.key(), hierarchy)
+
+    def intern_json(self, data):
+        """The shared hierarchy for an exported "org_hierarchy" object"""
+        key = tuple(data.get(field) for field in OrgHierarchy.FIELDS)
+        hierarchy = self.interned.get(key)
+        if hierarchy is None:
+            hierarchy = self.interned[key] = OrgHierarchy(*key)
+        return hierarchy
+
+    def adopt(self, hierarchy):
+        """The shared instance for a copy of a hierarchy (unpickled from a worker process)"""
+        if hierarchy.key() == UNKNOWN_HIERARCHY_KEY and len(hierarchy.full_path) == 1:
+            return self.unknown_hierarchy_for(hierarchy.full_path[0])
+        return self.intern(hierarchy)
+
+    def _resolve_hierarchy(self, node):
+        """Resolve the (interned) hierarchy for an organization"""
+        return self.intern(OrgHierarchy(**self._resolve_fields(node)))
+
+    def _resolve_fields(self, node):
+        """Resolve the hierarchy fields for an organization from its path"""
+        # The path 1/2/6/55/131/456/ as IDs
+        parts = node.path_ids
+
+        # Remove first level (1=ignored)
+        if len(parts) > 1:
+            parts = parts[1:]  # Now: [2, 6, 55, 131, 456] or [2] for camp-level
+
+        hierarchy = {
+            'area': None,
+            'area_full': None,
+            'committee': None,
+            'committee_full': None,
+            'team': None,
+            'team_full': None,
+            'workgroup': None,
+            'workgroup_full': None,
+            'full_path': []
+        }
+
+        # Check if this is a camp-level job (only has ID 2)
+        if parts == [2]:
+            # Camp-level job - use special name
+            clean_camp_name = self._clean(node.name)[1] or 'Spejdernes Lejr 2026'
+            hierarchy['area'] = clean_camp_name
+            hierarchy['area_full'] = node.name
+            hierarchy['full_path'].append(clean_camp_name)
+            return hierarchy
+
+        # Remove camp level (2=lejr root) for regular jobs
+        if len(parts) > 1:
+            parts = parts[1:]  # Now: [6, 55, 131, 456]
+
+        # parts[0] = Area, parts[1] = Committee, parts[2] = Team, parts[3] = Workgroup
+        for level, org_id in zip(('area', 'committee', 'team', 'workgroup'), parts):
+            org_full_name = self._name_for_id(org_id)
+            org_clean_name = self._clean(org_full_name)[1]
+            hierarchy[level] = org_clean_name
+            hierarchy[f'{level}_full'] = org_full_name
+            hierarchy['full_path'].append(org_clean_name)
+
+        # Fallback to org name if nothing found
+        if not hierarchy['area']:
+            hierarchy['area'] = self._clean(node.name)[1] or 'Unknown'
+            hierarchy['area_full'] = node.name
+
+        return hierarchy
+
+    def hierarchy_for(self, org_name):
+        """OrgHierarchy for an organization name, or None if unknown
+
+        The returned hierarchy is shared between all jobs of the organization
+        and must not be mutated.
+        """
+        return self.hierarchies.get(self.ids_by_name.get(org_name))
+
+    def unknown_hierarchy_for(self, org_name):
+        """Shared "Unknown" hierarchy for a name missing from the org export"""
+        hierarchy = self.unknown_hierarchies.get(org_name)
+        if hierarchy is None:
+            hierarchy = self.unknown_hierarchies[org_name] = OrgHierarchy(
+                *UNKNOWN_HIERARCHY_KEY, full_path=[org_name]
+            )
+        return hierarchy
+
+    def to_json(self):
+        """The resolved index, for reuse while the org export is unchanged
+
+        Organizations are reduced to what jobs need: name -> ID, the area
+        name of each ID, and its hierarchy as a row [id, <8 fields>,
+        <full_path...>] of indexes into a table of the distinct strings
+        (-1 for None), which keeps the file small and quick to load.
+        """
+        strings = {}
+
+        def string_id(value):
+            return -1 if value is None else strings.setdefault(value, len(strings))
+
+        rows = [
+            [org_id]
+            + [string_id(value) for value in hierarchy.key()]
+            + [string_id(name) for name in hierarchy.full_path]
+            for org_id, hierarchy in self.hierarchies.items()
+        ]
+        return {
+            'organizations': self.organizations,
+            'ids_by_name': self.ids_by_name,
+            'area_names': self.area_names,
+            'strings': list(strings),
+            'hierarchies': rows,
+            'issues': self.issues,
+            'issue_counts': self.issue_counts,
+        }
+
+    @classmethod
+    def from_json(cls, data, clean_org_name):
+        """Rebuild an index from to_json(), without its nodes"""
+        index = cls([], clean_org_name)
+        index.organizations = data['organizations']
+        index.ids_by_name = data['ids_by_name']
+        index.area_names = data['area_names']
+        index.issues = data['issues']
+        index.issue_counts = data['issue_counts']
+
+        # -1 picks the trailing None
+        strings = data['strings'] + [None]
+        field_count = len(OrgHierarchy.FIELDS)
+        for row in data['hierarchies']:
+            key = tuple(strings[i] for i in row[1:field_count + 1])
+            hierarchy = index.interned.get(key)
+            if hierarchy is None:
+                full_path = [strings[i] for i in row[field_count + 1:]]
+                hierarchy = index.interned[key] = OrgHierarchy(*key, full_path=full_path)
+            index.hierarchies[row[0]] = hierarchy
+        return index
+
+
+def content_hash(data):
+    """SHA-256 hex digest of bytes"""
+    return hashlib.sha256(data).hexdigest()
+
+
+def file_hash(path, chunk_size=1 << 20):
+    """SHA-256 hex digest of a file, read in chunks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+# Precompressed siblings of published files, served by Caddy's
+# `precompressed br gzip` in preference to the file itself
+PRECOMPRESSED_SUFFIXES = ('.gz', '.br')
+
+
+def make_temp_file(path):
+    """Create a temp file next to path (same filesystem, so it can be renamed over it)
+
+    Returns: (fd, tmp_name)
+    """
+    path = Path(path)
+    return tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix='.tmp')
+
+
+def replace_file(tmp_name, path):
+    """Move a finished temp file over path, readable by the file server"""
+    os.chmod(tmp_name, 0o644)
+    os.replace(tmp_name, path)
+
+
+@contextmanager
+def open_atomic(path, mode='wb'):
+    """Open a temp file for binary writing that is renamed over path on success
+
+    Readers (e.g. the file server) see either the old or the new file, never
+    a partially written one. mode 'w+b' also allows reading it back.
+    """
+    fd, tmp_name = make_temp_file(path)
+    try:
+        with os.fdopen(fd, mode) as f:
+            yield f
+        replace_file(tmp_name, path)
+    except BaseException:
+        os.unlink(tmp_name)
+        raise
+
+
+def write_file_atomic(path, data):
+    """Write bytes to path via a temp file in the same directory and a rename"""
+    with open_atomic(path) as f:
+        f.write(data)
+
+
+def remove_published_file(path):
+    """Remove a published file and its precompressed siblings
+
+    Returns: whether the file itself existed
+    """
+    for suffix in PRECOMPRESSED_SUFFIXES:
+        Path(f"{path}{suffix}").unlink(missing_ok=True)
+    try:
+        Path(path).unlink()
+    except FileNotFoundError:
+        return False
+    return True
+
+
+def iter_json_array(stream, chunk_size=1 << 16):
+    """Yield the elements of a top-level JSON array, read incrementally
+
+    stream is a binary file-like object holding UTF-8 JSON. Only one chunk
+    plus the element being decoded is held in memory at a time.
+    """
+    decoder = json.JSONDecoder()
+    text_decoder = codecs.getincrementaldecoder('utf-8')()
+    buffer = ''
+    pos = 0
+    eof = False
+    state = 'start'
+
+    def fill():
+        nonlocal buffer, pos, eof
+        chunk = stream.read(chunk_size)
+        eof = not chunk
+        buffer = buffer[pos:] + text_decoder.decode(chunk, final=eof)
+        pos = 0
+
+    while True:
+        # Skip whitespace, reading more input as needed
+        while True:
+            while pos < len(buffer) and buffer[pos] in ' \t\r\n':
+                pos += 1
+            if pos < len(buffer) or eof:
+                break
+            fill()
+        if pos >= len(buffer):
+            raise ValueError("Unexpected end of JSON array")
+
+        char = buffer[pos]
+        if state == 'start':
+            if char != '[':
+                raise ValueError(f"Expected a JSON array, found {char!r}")
+            pos += 1
+            state = 'first'
+        elif char == ']' and state in ('first', 'after_value'):
+            return
+        elif state == 'after_value':
+            if char != ',':
+                raise ValueError(f"Expected ',' or ']' in JSON array, found {char!r}")
+            pos += 1
+            state = 'value'
+        else:
+            while True:
+                try:
+                    value, end = decoder.raw_decode(buffer, pos)
+                    # A number or literal is only complete once a delimiter
+                    # follows it: "1" may continue as "1.5" or "1e3" in the
+                    # next chunk
+                    if eof or buffer[pos] in '{["' or (end < len(buffer) and buffer[end] in ',] \t\r\n'):
+                        break
+                except ValueError:
+                    if eof:
+                        raise
+                fill()
+            pos = end
+            state = 'after_value'
+            yield value
+
+
+class JsonArray:
+    """A JSON array produced on demand, for iter_json_chunks()
+
+    Every iteration calls items() anew, so one array can be written to
+    several files without ever being held in memory as a list.
+    """
+
+    # Items encoded per chunk
+    BATCH_SIZE = 1024
+
+    def __init__(self, items):
+        self.items = items
+
+    def __iter__(self):
+        return iter(self.items())
+
+
+def iter_json_chunks(value, indent=None, level=0):
+    """Encode value like json.dumps(value, ensure_ascii=False), in chunks
+
+    Compact, or with indent as json.dumps(..., indent=indent) of a value
+    nested `level` levels deep. A JsonArray is encoded while it is
+    iterated, BATCH_SIZE items per chunk; dicts (with string keys) are
+    walked to reach them, and any other value goes to json.dumps() whole.
+    """
+    outer = '\n' + ' ' * (indent * level) if indent else ''
+    inner = '\n' + ' ' * (indent * (level + 1)) if indent else ''
+    if isinstance(value, dict) and value:
+        separator = '{'
+        for key, item in value.items():
+            yield f"{separator}{inner}{json.dumps(key, ensure_ascii=False)}{': ' if indent else ':'}"
+            yield from iter_json_chunks(item, indent, level + 1)
+            separator = ','
+        yield outer + '}'
+    elif isinstance(value, JsonArray):
+        items = iter(value)
+        separator = '['
+        while batch := [json.dumps(item, ensure_ascii=False) for item in itertools.islice(items, value.BATCH_SIZE)]:
+            yield separator + inner + (',' + inner).join(batch)
+            separator = ','
+        yield '[]' if separator == '[' else outer + ']'
+    elif indent:
+        yield json.dumps(value, ensure_ascii=False, indent=indent).replace('\n', outer)
+    else:
+        yield json.dumps(value, ensure_ascii=False, separators=(',', ':'))
+
+
+def read_pickled(file):
+    """Yield the objects pickled one after another into a file, from its start"""
+    file.seek(0)
+    while True:
+        try:
+            yield pickle.load(file)
+        except EOFError:
+            return
+
+
+class SpillSort:
+    """Sorts items added one at a time, holding at most BUFFER_SIZE in memory
+
+    Whenever the buffer fills, it is sorted and written to an (already
+    unlinked) temporary file as a run; iterating merges the runs with the
+    rest of the buffer, an external merge sort. Items must be picklable
+    and comparable. Every iteration starts over, but only one may be in
+    progress at a time, since they share the files.
+    """
+
+    BUFFER_SIZE = 20000
+    BATCH_SIZE = 1024
+
+    def __init__(self):
+        self.buffer = []
+        self.runs = []
+
+    def add(self, item):
+        self.buffer.append(item)
+        if len(self.buffer) >= self.BUFFER_SIZE:
+            self.buffer.sort()
+            run = tempfile.TemporaryFile()
+            for start in range(0, len(self.buffer), self.BATCH_SIZE):
+                pickle.dump(self.buffer[start:start + self.BATCH_SIZE], run, pickle.HIGHEST_PROTOCOL)
+            self.runs.append(run)
+            self.buffer = []
+
+    def __iter__(self):
+        self.buffer.sort()
+        runs = (itertools.chain.from_iterable(read_pickled(run)) for run in self.runs)
+        return heapq.merge(*runs, self.buffer)
+
+
+def sorted_difference(items, others):
+    """Yield the items of a sorted iterable that a second sorted iterable lacks"""
+    others = iter(others)
+    other = next(others, None)
+    for item in items:
+        while other is not None and other < item:
+            other = next(others, None)
+        if other != item:
+            yield item
+
+
+class JsonExportWriter:
+    """Streams {"jobs": [...], "org_map": {...}} to a temp file, one job at a time
+
+    Produces the same bytes as json.dumps() of the whole document (indented
+    with 2 spaces, or compact), without holding all jobs in memory. finish()
+    returns the temp file, to be published with JobExportFetcher.publish_file.
+    """
+
+    def __init__(self, path, compact):
+        self.compact = compact
+        self.count = 0
+        self.size = 0
+        self.digest = hashlib.sha256()
+        fd, self.tmp_name = make_temp_file(path)
+        self.file = os.fdopen(fd, 'wb')
+        self._write('{"jobs":[' if compact else '{\n  "jobs": [')
+
+    def _write(self, text):
+        data = text.encode('utf-8')
+        self.file.write(data)
+        self.digest.update(data)
+        self.size += len(data)
+
+    def add(self, job):
+        separator = ',' if self.count else ''
+        if self.compact:
+            self._write(separator + json.dumps(job, ensure_ascii=False, separators=(',', ':')))
+        else:
+            # JSON strings never contain raw newlines, so indenting by line is safe
+            encoded = json.dumps(job, ensure_ascii=False, indent=2).replace('\n', '\n    ')
+            self._write(f"{separator}\n    {encoded}")
+        self.count += 1
+
+    def finish(self, org_map, sections=None):
+        """Write the closing part of the document and return the temp file name
+
+        sections are extra top-level keys, written after "org_map"; a
+        JsonArray in them is written as it is iterated.
+        """
+        sections = dict(org_map=org_map, **(sections or {}))
+        if self.compact:
+            self._write(']')
+            for key, value in sections.items():
+                self._write(f",{json.dumps(key)}:")
+                for chunk in iter_json_chunks(value):
+                    self._write(chunk)
+            self._write('}')
+        else:
+            self._write('\n  ]' if self.count else ']')
+            for key, value in sections.items():
+                self._write(f",\n  {json.dumps(key)}: ")
+                for chunk in iter_json_chunks(value, indent=2, level=1):
+                    self._write(chunk)
+            self._write('\n}')
+        self.file.close()
+        return self.tmp_name
+
+    def abort(self):
+        self.file.close()
+        os.unlink(self.tmp_name)
+
+
+# Raw organization names: "5532 - GRAS", "0050 Korpsansatte", or just "GRAS"
+ORG_NAME_PATTERN = re.compile(r'^(\d+)\s*(?:-\s*)?(.+)$')
+HTML_TAG_PATTERN = re.compile(r'<[^>]+>')
+# Any run of characters other than [a-z0-9] becomes one hyphen. This is
+# buildJobSlug's "[\u2011\u2013\u2014] -> -", "[^a-z0-9-]+ -> -" and
+# "-{2,} -> -" in a single substitution
+SLUG_SEPARATOR_PATTERN = re.compile(r'[^a-z0-9]+')
+# Same, keeping the NUL characters slugify_many() joins names with
+SLUG_BATCH_SEPARATOR_PATTERN = re.compile(r'[^a-z0-9\0]+')
+
+
+@lru_cache(maxsize=4096)
+def split_org_name(org_name):
+    """Split a raw organization name into (numeric_id, name), memoized
+
+    Example: '5532 - GRAS' -> ('5532', 'GRAS'), 'GRAS' -> (None, 'GRAS')
+    """
+    match = ORG_NAME_PATTERN.match(org_name)
+    if match:
+        return match.group(1), match.group(2).strip()
+    return None, org_name.strip()
+
+
+def fold_slug_letters(text):
+    """Lowercase text and spell out æ, ø, å and é as buildJobSlug does
+
+    Chained str.replace() is faster here than str.translate(), whose
+    one-to-many mappings take a slow path; ASCII text skips it entirely.
+    """
+    text = text.lower()
+    if not text.isascii():
+        text = text.replace('æ', 'ae').replace('ø', 'oe').replace('å', 'aa').replace('é', 'e')
+    return text
+
+
+def slugify(text):
+    """URL slug of a text (the name part of buildJobSlug in src/App.vue)"""
+    return SLUG_SEPARATOR_PATTERN.sub('-', fold_slug_letters(text or '')).strip('-')
+
+
+def slugify_many(texts):
+    """slugify() for a batch of texts, with one substitution over all of them
+
+    The texts are joined on NUL, which slugify() never keeps; a batch with a
+    NUL in one of the texts is slugified one by one.
+    """
+    texts = [text or '' for text in texts]
+    joined = '\0'.join(texts)
+    if joined.count('\0') != max(len(texts) - 1, 0):
+        return [slugify(text) for text in texts]
+    joined = SLUG_BATCH_SEPARATOR_PATTERN.sub('-', fold_slug_letters(joined))
+    return [slug.strip('-') for slug in joined.split('\0')] if texts else []
+
+
+def job_slug(name_slug, job_id):
+    """A job's slug from its slugified name and id, as buildJobSlug joins them"""
+    return f"{name_slug}-{job_id}" if name_slug else str(job_id)
+
+
+DANISH_LETTERS = str.maketrans({'æ': '{', 'ø': '|', 'å': '}'})
+# Same range as removed by src/search/index.js
+COMBINING_MARK_PATTERN = re.compile('[\u0300-\u036f]')
+
+
+def danish_sort_key(text):
+    """Sort key ordering text like a Danish dictionary, by plain comparison
+
+    Lowercases, moves æ, ø, å after z in that order (as '{', '|', '}'), and
+    strips other accents (é sorts as e), so keys compare correctly with
+    < in JavaScript as well as Python.
+    """
+    text = (text or '').lower().translate(DANISH_LETTERS)
+    if not text.isascii():
+        text = COMBINING_MARK_PATTERN.sub('', unicodedata.normalize('NFKD', text))
+    return text
+
+
+class JobRecord:
+    """A processed job, as written to the export
+
+    Built by JobExportFetcher.process_job and serialised with to_json() only
+    when written out. org_hierarchy is the organization's shared
+    OrgHierarchy. Fields can be read as attributes or, like the dict it
+    replaces, with job['name'] / job.get('name').
+    """
+
+    # Fields in export order
+    FIELDS = (
+        'id', 'name', 'teaser', 'description', 'description_time_and_scope', 'requirements',
+        'application_count', 'no_of_recruitment', 'no_of_hired_employee', 'min_age',
+        'website_url', 'create_date', 'formatted_create_date', 'create_timestamp',
+        'title_sort_key', 'org_hierarchy',
+    )
+    __slots__ = FIELDS
+    _values = operator.attrgetter(*FIELDS)
+
+    def __init__(self, *values):
+        for field, value in zip(self.FIELDS, values):
+            setattr(self, field, value)
+
+    @classmethod
+    def from_json(cls, data, org_index):
+        """Rebuild a record from its to_json() form, interning its hierarchy in org_index"""
+        record = cls(*(data.get(field) for field in cls.FIELDS[:-1]))
+        record.org_hierarchy = org_index.intern_json(data.get('org_hierarchy') or {})
+        return record
+
+    def to_json(self):
+        """The job object of the export (a new dict; org_hierarchy is shared)"""
+        data = {field: getattr(self, field) for field in self.FIELDS}
+        data['org_hierarchy'] = self.org_hierarchy.to_json()
+        return data
+
+    def __reduce__(self):
+        # Pickled (by the prepare_jobs workers) as its values, quicker than slot by slot
+        return JobRecord, self._values(self)
+
+    def get(self, field, default=None):
+        return getattr(self, field) if field in self.FIELDS else default
+
+    def __getitem__(self, field):
+        if field not in self.FIELDS:
+            raise KeyError(field)
+        return getattr(self, field)
+
+
+class JobState:
+    """A job's entry in the 'jobs' section of the state
+
+    Saved as {"hash": <content hash of the raw job>, "slug": <OG page slug>,
+    "modified": <sitemap lastmod, null for the create_date>, "record":
+    <JobRecord>}, without the record when records are not kept
+    (stream_jobs). Slotted like JobRecord, since a run holds one per job,
+    plus those of the last run.
+    """
+
+    __slots__ = ('hash', 'slug', 'modified', 'record')
+
+    def __init__(self, job_hash, slug, modified, record=None):
+        self.hash = job_hash
+        self.slug = slug
+        self.modified = modified
+        self.record = record
+
+    @classmethod
+    def from_json(cls, data):
+        return cls(data.get('hash'), data.get('slug'), data.get('modified'), data.get('record'))
+
+    def lastmod(self, job):
+        """The job's sitemap lastmod: modified, or if None, the job's create_date"""
+        return self.modified or w3c_datetime(job.get('create_date'))
+
+    def to_json(self):
+        data = {'hash': self.hash, 'slug': self.slug, 'modified': self.modified}
+        if self.record is not None:
+            data['record'] = self.record
+        return data
+
+
+def is_job_open(job):
+    """Whether a processed job still needs people (mirrors applyStaffingFilter in filters.js)"""
+    return (job.get('no_of_hired_employee') or 0) < (job.get('no_of_recruitment') or 0)
+
+
+# Job filters selectable in config.json (export_filter, export_variants,
+# og_pages_filter), by name
+JOB_FILTERS = {
+    'all': lambda job: True,
+    'open': is_job_open,
+}
+
+
+class ListingIndex:
+    """Facet counts and presorted orderings of the job list
+
+    Built in the same pass that writes the export, and written into it as
+    two top-level sections, so the app needs no per-interaction work:
+
+    "facets": {"open": n, "staffed": n,
+               "areas": [{"name": ..., "total": n, "open": n,
+                          "committees": [{"name": ..., "total": n, "open": n}, ...]}, ...]}
+    "orderings": {"title": [job ids...], "created": [job ids...]}
+
+    Areas and committees are sorted by name (like Array.sort() in the app).
+    Orderings are ascending, with ties in export order; the keys match
+    SORT_OPTIONS in src/config/sort.js. Jobs without a create_date come
+    first in "created", as if created at timestamp 0 (createdTimestamp()
+    in sort.js).
+
+    Each ordering is sorted by a SpillSort, so a large export has them
+    sorted on disk.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.by_title = SpillSort()
+        self.by_created = SpillSort()
+        self.areas = {}
+        self.open_count = 0
+
+    def add(self, job):
+        """Add a processed job"""
+        job_open = is_job_open(job)
+        self.open_count += job_open
+        # The position keeps ties in export order; jobs without a date sort first
+        self.by_title.add((job.get('title_sort_key') or '', self.count, job.get('id')))
+        self.by_created.add((job.get('create_timestamp') or 0, self.count, job.get('id')))
+        self.count += 1
+
+        hierarchy = job.get('org_hierarchy') or {}
+        area = hierarchy.get('area')
+        if area:
+            counts = self.areas.setdefault(area, {'total': 0, 'open': 0, 'committees': {}})
+            counts['total'] += 1
+            counts['open'] += job_open
+            committee = hierarchy.get('committee')
+            if committee:
+                committee_counts = counts['committees'].setdefault(committee, {'total': 0, 'open': 0})
+                committee_counts['total'] += 1
+                committee_counts['open'] += job_open
+
+    def to_json(self):
+        """The "facets" and "orderings" sections, the orderings as JsonArrays"""
+        facets = {
+            'open': self.open_count,
+            'staffed': self.count - self.open_count,
+            'areas': [
+                {
+                    'name': area,
+                    'total': counts['total'],
+                    'open': counts['open'],
+                    'committees': [
+                        dict(name=committee, **committee_counts)
+                        for committee, committee_counts in sorted(counts['committees'].items())
+                    ],
+                }
+                for area, counts in sorted(self.areas.items())
+            ],
+        }
+        def ids(entries):
+            return JsonArray(lambda: (job_id for _, _, job_id in entries))
+
+        orderings = {'title': ids(self.by_title), 'created': ids(self.by_created)}
+        return {'facets': facets, 'orderings': orderings}
+
+
+def job_content_hash(job):
+    """Stable content hash of a raw job record (or any JSON-compatible value)"""
+    return content_hash(json.dumps(job, sort_keys=True, ensure_ascii=False).encode('utf-8'))
+
+
+class FetchError(Exception):
+    """Fetching an export failed (after retrying transient errors)"""
+
+
+class InvalidExportError(FetchError):
+    """A response body that is not a JSON array (e.g. corrupted on the way); retried"""
+
+
+def validate_export(body):
+    """Raise InvalidExportError unless body (bytes, or a binary file) holds a JSON array
+
+    A file is parsed incrementally (iter_json_array), so checking a spooled
+    export does not load it into memory.
+    """
+    try:
+        if isinstance(body, bytes):
+            if not isinstance(json.loads(body), list):
+                raise ValueError("not a JSON array")
+        else:
+            for _ in iter_json_array(body):
+                pass
+    except ValueError as e:
+        raise InvalidExportError(f"Invalid export in the response body: {e}") from e
+
+
+class DeadlineReader:
+    """Read a response body in chunks, failing once a deadline has passed
+
+    Socket timeouts only bound the wait for each chunk, so a server sending
+    a few bytes at a time could otherwise hold a fetch open indefinitely.
+    Uses read1() (whatever has arrived, rather than waiting for a full
+    chunk), and raises IncompleteRead for a body cut short of its
+    Content-Length, which read1() does not.
+    """
+
+    def __init__(self, response, deadline, timeout):
+        self.response = response
+        self.deadline = deadline
+        self.timeout = timeout
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            return b''.join(iter(lambda: self.read(1 << 16), b''))
+        if time.monotonic() > self.deadline:
+            raise TimeoutError(f"Response body not received within {self.timeout:g}s")
+        read1 = getattr(self.response, 'read1', self.response.read)
+        chunk = read1(size)
+        if not chunk and getattr(self.response, 'length', None):
+            raise http.client.IncompleteRead(b'', self.response.length)
+        return chunk
+
+
+class SpooledBody:
+    """A response body spooled to disk instead of held in memory"""
+
+    def __init__(self, path, sha256, size):
+        self.path = path
+        self.sha256 = sha256
+        self.size = size
+
+
+class HttpCache:
+    """On-disk cache of HTTP response bodies with their validators
+
+    Each URL is stored as <sha256(url)>.body (the decoded body) and
+    <sha256(url)>.json (ETag/Last-Modified, the body hash when known, and
+    when the body was last fetched or revalidated). File names are hashed so
+    API keys in the URL never end up on disk.
+
+    Bodies are kept also without validators: the cached copy is the last
+    good one, used when CampOS cannot be reached (see fetch_exports).
+    """
+
+    def __init__(self, cache_dir):
+        self.cache_dir = Path(cache_dir)
+
+    def _paths(self, url):
+        key = content_hash(url.encode('utf-8'))
+        return self.cache_dir / f"{key}.json", self.cache_dir / f"{key}.body"
+
+    def validators(self, url):
+        """Return the stored validators of a cached URL, or None"""
+        meta_path, body_path = self._paths(url)
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                validators = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return validators if body_path.exists() else None
+
+    def load(self, url):
+        """Return (validators, body) for a cached URL, or None"""
+        validators = self.validators(url)
+        if validators is None:
+            return None
+        try:
+            return validators, self.body_path(url).read_bytes()
+        except OSError:
+            return None
+
+    def body_path(self, url):
+        return self._paths(url)[1]
+
+    def spooled(self, url):
+        """Return the cached body of a URL as a SpooledBody, or None"""
+        validators = self.validators(url)
+        if validators is None:
+            return None
+        body_path = self.body_path(url)
+        sha256 = validators.get('sha256') or file_hash(body_path)
+        return SpooledBody(body_path, sha256, body_path.stat().st_size)
+
+    def age(self, url):
+        """Seconds since a cached URL was last fetched or revalidated, or None"""
+        validators = self.validators(url)
+        if validators is None:
+            return None
+        fetched_at = validators.get('fetched_at')
+        if fetched_at is None:
+            # Cached before fetch times were recorded
+            fetched_at = self.body_path(url).stat().st_mtime
+        return max(0.0, time.time() - fetched_at)
+
+    def _store_validators(self, url, etag, last_modified, sha256=None):
+        write_file_atomic(
+            self._paths(url)[0],
+            json.dumps({
+                'etag': etag, 'last_modified': last_modified, 'sha256': sha256,
+                'fetched_at': round(time.time(), 3),
+            }).encode('utf-8'),
+        )
+
+    def revalidated(self, url):
+        """Record that a cached body was confirmed current (304 Not Modified)"""
+        validators = self.validators(url)
+        if validators is not None:
+            self._store_validators(url, validators.get('etag'), validators.get('last_modified'), validators.get('sha256'))
+
+    def store(self, url, body, etag=None, last_modified=None):
+        """Store a response body with its validators"""
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        write_file_atomic(self.body_path(url), body)
+        self._store_validators(url, etag, last_modified, content_hash(body))
+
+    def spool(self, url, stream, etag=None, last_modified=None, validate=None, chunk_size=1 << 16):
+        """Copy a response stream to the cache body file, hashing on the way
+
+        Always stored (also without validators), since the body is read back
+        from the file. validate(file) is called on the copy before it
+        replaces the cached body; when it raises, the cache is left as it
+        was. Returns a SpooledBody.
+        """
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        digest = hashlib.sha256()
+        size = 0
+        body_path = self.body_path(url)
+        with open_atomic(body_path, 'w+b') as f:
+            for chunk in iter(lambda: stream.read(chunk_size), b''):
+                f.write(chunk)
+                digest.update(chunk)
+                size += len(chunk)
+            if validate is not None:
+                f.seek(0)
+                validate(f)
+        self._store_validators(url, etag, last_modified, digest.hexdigest())
+        return SpooledBody(body_path, digest.hexdigest(), size)
+
+
+class ExportHistory:
+    """Bounded history of exported job sets, for diffs and rollbacks
+
+    Every job record is stored once, gzipped, under its content hash in
+    objects/<2 hex>/<hash>.json.gz, so a job that did not change between
+    runs costs nothing more than a manifest line. Each run has a manifest
+    runs/<run>.json, with runs numbered from 1:
+    {"run": 3, "created_at": ..., "org_map": <hash>, "jobs": [[id, <hash>], ...], ...}.
+    Only the newest `size` runs are kept; objects no manifest refers to any
+    longer are removed with the oldest runs.
+    """
+
+    HASH_LENGTH = 32
+
+    def __init__(self, history_dir, size):
+        self.history_dir = Path(history_dir)
+        self.size = size
+        self.runs_dir = self.history_dir / 'runs'
+        self.objects_dir = self.history_dir / 'objects'
+
+    def object_path(self, object_hash):
+        return self.objects_dir / object_hash[:2] / f"{object_hash}.json.gz"
+
+    @classmethod
+    def encode(cls, value):
+        """(hash, data) of a JSON value, data being its compact UTF-8 JSON"""
+        data = json.dumps(value, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        return content_hash(data)[:cls.HASH_LENGTH], data
+
+    def store(self, object_hash, data):
+        """Store encoded data under its hash unless present; returns whether it was written"""
+        path = self.object_path(object_hash)
+        if path.exists():
+            return False
+        path.parent.mkdir(parents=True, exist_ok=True)
+        write_file_atomic(path, gzip.compress(data, mtime=0))
+        return True
+
+    def load_object(self, object_hash):
+        with gzip.open(self.object_path(object_hash), 'rb') as f:
+            return json.load(f)
+
+    def runs(self):
+        """Numbers of the recorded runs, oldest first"""
+        if not self.runs_dir.is_dir():
+            return []
+        return sorted(int(path.stem) for path in self.runs_dir.glob('*.json') if path.stem.isdigit())
+
+    def manifest(self, run):
+        """The manifest of a run; raises KeyError for an unknown run"""
+        try:
+            with open(self.runs_dir / f"{int(run):06d}.json", 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            raise KeyError(run) from None
+
+    def snapshot(self):
+        """Start recording a run; see ExportSnapshot"""
+        runs = self.runs()
+        return ExportSnapshot(self, runs[-1] + 1 if runs else 1)
+
+    def prune(self):
+        """Drop all but the newest `size` runs, and objects only they referred to
+
+        Returns the number of runs removed.
+        """
+        runs = self.runs()
+        dropped = runs[:-self.size] if self.size > 0 else runs
+        if not dropped:
+            return 0
+        for run in dropped:
+            (self.runs_dir / f"{run:06d}.json").unlink()
+
+        referenced = set()
+        for run in self.runs():
+            manifest = self.manifest(run)
+            referenced.add(manifest['org_map'])
+            referenced.update(object_hash for _, object_hash in manifest['jobs'])
+        for path in self.objects_dir.glob('*/*.json.gz'):
+            if path.name[:-len('.json.gz')] not in referenced:
+                path.unlink()
+        return len(dropped)
+
+    def diff(self, old_run, new_run):
+        """Jobs added, removed and changed from one run to another
+
+        Only the manifests and the records of differing jobs are read.
+        Returns {"added": [job, ...], "removed": [job, ...],
+        "changed": [(old job, new job, [changed fields]), ...]}, in the
+        export order of the run each job comes from.
+        """
+        old_jobs = dict(map(tuple, self.manifest(old_run)['jobs']))
+        new_jobs = dict(map(tuple, self.manifest(new_run)['jobs']))
+        changes = {'added': [], 'removed': [], 'changed': []}
+        for job_id, object_hash in new_jobs.items():
+            old_hash = old_jobs.get(job_id)
+            if old_hash is None:
+                changes['added'].append(self.load_object(object_hash))
+            elif old_hash != object_hash:
+                old_job, new_job = self.load_object(old_hash), self.load_object(object_hash)
+                fields = [field for field in new_job if old_job.get(field) != new_job[field]]
+                changes['changed'].append((old_job, new_job, fields))
+        changes['removed'] = [
+            self.load_object(object_hash) for job_id, object_hash in old_jobs.items()
+            if job_id not in new_jobs
+        ]
+        return changes
+
+
+class ExportSnapshot:
+    """The jobs of one run being recorded into an ExportHistory
+
+    add() each job record as written, then commit() once the export is
+    published; an uncommitted snapshot leaves no manifest behind. The
+    manifest's job entries are encoded as they are added, into an (already
+    unlinked) temporary file that commit() copies into the manifest.
+    """
+
+    def __init__(self, history, run):
+        self.history = history
+        self.run = run
+        self.count = 0
+        self.entries = tempfile.TemporaryFile()
+        self.objects_written = 0
+
+    def add(self, job):
+        """Record a serialised job (a JobRecord.to_json() dict)"""
+        object_hash, data = self.history.encode(job)
+        self.objects_written += self.history.store(object_hash, data)
+        entry = json.dumps([job.get('id'), object_hash], ensure_ascii=False, separators=(',', ':'))
+        self.entries.write(f"{',' if self.count else ''}{entry}".encode('utf-8'))
+        self.count += 1
+
+    def commit(self, org_map, **fields):
+        """Write the run's manifest (with extra fields) and prune old runs"""
+        org_map_hash, data = self.history.encode(org_map)
+        self.history.store(org_map_hash, data)
+        manifest = {
+            'run': self.run,
+            'created_at': datetime.now().astimezone().isoformat(timespec='seconds'),
+            **fields,
+            'org_map': org_map_hash,
+        }
+        # The manifest, with the entries copied in as its last key, "jobs"
+        header = json.dumps(manifest, ensure_ascii=False, separators=(',', ':'))[:-1] + ',"jobs":['
+        self.history.runs_dir.mkdir(parents=True, exist_ok=True)
+        with open_atomic(self.history.runs_dir / f"{self.run:06d}.json") as f:
+            f.write(header.encode('utf-8'))
+            self.entries.seek(0)
+            shutil.copyfileobj(self.entries, f)
+            f.write(b']}')
+        return self.history.prune()
+
+
+class OgPageTemplate:
+    """The deployed index.html, split once around the per-job insertion points
+
+    Rendering a page is a join of the static pieces with the job's <title>
+    and OG meta tags, instead of a regex pass over the whole document.
+    """
+
+    TITLE_PATTERN = re.compile(r'<title>([^<]*)</title>')
+    DEFAULT_SITE_TITLE = 'Jobbank - Spejdernes Lejr 2026'
+    TITLE_SLOT = object()
+    META_SLOT = object()
+
+    def __init__(self, base_html, site_url):
+        self.source_hash = content_hash(base_html.encode('utf-8'))
+        self.site_url = site_url
+        self.og_image_url = f"{site_url}/og-jobbank.jpg"
+
+        # Use the title already baked into the deployed index.html
+        title_match = self.TITLE_PATTERN.search(base_html)
+        site_title = title_match.group(1) if title_match else self.DEFAULT_SITE_TITLE
+        self.escaped_site_title = html_module.escape(site_title)
+
+        # pieces alternates static text with slot names: every <title> is
+        # replaced, and the OG meta tags go before the first </head>
+        self.pieces = []
+        segments = self.TITLE_PATTERN.split(base_html)[::2]
+        meta_pending = True
+        for idx, segment in enumerate(segments):
+            if idx:
+                self.pieces.append(self.TITLE_SLOT)
+            head_end = segment.find('</head>') if meta_pending else -1
+            if head_end != -1:
+                self.pieces.extend([segment[:head_end], self.META_SLOT, segment[head_end:]])
+                meta_pending = False
+            else:
+                self.pieces.append(segment)
+
+    def render(self, job, slug, teaser):
+        """Render the OG page for a job as UTF-8 bytes
+
+        teaser is the plain-text (HTML-stripped) teaser.
+        """
+        job_name = html_module.escape(job.get('name', ''))
+        teaser = html_module.escape(teaser[:300])
+        canonical_url = f"{self.site_url}/job/{slug}"
+
+        title = f'<title>{job_name} — {self.escaped_site_title}</title>'
+        og_meta = (
+            f'  <meta property="og:type" content="website" />\n'
+            f'  <meta property="og:site_name" content="{self.escaped_site_title}" />\n'
+            f'  <meta property="og:title" content="{job_name}" />\n'
+            f'  <meta property="og:description" content="{teaser}" />\n'
+            f'  <meta property="og:url" content="{canonical_url}" />\n'
+            f'  <meta property="og:image" content="{self.og_image_url}" />\n'
+            f'  <meta name="twitter:card" content="summary_large_image" />\n'
+            f'  <meta name="twitter:title" content="{job_name}" />\n'
+            f'  <meta name="twitter:description" content="{teaser}" />\n'
+            f'  <meta name="description" content="{teaser}" />\n'
+        )
+
+        return ''.join(
+            title if piece is self.TITLE_SLOT else og_meta if piece is self.META_SLOT else piece
+            for piece in self.pieces
+        ).encode('utf-8')
+
+
+def w3c_datetime(iso_date_string):
+    """An ISO date as a W3C datetime in UTC, for sitemaps and feeds
+
+    Example: '2025-05-06T23:59:57.525504+02:00' -> '2025-05-06T21:59:57+00:00'
+    Dates without an offset are taken as local time. In UTC the strings
+    compare like the dates. Returns None for a missing or unparseable date.
+    """
+    try:
+        moment = datetime.fromisoformat(iso_date_string)
+    except (TypeError, ValueError):
+        return None
+    return moment.astimezone(timezone.utc).isoformat(timespec='seconds')
+
+
+class SitemapBuilder:
+    """sitemap.xml and the Atom feed (feed.xml) of the jobs with an OG page
+
+    Filled during the OG page pass, one job at a time and in export order,
+    with each job's slug and last modification date. The <url> elements
+    go to an (already unlinked) temporary file as they are added, so only
+    the records of the newest feed_size jobs are kept in memory and a
+    streaming run stays flat.
+    """
+
+    # URLs per sitemap file (the sitemaps.org limit); beyond that,
+    # sitemap.xml becomes an index of sitemap-<n>.xml files
+    MAX_URLS = 50000
+    EPOCH = '1970-01-01T00:00:00+00:00'
+
+    def __init__(self, site_url, escaped_site_title, feed_size):
+        self.site_url = site_url
+        self.escaped_site_title = escaped_site_title
+        self.feed_size = feed_size
+        self.url_count = 0
+        self.urls = tempfile.TemporaryFile()
+        self.latest_modified = None
+        # Min-heap of (create_timestamp, id, url, modified, job) of the newest jobs
+        self.newest = []
+
+    def add(self, job, slug, modified):
+        """Add a job with an OG page at job/<slug>, last modified at modified"""
+        url = f"{self.site_url}/job/{slug}"
+        self.urls.write(self._url_element(url, modified))
+        self.url_count += 1
+        if self.latest_modified is None or modified > self.latest_modified:
+            self.latest_modified = modified
+        created = job.get('create_timestamp')
+        if self.feed_size > 0 and created is not None:
+            entry = (created, job.get('id') or 0, url, modified, job)
+            if len(self.newest) < self.feed_size:
+                heapq.heappush(self.newest, entry)
+            elif entry[:2] > self.newest[0][:2]:
+                heapq.heapreplace(self.newest, entry)
+
+    def last_modified(self):
+        return self.latest_modified or self.EPOCH
+
+    @staticmethod
+    def _url_element(url, modified):
+        return f'  <url><loc>{html_module.escape(url)}</loc><lastmod>{modified}</lastmod></url>\n'.encode('utf-8')
+
+    def sitemaps(self):
+        """Yield (file name, XML as an iterable of bytes) of the sitemap (or sitemap index and its parts)
+
+        The parts are read from the same file, so each must be consumed
+        before the next one is yielded.
+        """
+        self.urls.seek(0)
+        elements = itertools.chain([self._url_element(f"{self.site_url}/", self.last_modified())], self.urls)
+        if self.url_count + 1 <= self.MAX_URLS:
+            yield 'sitemap.xml', self._urlset(elements)
+            return
+
+        names = [f"sitemap-{number}.xml" for number in range(1, self.url_count // self.MAX_URLS + 2)]
+        for name in names:
+            yield name, self._urlset(itertools.islice(elements, self.MAX_URLS))
+        entries = ''.join(
+            f'  <sitemap><loc>{self.site_url}/{name}</loc><lastmod>{self.last_modified()}</lastmod></sitemap>\n'
+            for name in names
+        )
+        yield 'sitemap.xml', [(
+            '<?xml version="1.0" encoding="UTF-8"?>\n'
+            '<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+            f'{entries}</sitemapindex>\n'
+        ).encode('utf-8')]
+
+    def _urlset(self, elements):
+        yield (
+            b'<?xml version="1.0" encoding="UTF-8"?>\n'
+            b'<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+        )
+        yield from elements
+        yield b'</urlset>\n'
+
+    def feed(self):
+        """The Atom feed of the newest jobs, newest first, as UTF-8 bytes"""
+        entries = []
+        for _, _, url, modified, job in sorted(self.newest, key=lambda entry: entry[:2], reverse=True):
+            teaser = HTML_TAG_PATTERN.sub('', job.get('teaser') or '').strip()
+            url = html_module.escape(url)
+            entries.append(
+                '  <entry>\n'
+                f'    <title>{html_module.escape(job.get("name") or "")}</title>\n'
+                f'    <id>{url}</id>\n'
+                f'    <link href="{url}" />\n'
+                f'    <published>{w3c_datetime(job.get("create_date")) or modified}</published>\n'
+                f'    <updated>{modified}</updated>\n'
+                f'    <summary>{html_module.escape(teaser[:300])}</summary>\n'
+                '  </entry>\n'
+            )
+        site_url = html_module.escape(self.site_url)
+        return (
+            '<?xml version="1.0" encoding="utf-8"?>\n'
+            '<feed xmlns="http://www.w3.org/2005/Atom">\n'
+            f'  <title>{self.escaped_site_title}</title>\n'
+            f'  <id>{site_url}/</id>\n'
+            f'  <link href="{site_url}/" />\n'
+            f'  <link rel="self" href="{site_url}/feed.xml" />\n'
+            f'  <updated>{self.last_modified()}</updated>\n'
+            f'  <author><name>{self.escaped_site_title}</name></author>\n'
+            f'{"".join(entries)}</feed>\n'
+        ).encode('utf-8')
+
+
+class SearchIndex:
+    """Inverted index over the searchable text of the jobs
+
+    Indexes the same fields the app searches (name, teaser, description and
+    area) as normalised tokens: HTML stripped, lowercased, Danish letters
+    folded like build_job_slug (æ -> ae, ø -> oe, å -> aa) and other accents
+    removed.
+
+    Serialised as {"version": 1, "ids": [job ids], "tokens": {token: [positions in ids]}}.
+    A query matches the jobs that, for every query token, have a token
+    containing it, so "leder" finds "Teamleder" like the app's plain text
+    search did (Danish job titles are compound words). The token dictionary
+    is small enough to scan for each query token.
+
+    Runs write the index with SearchIndexWriter, which produces the same
+    JSON without holding the postings in memory.
+    """
+
+    VERSION = 1
+    TAG_PATTERN = HTML_TAG_PATTERN
+    TOKEN_PATTERN = re.compile(r'[a-z0-9]+')
+    LETTER_FOLDING = str.maketrans({'æ': 'ae', 'ø': 'oe', 'å': 'aa'})
+
+    def __init__(self, ids=None, tokens=None):
+        self.ids = ids if ids is not None else []
+        self.tokens = tokens if tokens is not None else {}
+
+    @classmethod
+    def tokenize(cls, text):
+        """Normalised tokens of a text, which may contain HTML"""
+        text = html_module.unescape(cls.TAG_PATTERN.sub(' ', text or ''))
+        text = text.lower().translate(cls.LETTER_FOLDING)
+        if not text.isascii():
+            text = COMBINING_MARK_PATTERN.sub('', unicodedata.normalize('NFKD', text))
+        return cls.TOKEN_PATTERN.findall(text)
+
+    @classmethod
+    def build(cls, jobs):
+        """Build the index from processed jobs"""
+        index = cls()
+        for job in jobs:
+            index.add(job)
+        return index
+
+    @classmethod
+    def job_tokens(cls, job):
+        """The distinct tokens of a processed job's searchable fields, in order of appearance"""
+        text = ' '.join([
+            job.get('name') or '',
+            job.get('teaser') or '',
+            job.get('description') or '',
+            (job.get('org_hierarchy') or {}).get('area') or '',
+        ])
+        return dict.fromkeys(cls.tokenize(text))
+
+    def add(self, job):
+        """Add a processed job to the index"""
+        position = len(self.ids)
+        self.ids.append(job.get('id'))
+        for token in self.job_tokens(job):
+            postings = self.tokens.get(token)
+            if postings is None:
+                # Compact integer arrays: postings grow with the number of jobs
+                postings = self.tokens[token] = array('I')
+            postings.append(position)
+
+    @classmethod
+    def from_json(cls, data):
+        return cls(data['ids'], data['tokens'])
+
+    def to_json(self):
+        return {
+            'version': self.VERSION,
+            'ids': self.ids,
+            'tokens': {token: list(postings) for token, postings in self.tokens.items()},
+        }
+
+    def _substring_postings(self, part):
+        """Positions of jobs with any token containing part"""
+        positions = set()
+        for token, postings in self.tokens.items():
+            if part in token:
+                positions.update(postings)
+        return positions
+
+    def search(self, query):
+        """Return the ids of jobs matching every token of the query, in export order
+
+        An empty query matches every job.
+        """
+        matches = None
+        for part in self.tokenize(query):
+            postings = self._substring_postings(part)
+            matches = postings if matches is None else matches & postings
+            if not matches:
+                return []
+
+        if matches is None:
+            return list(self.ids)
+        return [self.ids[position] for position in sorted(matches)]
+
+
+class SearchIndexWriter:
+    """Streams a SearchIndex to a temp file as jobs are added
+
+    Writes the bytes of the compact json.dumps() of SearchIndex.to_json()
+    plus "generated_at", without building the index in memory: the ids are
+    written as they arrive, and the postings, every SPILL_POSTINGS of them,
+    to an (already unlinked) temporary file as a run ordered by token.
+    finish() merges the runs token by token, so only the token dictionary
+    and one run are held in memory, and returns the temp file, to be
+    published with JobExportFetcher.publish_file.
+    """
+
+    SPILL_POSTINGS = 1 << 20
+
+    def __init__(self, path):
+        self.count = 0
+        self.size = 0
+        # Token -> number, in order of first appearance (the order of "tokens")
+        self.token_numbers = {}
+        # Token number -> positions of the jobs added since the last run
+        self.postings = {}
+        self.buffered = 0
+        self.runs = []
+        fd, self.tmp_name = make_temp_file(path)
+        self.file = os.fdopen(fd, 'wb')
+        self._write(f'{{"version":{SearchIndex.VERSION},"ids":[')
+
+    def _write(self, text):
+        data = text.encode('utf-8')
+        self.file.write(data)
+        self.size += len(data)
+
+    def add(self, job):
+        """Add a processed job to the index"""
+        position = self.count
+        self._write((',' if position else '') + json.dumps(job.get('id'), ensure_ascii=False))
+        self.count += 1
+        tokens = SearchIndex.job_tokens(job)
+        for token in tokens:
+            number = self.token_numbers.setdefault(token, len(self.token_numbers))
+            postings = self.postings.get(number)
+            if postings is None:
+                postings = self.postings[number] = array('I')
+            postings.append(position)
+        self.buffered += len(tokens)
+        if self.buffered >= self.SPILL_POSTINGS:
+            self._spill()
+
+    def _spill(self):
+        run = tempfile.TemporaryFile()
+        for number in sorted(self.postings):
+            pickle.dump((number, self.postings[number]), run, pickle.HIGHEST_PROTOCOL)
+        self.runs.append(run)
+        self.postings = {}
+        self.buffered = 0
+
+    def finish(self, generated_at=None):
+        """Write the tokens and generated_at, and return the temp file name"""
+        tokens = list(self.token_numbers)
+        # Runs hold ascending positions, and merge() keeps ties in run order
+        runs = [*map(read_pickled, self.runs), sorted(self.postings.items())]
+        self._write('],"tokens":{')
+        previous = None
+        for number, postings in heapq.merge(*runs, key=operator.itemgetter(0)):
+            if number == previous:
+                self._write(',')
+            else:
+                self._write(('],' if previous is not None else '') + json.dumps(tokens[number]) + ':[')
+                previous = number
+            self._write(','.join(map(str, postings)))
+        self._write(']' if previous is not None else '')
+        self._write(f'}},"generated_at":{json.dumps(generated_at, ensure_ascii=False)}}}')
+        self.file.close()
+        return self.tmp_name
+
+    def abort(self):
+        self.file.close()
+        os.unlink(self.tmp_name)
+
+
+class RunMetrics:
+    """Per-stage timings and counters of one export run
+
+    Every finished stage is logged as a JSON line,
+    {"event": "stage", "stage": "fetch", "seconds": 0.41, ...}, and the run
+    as a whole as a final {"event": "run", ...} line with all counters.
+    write_textfile() writes the same numbers in the Prometheus text format
+    for node-exporter's textfile collector.
+
+    Counters are set or incremented from any thread, optionally with labels:
+    count('fetched_bytes', 1024, export='job').
+    """
+
+    PREFIX = 'jobbank_export'
+    HELP = {
+        'fetched_bytes': 'Size of each export fetched in the last run',
+        'http_cache_hits': 'Exports served from the HTTP cache (304 Not Modified) in the last run',
+        'fetch_retries': 'Retried export requests in the last run',
+        'stale_exports': 'Whether each export is the cached copy, because it could not be fetched',
+        'stale_export_age_seconds': 'Age of each cached export used instead of a fetched one',
+        'organizations': 'Organizations in the org export',
+        'process_workers': 'Worker processes that processed the job export (0: processed serially)',
+        'org_export_issues': 'Problems found in the org export (duplicates, bad paths, missing parents), by kind',
+        'jobs': 'Jobs in the job export',
+        'jobs_changed': 'New or changed jobs reprocessed in the last run',
+        'jobs_removed': 'Jobs removed (or renamed) since the previous run',
+        'output_bytes': 'Size of jobs-export.json',
+        'sitemap_urls': 'Job pages listed in sitemap.xml',
+        'history_new_records': 'Job records newly stored in the snapshot history',
+        'exported_jobs': 'Jobs written to jobs-export.json (variant "default") and each export variant',
+        'job_details': 'job-data/<slug>.json files by result in the last run',
+        'og_pages': 'OG pages by result in the last run',
+        'run_unchanged': 'Whether the last run found both exports unchanged and did nothing',
+    }
+
+    def __init__(self):
+        self.started_at = time.time()
+        self._start = time.perf_counter()
+        self._lock = threading.Lock()
+        self.stages = {}
+        self.counters = {}
+        self.summary = None
+
+    def log(self, event, **fields):
+        """Print a JSON log line"""
+        print(json.dumps(dict(event=event, **fields), ensure_ascii=False), flush=True)
+
+    @contextmanager
+    def stage(self, name):
+        """Time a stage and log it when done
+
+        Yields a dict; fields added to it are included in the log line.
+        """
+        fields = {}
+        start = time.perf_counter()
+        try:
+            yield fields
+        finally:
+            seconds = time.perf_counter() - start
+            self.stages[name] = self.stages.get(name, 0) + seconds
+            self.log('stage', stage=name, seconds=round(seconds, 4), **fields)
+
+    def _key(self, name, labels):
+        return name, tuple(sorted(labels.items()))
+
+    def set(self, name, value, **labels):
+        with self._lock:
+            self.counters[self._key(name, labels)] = value
+
+    def count(self, name, value=1, **labels):
+        with self._lock:
+            key = self._key(name, labels)
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def peak_rss_bytes(self, who=None):
+        """Peak resident set size of the process, or None where unavailable
+
+        This is the peak since the process started, not of one run, so with
+        --daemon it only grows. It excludes child processes; with
+        who=resource.RUSAGE_CHILDREN it is the peak of the largest child
+        waited for instead (the process_jobs workers).
+        """
+        if resource is None:
+            return None
+        peak = resource.getrusage(resource.RUSAGE_SELF if who is None else who).ru_maxrss
+        # ru_maxrss is in kilobytes on Linux, bytes on macOS
+        return peak if sys.platform == 'darwin' else peak * 1024
+
+    def finish(self, success, output_file=None):
+        """Log the run summary; returns it as a dict"""
+        summary = {
+            'success': success,
+            'seconds': round(time.perf_counter() - self._start, 4),
+            'finished_at': round(time.time(), 3),
+            'peak_rss_bytes': self.peak_rss_bytes(),
+            'worker_peak_rss_bytes': None,
+            'output_modified_at': None,
+            'stages': {name: round(seconds, 4) for name, seconds in self.stages.items()},
+            'counters': {
+                name + ''.join(f"[{key}={value}]" for key, value in labels): value
+                for (name, labels), value in sorted(self.counters.items())
+            },
+        }
+        if output_file is not None and Path(output_file).exists():
+            summary['output_modified_at'] = round(Path(output_file).stat().st_mtime, 3)
+        if self.counters.get(('process_workers', ())) and resource is not None:
+            summary['worker_peak_rss_bytes'] = self.peak_rss_bytes(resource.RUSAGE_CHILDREN)
+        self.log('run', **summary)
+        self.summary = summary
+        return summary
+
+    def textfile(self, summary, last_success_at=None):
+        """Render a run summary from finish() in the Prometheus text format
+
+        last_success_at is reported for failed runs, so alerts on how long
+        ago the last successful run was keep working while runs fail.
+        """
+        lines = []
+
+        def metric(name, help_text, samples):
+            lines.append(f"# HELP {self.PREFIX}_{name} {help_text}")
+            lines.append(f"# TYPE {self.PREFIX}_{name} gauge")
+            for labels, value in samples:
+                label_text = ','.join(f'{key}="{value}"' for key, value in labels)
+                lines.append(f"{self.PREFIX}_{name}{{{label_text}}} {value}" if labels else f"{self.PREFIX}_{name} {value}")
+
+        metric('last_run_timestamp_seconds', 'Unix time the last run finished', [((), summary['finished_at'])])
+        metric('run_success', 'Whether the last run succeeded', [((), int(summary['success']))])
+        if summary['success']:
+            last_success_at = summary['finished_at']
+        if last_success_at is not None:
+            metric('last_success_timestamp_seconds', 'Unix time the last successful run finished',
+                   [((), last_success_at)])
+        metric('run_duration_seconds', 'Wall time of the last run', [((), summary['seconds'])])
+        metric('stage_duration_seconds', 'Wall time of each stage of the last run', [
+            ((('stage', name),), seconds) for name, seconds in summary['stages'].items()
+        ])
+        if summary['output_modified_at'] is not None:
+            metric('output_modified_timestamp_seconds', 'Unix time jobs-export.json was last written',
+                   [((), summary['output_modified_at'])])
+        if summary['peak_rss_bytes'] is not None:
+            metric('peak_rss_bytes', 'Peak resident set size of the exporter process since it started',
+                   [((), summary['peak_rss_bytes'])])
+        if summary.get('worker_peak_rss_bytes') is not None:
+            metric('worker_peak_rss_bytes', 'Peak resident set size of the largest process_jobs worker so far',
+                   [((), summary['worker_peak_rss_bytes'])])
+
+        by_name = {}
+        for (name, labels), value in sorted(self.counters.items()):
+            by_name.setdefault(name, []).append((labels, value))
+        for name, samples in by_name.items():
+            metric(name, self.HELP.get(name, name.replace('_', ' ')), samples)
+
+        return '\n'.join(lines) + '\n'
+
+    def write_textfile(self, path, summary):
+        """Atomically write the .prom file, so the collector never reads half of it"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        # Carry the last success over from the previous file
+        last_success_at = None
+        try:
+            match = re.search(
+                rf'^{self.PREFIX}_last_success_timestamp_seconds (\S+)$',
+                path.read_text(encoding='utf-8'), re.MULTILINE,
+            )
+            if match:
+                last_success_at = float(match.group(1))
+        except (OSError, ValueError):
+            pass
+
+        write_file_atomic(path, self.textfile(summary, last_success_at).encode('utf-8'))
+
 
 class JobExportFetcher:
     """Fetch job export data from CampOS API and generate JSON"""
 
+    # Bump when the processed job format changes, so cached records in the
+    # state file are not reused across incompatible versions
+    STATE_VERSION = 1
+
+    # Bump when the resolved org index changes (e.g. ORG_NAME_OVERRIDES),
+    # so org-index.json is rebuilt from the org export and job records
+    # cached in the state file get the new hierarchy names
+    ORG_INDEX_VERSION = 1
+
+    # Optional config.json settings and their defaults
+    DEFAULT_SETTINGS = {
+        # Attempts per export on transient errors, and the delay before the
+        # first retry (doubled for each following retry)
+        'fetch_attempts': 3,
+        'fetch_backoff_seconds': 2.0,
+        # Timeouts per phase of a fetch: connecting and each wait for data,
+        # the download of a response body as a whole (a slow drip of bytes
+        # never trips the first), and an export including its retries
+        'fetch_timeout_seconds': 30,
+        'fetch_body_timeout_seconds': 300,
+        'fetch_deadline_seconds': 600,
+        # When an export cannot be fetched, use its last good copy from the
+        # HTTP cache if it is at most this old (0 fails the run instead)
+        'fetch_stale_max_age_seconds': 86400,
+        # Threads rendering and writing OG pages
+        'og_page_workers': 8,
+        # Write jobs-export.json without indentation (null: when the
+        # COMPACT_OUTPUT environment variable is set, as in the Docker image)
+        'compact_output': None,
+        # Write .gz (and .br, if the brotli module is installed) siblings
+        # of jobs-export.json for the file server to serve directly
+        'precompress_output': True,
+        # Also write a content-hashed copy (jobs-export.<hash>.json) and a
+        # jobs-export.manifest.json pointing at it, which the app loads the
+        # full export through
+        'hashed_output': False,
+        # Write jobs-search-index.json next to jobs-export.json
+        'search_index': True,
+        # Add "facets" (counts per area/committee, open vs staffed) and
+        # presorted "orderings" of job ids to the export and the list
+        'listing_index': True,
+        # Jobs written to jobs-export.json and the files derived from it
+        # (list, details, search index): "all", or "open" to leave out
+        # fully staffed jobs. A JOB_FILTERS name
+        'export_filter': 'all',
+        # Extra exports, {"<name>": "<filter>"}, each written in full to
+        # jobs-export.<name>.json, e.g. {"all": "all"} next to an "open"
+        # export_filter
+        'export_variants': {},
+        # Jobs that get an OG page (a JOB_FILTERS name)
+        'og_pages_filter': 'all',
+        # Runs kept in the snapshot history (.export-state/history) for
+        # --diff and --rollback; 0 disables it
+        'history_size': 10,
+        # Write sitemap.xml of the OG pages, and feed.xml, an Atom feed of
+        # the feed_size newest jobs (0 for no feed)
+        'sitemap': True,
+        'feed_size': 50,
+        # Write jobs-list.json (jobs without DETAIL_FIELDS) and the details
+        # of each job to job-data/<slug>.json
+        'split_output': True,
+        # Spool the job export to disk and process it as a stream of
+        # records, instead of loading it into memory as a whole
+        'stream_jobs': False,
+        # Worker processes hashing jobs and building their records, for
+        # exports of at least parallel_min_jobs jobs (null: one per
+        # available CPU, 0 or 1: never); the default threshold is the
+        # crossover benchmark-export.py --parallel projects for four CPUs.
+        # Jobs are handed out in batches of parallel_batch_size. A pool not
+        # done within parallel_timeout_seconds is terminated and the jobs
+        # processed serially
+        'process_workers': None,
+        'parallel_min_jobs': 20000,
+        'parallel_batch_size': 1000,
+        'parallel_timeout_seconds': 300,
+        # Longest an export or --rollback waits for another one (e.g. a
+        # daemon's run) to release the state dir
+        'state_lock_timeout_seconds': 600,
+        # --daemon: seconds between runs, randomised by up to +/- the jitter
+        # so a fleet of exporters does not hit CampOS in lockstep
+        'daemon_interval_seconds': 900,
+        'daemon_jitter_seconds': 60,
+        # --daemon: HTTP endpoint (POST /refresh) triggering a run, disabled
+        # unless a port is set. With a token, requests must send it as
+        # "Authorization: Bearer <token>"; it is required unless the host is
+        # a loopback address
+        'trigger_host': '127.0.0.1',
+        'trigger_port': None,
+        'trigger_token': None,
+        # A run starts once triggers have been quiet for the debounce time,
+        # but no later than the max delay after the first pending trigger
+        'trigger_debounce_seconds': 10,
+        'trigger_max_delay_seconds': 60,
+    }
+
+    # Export variant names, used in file names (jobs-export.<name>.json).
+    # Names that would clash with the manifest or a hashed copy are refused
+    VARIANT_NAME_PATTERN = re.compile(r'^(?!manifest$)(?![0-9a-f]{16}$)[a-z][a-z0-9-]*$')
+
+    # Job fields only needed by the job modal, served from job-data/<slug>.json
+    DETAIL_FIELDS = ('description', 'description_time_and_scope', 'requirements')
+
     # Organization name overrides - matches config/org-overrides.js
     ORG_NAME_OVERRIDES = {
         'Havet': 'Havet (underlejr)',
@@ -40,11 +1991,27 @@ class JobExportFetcher:
         'Landet': 'Landet (underlejr)',
     }
 
-    def __init__(self, config_file, output_file):
+    def __init__(self, config_file, output_file, state_dir=None, full=False, metrics_file=None):
         self.config_file = config_file
         self.output_file = output_file
-        self.org_lookup = {}
+        self.metrics_file = metrics_file
+        self.metrics = RunMetrics()
+        if state_dir is None and output_file is not None:
+            state_dir = Path(output_file).parent / '.export-state'
+        self.state_dir = Path(state_dir) if state_dir is not None else None
+        self.full = full
+        self.http_cache = HttpCache(self.state_dir / 'http-cache') if self.state_dir else None
+        self.org_index = None
+        self.og_template = None
         self.config = None
+        # Kept between runs of a long-running process (--daemon): the state
+        # of the last run, and the org export hash and org map of org_index
+        self.state = None
+        self.state_mtime = None
+        self.org_export_hash = None
+        self.org_map = None
+        # Set by ExportDaemon; worker processes are then spawned, not forked
+        self.daemon = False
 
     def load_config(self):
         """Load API configuration from config.json"""
@@ -60,6 +2027,33 @@ class JobExportFetcher:
                 print("Please see config.example.json for the required structure")
                 sys.exit(1)
 
+            # Validate job filter names
+            filter_names = [
+                self.setting('export_filter'), self.setting('og_pages_filter'),
+                *self.setting('export_variants').values(),
+            ]
+            unknown_filters = [name for name in filter_names if name not in JOB_FILTERS]
+            if unknown_filters:
+                print(f"Error: Unknown job filter in {self.config_file}: {', '.join(map(str, unknown_filters))}")
+                print(f"Available filters: {', '.join(JOB_FILTERS)}")
+                sys.exit(1)
+            bad_names = [name for name in self.setting('export_variants') if not self.VARIANT_NAME_PATTERN.match(name)]
+            if bad_names:
+                print(f"Error: Invalid export variant name in {self.config_file}: {', '.join(bad_names)}")
+                print("Use lowercase letters, digits and '-', starting with a letter")
+                sys.exit(1)
+
+            if (
+                self.setting('trigger_port') is not None
+                and not self.setting('trigger_token')
+                and not is_loopback_host(self.setting('trigger_host'))
+            ):
+                print(
+                    f"Error: trigger_token is required in {self.config_file} when the trigger endpoint "
+                    f"listens on {self.setting('trigger_host')} (anyone who can reach it could trigger runs)"
+                )
+                sys.exit(1)
+
             print(f"Loaded configuration from {self.config_file}")
             return True
 
@@ -71,27 +2065,203 @@ class JobExportFetcher:
             print(f"Error: Invalid JSON in {self.config_file}: {e}")
             sys.exit(1)
 
+    def setting(self, name):
+        """Optional setting from config.json, falling back to DEFAULT_SETTINGS"""
+        return (self.config or {}).get(name, self.DEFAULT_SETTINGS[name])
+
+    def is_transient_error(self, error):
+        """Whether a fetch error is worth retrying"""
+        if isinstance(error, HTTPError):
+            return error.code == 429 or error.code >= 500
+        return isinstance(error, (URLError, OSError, EOFError, http.client.HTTPException, InvalidExportError))
+
+    def fetch_once(self, url, spool=False):
+        """Fetch the raw (decompressed) response body from a URL, once
+
+        Sends If-None-Match/If-Modified-Since when the URL is in the HTTP
+        cache, and reuses the cached body on 304 Not Modified.
+
+        fetch_timeout_seconds bounds connecting and each wait for data,
+        fetch_body_timeout_seconds the download of the body as a whole.
+
+        With spool=True the body is streamed to the HTTP cache instead of
+        read into memory, and a SpooledBody is returned.
+
+        A body that is not a JSON array raises InvalidExportError (retried,
+        then left to the stale fallback) and is not cached.
+        """
+        if spool and not self.http_cache:
+            raise ValueError("Spooling a response requires a state directory")
+        validators = self.http_cache.validators(url) if self.http_cache else None
+
+        timeout = self.setting('fetch_timeout_seconds')
+        body_timeout = self.setting('fetch_body_timeout_seconds')
+
+        req = Request(url)
+        req.add_header('User-Agent', 'JobBank/1.0')
+        req.add_header('Accept-Encoding', 'gzip')
+        if validators:
+            if validators.get('etag'):
+                req.add_header('If-None-Match', validators['etag'])
+            if validators.get('last_modified'):
+                req.add_header('If-Modified-Since', validators['last_modified'])
+
+        try:
+            with urlopen(req, timeout=timeout) as response:
+                etag = response.headers.get('ETag')
+                last_modified = response.headers.get('Last-Modified')
+                gzipped = response.headers.get('Content-Encoding', '').lower() == 'gzip'
+                reader = DeadlineReader(response, time.monotonic() + body_timeout, body_timeout)
+
+                # Bodies are checked before they are cached: a corrupted
+                # one would otherwise be served again on every 304
+                if spool:
+                    stream = gzip.GzipFile(fileobj=reader) if gzipped else reader
+                    return self.http_cache.spool(url, stream, etag, last_modified, validate=validate_export)
+
+                body = reader.read()
+                if gzipped:
+                    body = gzip.decompress(body)
+                validate_export(body)
+                if self.http_cache:
+                    self.http_cache.store(url, body, etag=etag, last_modified=last_modified)
+                return body
+        except HTTPError as e:
+            if e.code == 304 and validators:
+                print("Not modified, using cached copy")
+                cached = self.http_cache.spooled(url) if spool else self.http_cache.load(url)
+                if cached is not None:
+                    self.http_cache.revalidated(url)
+                    self.metrics.count('http_cache_hits')
+                    return cached if spool else cached[1]
+            raise
+
+    def retry_after(self, error):
+        """Seconds a 429/503 response asks to wait (Retry-After), or None"""
+        value = error.headers.get('Retry-After') if isinstance(error, HTTPError) and error.headers else None
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+        except (TypeError, ValueError):
+            return None
+
+    def fetch_bytes(self, url, spool=False):
+        """Fetch the raw response body from a URL, retrying transient errors
+
+        Retries back off exponentially, or wait as long as a Retry-After
+        header asks, but never past fetch_deadline_seconds from the start.
+        With spool=True, returns a SpooledBody (see fetch_once).
+        Raises FetchError when the fetch fails for good.
+        """
+        attempts = self.setting('fetch_attempts')
+        delay = self.setting('fetch_backoff_seconds')
+        deadline = time.monotonic() + self.setting('fetch_deadline_seconds')
+
+        for attempt in range(1, attempts + 1):
+            try:
+                return self.fetch_once(url, spool=spool)
+            except Exception as e:
+                if isinstance(e, HTTPError):
+                    message = f"HTTP Error {e.code}: {e.reason}"
+                elif isinstance(e, URLError):
+                    message = f"URL Error: {e.reason}"
+                else:
+                    message = f"Error fetching data: {e}"
+
+                if attempt == attempts or not self.is_transient_error(e):
+                    raise FetchError(f"{message}\nURL: {url}") from e
+
+                wait = max(delay, self.retry_after(e) or 0)
+                if time.monotonic() + wait > deadline:
+                    raise FetchError(
+                        f"{message}, and a retry in {wait:g}s would pass the "
+                        f"{self.setting('fetch_deadline_seconds'):g}s fetch deadline\nURL: {url}"
+                    ) from e
+
+                print(f"{message} (attempt {attempt}/{attempts}), retrying in {wait:g}s")
+                self.metrics.count('fetch_retries')
+                time.sleep(wait)
+                delay *= 2
+
+    def stale_copy(self, label, url, spool, error):
+        """The last good copy of an export that could not be fetched, or None
+
+        Used when the HTTP cache has a copy fetched (or revalidated) within
+        fetch_stale_max_age_seconds, so a CampOS outage leaves the site on
+        slightly old data instead of failing the run.
+        """
+        max_age = self.setting('fetch_stale_max_age_seconds')
+        age = self.http_cache.age(url) if self.http_cache and max_age else None
+        if age is None or age > max_age:
+            return None
+        cached = self.http_cache.spooled(url) if spool else self.http_cache.load(url)
+        if cached is None:
+            return None
+        print(f"{error}\nUsing the cached {label} export from {age / 60:.0f} minutes ago")
+        self.metrics.set('stale_exports', 1, export=label)
+        self.metrics.set('stale_export_age_seconds', round(age), export=label)
+        return cached if spool else cached[1]
+
+    def fetch_exports(self, spool_jobs=False):
+        """Fetch the org and job exports concurrently
+
+        An export that cannot be fetched falls back to its cached copy (see
+        stale_copy). Returns: (org_raw, job_raw) response bodies; job_raw is
+        a SpooledBody with spool_jobs=True. Exits on failure.
+        """
+        def timed_fetch(label, url, spool=False):
+            start = time.perf_counter()
+            try:
+                body = self.fetch_bytes(url, spool=spool)
+            except FetchError as e:
+                body = self.stale_copy(label, url, spool, e)
+                if body is None:
+                    raise
+            else:
+                self.metrics.set('stale_exports', 0, export=label)
+            size = body.size if spool else len(body)
+            print(f"Fetched {label} export: {size} bytes in {time.perf_counter() - start:.2f}s")
+            self.metrics.set('fetched_bytes', size, export=label)
+            return body
+
+        print("\nFetching organization and job data...")
+        self.metrics.set('http_cache_hits', 0)
+        self.metrics.set('fetch_retries', 0)
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            org_future = executor.submit(timed_fetch, 'organization', self.config['org_export_url'])
+            job_future = executor.submit(timed_fetch, 'job', self.config['job_export_url'], spool_jobs)
+            try:
+                org_raw = org_future.result()
+                job_raw = job_future.result()
+            except FetchError as e:
+                print(e)
+                sys.exit(1)
+
+        print(f"Fetch phase took {time.perf_counter() - start:.2f}s")
+        return org_raw, job_raw
+
     def fetch_json(self, url):
         """Fetch JSON data from a URL"""
-        try:
-            req = Request(url)
-            req.add_header('User-Agent', 'JobBank/1.0')
+        return json.loads(self.fetch_bytes(url).decode('utf-8'))
 
-            with urlopen(req, timeout=30) as response:
-                data = response.read()
-                return json.loads(data.decode('utf-8'))
+    def date_timestamp_ms(self, iso_date_string):
+        """Convert ISO date string to milliseconds since the epoch, like Date.getTime()
 
-        except HTTPError as e:
-            print(f"HTTP Error {e.code}: {e.reason}")
-            print(f"URL: {url}")
-            sys.exit(1)
-        except URLError as e:
-            print(f"URL Error: {e.reason}")
-            print(f"URL: {url}")
-            sys.exit(1)
-        except Exception as e:
-            print(f"Error fetching data: {e}")
-            sys.exit(1)
+        Example: '2025-05-06T23:59:57.525504+02:00' -> 1746568797525
+        """
+        if not iso_date_string:
+            return None
+
+        try:
+            return int(datetime.fromisoformat(iso_date_string).timestamp() * 1000)
+        except (ValueError, AttributeError):
+            return None
 
     def format_date_danish(self, iso_date_string):
         """Convert ISO date string to Danish format (DD-MM-YYYY)
@@ -113,12 +2283,7 @@ class JobExportFetcher:
 
         Example: '1/2/6/55/131/' -> '131'
         """
-        if not path:
-            return None
-        # Remove trailing slash and split
-        parts = path.rstrip('/').split('/')
-        # Return the last part
-        return parts[-1] if parts else None
+        return extract_org_id_from_path(path)
 
     def apply_org_name_override(self, org_name):
         """Apply organization name overrides if configured
@@ -139,40 +2304,82 @@ class JobExportFetcher:
 
         Example: '5532 - GRAS' -> 'GRAS'
         Returns: (numeric_id, clean_name)
+
+        Names present in the org export are served from the org-tree index;
+        splitting off the prefix is memoized by split_org_name().
         """
         if not org_name:
             return None, None
 
-        # Match pattern: "5532 - GRAS", "0050 Korpsansatte", or just "GRAS"
-        match = re.match(r'^(\d+)\s*(?:-\s*)?(.+)$', org_name)
-        if match:
-            clean_name = match.group(2).strip()
-            # Apply overrides after cleaning
-            clean_name = self.apply_org_name_override(clean_name)
-            return match.group(1), clean_name
+        if self.org_index is not None:
+            cleaned = self.org_index.clean_names.get(org_name)
+            if cleaned is not None:
+                return cleaned
 
-        # No numeric prefix, just apply overrides
-        clean_name = org_name.strip()
-        clean_name = self.apply_org_name_override(clean_name)
-        return None, clean_name
+        # Apply overrides after cleaning
+        org_id, clean_name = split_org_name(org_name)
+        return org_id, self.apply_org_name_override(clean_name)
 
     def build_org_lookup(self, org_data):
-        """Build organization name -> path lookup from org export data
+        """Build the org-tree index from org export data, and report its issues
 
         The org export has structure: [{"name": "5532 - GRAS", "parent_path": "1/2/6/55/131/"}, ...]
-        We create a lookup by organization name to get the parent_path
+        Organizations are indexed by their ID (the last element of
+        parent_path), and by name for looking up the organization of a job.
         """
         print(f"Building organization lookup from {len(org_data)} organizations...")
 
-        for org in org_data:
-            org_name = org.get('name')
-            org_path = org.get('parent_path')
+        self.org_index = None
+        self.org_index = OrgTreeIndex(org_data, self.clean_org_name)
+
+        print(f"Built lookup for {len(self.org_index.ids_by_name)} organizations")
+        self.report_org_issues()
 
-            if org_name:
-                # Store both by full name for exact matching
-                self.org_lookup[org_name] = org_path
+    def report_org_issues(self, quiet=False):
+        """Print the org export's validation issues and count them in the metrics
+
+        quiet=True only sets the metrics, for an index already reported.
+        """
+        org_index = self.get_org_index()
+        for kind, count in sorted(org_index.issue_counts.items() if not quiet else ()):
+            examples = org_index.issues.get(kind, [])
+            print(f"Warning: org export has {count} {kind.replace('_', ' ')} issue(s):")
+            for example in examples[:5]:
+                print(f"  {example}")
+            if count > 5:
+                print(f"  ... and {count - 5} more")
+        for kind in OrgTreeIndex.ISSUE_KINDS:
+            self.metrics.set('org_export_issues', org_index.issue_counts.get(kind, 0), kind=kind)
+
+    def org_index_file(self):
+        return self.state_dir / 'org-index.json'
+
+    def load_org_index(self, org_hash):
+        """The index saved by a run with the same org export, or None"""
+        try:
+            with open(self.org_index_file(), 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') != self.ORG_INDEX_VERSION or data.get('org_export_hash') != org_hash:
+                return None
+            return OrgTreeIndex.from_json(data['index'], self.clean_org_name)
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def save_org_index(self, org_hash):
+        """Save the org index for the following runs, keyed by the org export hash"""
+        self.state_dir.mkdir(parents=True, exist_ok=True)
+        data = {
+            'version': self.ORG_INDEX_VERSION,
+            'org_export_hash': org_hash,
+            'index': self.org_index.to_json(),
+        }
+        write_file_atomic(self.org_index_file(), json.dumps(data, ensure_ascii=False).encode('utf-8'))
 
-        print(f"Built lookup for {len(self.org_lookup)} organizations")
+    def get_org_index(self):
+        """Return the org-tree index (an empty one if none was built)"""
+        if self.org_index is None:
+            self.org_index = OrgTreeIndex([], self.clean_org_name)
+        return self.org_index
 
     def build_org_map(self):
         """Build a mapping from every org ID to its top-level area (short) name.
@@ -190,38 +2397,7 @@ class JobExportFetcher:
 
         Returns: dict {org_id_str: area_short_name}
         """
-        # Build reverse lookup: org_id -> full_name
-        org_id_to_name = {}
-        for name, path in self.org_lookup.items():
-            org_id = self.extract_org_id_from_path(path)
-            if org_id:
-                org_id_to_name[org_id] = name
-
-        org_map = {}
-
-        for name, path in self.org_lookup.items():
-            if not path:
-                continue
-
-            own_id = self.extract_org_id_from_path(path)
-            if not own_id:
-                continue
-
-            # Strip the two fixed top levels: 1 (Spejderne root) and 2 (SL2026)
-            parts = path.rstrip('/').split('/')
-            if len(parts) < 3:
-                # Root or camp level — no area to map to
-                continue
-            parts = parts[2:]  # Now: [area_id, ...] or [area_id, committee_id, ...]
-
-            area_id = parts[0]
-            area_full_name = org_id_to_name.get(area_id)
-            if not area_full_name:
-                continue
-
-            _, area_short_name = self.clean_org_name(area_full_name)
-            if area_short_name:
-                org_map[own_id] = area_short_name
+        org_map = dict(self.get_org_index().area_names)
 
         print(f"Built org_map for {len(org_map)} org IDs")
         return org_map
@@ -236,262 +2412,960 @@ class JobExportFetcher:
         - Team level: Ignored(1)/Lejr(2)/Area(6)/Committee(55)/Team(131)/
         - Workgroup level: Ignored(1)/Lejr(2)/Area(6)/Committee(55)/Team(131)/Workgroup(456)/
 
-        Returns: dict with area, committee, team, workgroup info
+        Returns: the OrgHierarchy shared by all jobs of the organization
         """
-        # Look up the org_path by organization name
-        org_path = self.org_lookup.get(org_name)
+        org_index = self.get_org_index()
+        hierarchy = org_index.hierarchy_for(org_name)
+        if hierarchy is not None:
+            return hierarchy
+        return org_index.unknown_hierarchy_for(org_name)
 
-        if not org_path:
-            return {
-                'area': 'Unknown',
-                'area_full': 'Unknown',
-                'committee': None,
-                'committee_full': None,
-                'team': None,
-                'team_full': None,
-                'workgroup': None,
-                'workgroup_full': None,
-                'full_path': [org_name]
-            }
+    def derive_job_fields(self, job):
+        """The record fields computed from a job's raw data
 
-        # Parse the path: 1/2/6/55/131/456/
-        parts = org_path.rstrip('/').split('/')
+        Returns: (formatted_create_date, create_timestamp, title_sort_key)
+        """
+        create_date_iso = job.get('create_date')
+        if not create_date_iso:
+            return None, None, danish_sort_key(job.get('name', 'Unnamed Job'))
+        return (
+            self.format_date_danish(create_date_iso),
+            self.date_timestamp_ms(create_date_iso),
+            danish_sort_key(job.get('name', 'Unnamed Job')),
+        )
+
+    def process_job(self, job):
+        """Process a single job record from the API data"""
+        job_id = job.get('id')
+        job_name = job.get('name', 'Unnamed Job')
+        org_name = job.get('organization_id', 'Unknown')
+
+        # Get organizational hierarchy
+        org_hierarchy = self.get_org_hierarchy_for_job(org_name)
+
+        # Format dates, and the sort keys, so the app does not re-parse
+        # dates or fold names
+        create_date_danish, create_timestamp, title_sort_key = self.derive_job_fields(job)
+
+        # Build job record (fields in JobRecord.FIELDS order)
+        return JobRecord(
+            job_id,
+            job_name,
+            job.get('teaser', ''),
+            job.get('description', ''),
+            job.get('description_time_and_scope', ''),
+            job.get('requirements'),
+            job.get('application_count', 0),
+            job.get('no_of_recruitment', 0),
+            job.get('application_count', 0),  # no_of_hired_employee: using application_count as proxy
+            job.get('min_age'),
+            job.get('website_url', ''),
+            job.get('create_date') or None,
+            create_date_danish,
+            create_timestamp,
+            title_sort_key,
+            org_hierarchy,
+        )
+
+    def prepare_job(self, job):
+        """The per-job work that does not need the run's state
+
+        Returns: (content hash, process_job(job), slug)
+        """
+        record = self.process_job(job)
+        return job_content_hash(job), record, self.build_job_slug(record)
 
-        # Remove first level (1=ignored)
-        if len(parts) > 1:
-            parts = parts[1:]  # Now: [2, 6, 55, 131, 456] or [2] for camp-level
+    def parallel_workers(self, job_count):
+        """Worker processes for preparing job_count jobs; 0 to prepare them serially
 
-        hierarchy = {
-            'area': None,
-            'area_full': None,
-            'committee': None,
-            'committee_full': None,
-            'team': None,
-            'team_full': None,
-            'workgroup': None,
-            'workgroup_full': None,
-            'full_path': []
-        }
+        Serial below parallel_min_jobs, and with fewer than two workers
+        (one CPU, process_workers 0 or 1) or batches.
+        """
+        workers = self.setting('process_workers')
+        if workers is None:
+            workers = available_cpus()
+        workers = min(workers, -(-job_count // self.setting('parallel_batch_size')))
+        if workers < 2 or job_count < self.setting('parallel_min_jobs'):
+            return 0
+        return workers
+
+    def process_context(self):
+        """The multiprocessing context the prepare_jobs workers are started with
+
+        Forking copies only the calling thread, so a lock another thread
+        holds at that moment (the daemon's trigger endpoint, a queue's
+        feeder) stays locked in the worker for good. Workers are therefore
+        only forked by a one-off run with no other threads, and spawned in
+        daemon mode, while other threads run, and where fork is missing
+        (Windows).
+        """
+        if (
+            not self.daemon
+            and threading.active_count() == 1
+            and 'fork' in multiprocessing.get_all_start_methods()
+        ):
+            return multiprocessing.get_context('fork')
+        return multiprocessing.get_context('spawn')
+
+    def _prepare_batches(self, job_data, batches, results):
+        """Worker process: prepare_job() every job of each batch taken from the queue
+
+        Batches are batch numbers into job_data, or (batch number, jobs)
+        when job_data is None. The prepared jobs are pickled here rather
+        than by the queue's feeder thread, which would only log a failure
+        and leave the parent waiting.
+        """
+        batch_size = self.setting('parallel_batch_size')
+        for batch in iter(batches.get, None):
+            try:
+                if job_data is None:
+                    batch, jobs = batch
+                else:
+                    jobs = job_data[batch * batch_size:(batch + 1) * batch_size]
+                results.put((batch, pickle.dumps([self.prepare_job(job) for job in jobs])))
+            except Exception:
+                results.put((batch, traceback.format_exc()))
+
+    def prepare_jobs(self, job_data):
+        """prepare_job() for every job, in a process pool for large exports
+
+        Forked workers share job_data and the org index with this process
+        instead of having them pickled, and are only sent batch numbers.
+        Spawned ones (see process_context) rebuild the org index from its
+        to_json() and are sent the jobs of each batch. Either way the
+        records come back pickled, their hierarchies are swapped for this
+        process's shared instances, and batches are merged in job_data
+        order, so the result does not depend on which worker finishes
+        first. Workers not done within parallel_timeout_seconds are killed.
+
+        Returns: the prepared jobs, or None when they are to be prepared
+        serially (see parallel_workers), or the pool failed or timed out.
+        """
+        workers = self.parallel_workers(len(job_data))
+        self.metrics.set('process_workers', workers)
+        if not workers:
+            return None
 
-        # Check if this is a camp-level job (only has ID 2)
-        if len(parts) == 1 and parts[0] == '2':
-            # Camp-level job - use special name
-            clean_camp_name = self.clean_org_name(org_name)[1] or 'Spejdernes Lejr 2026'
-            hierarchy['area'] = clean_camp_name
-            hierarchy['area_full'] = org_name
-            hierarchy['full_path'].append(clean_camp_name)
-            return hierarchy
+        batch_size = self.setting('parallel_batch_size')
+        batch_count = -(-len(job_data) // batch_size)
+        context = self.process_context()
+        forked = context.get_start_method() == 'fork'
+        batches = context.Queue()
+        results = context.Queue()
+        if forked:
+            target, args = self._prepare_batches, (job_data, batches, results)
+        else:
+            target, args = prepare_spawned_batches, (self.config, self.get_org_index().to_json(), batches, results)
+        processes = [context.Process(target=target, args=args, daemon=True) for _ in range(workers)]
+        # Started before the batches are queued, so no feeder thread runs yet when forking
+        for process in processes:
+            process.start()
+        for batch in range(batch_count):
+            batches.put(batch if forked else (batch, job_data[batch * batch_size:(batch + 1) * batch_size]))
+        for _ in range(workers):
+            batches.put(None)
+
+        org_index = self.get_org_index()
+        prepared = [None] * batch_count
+        timeout = self.setting('parallel_timeout_seconds')
+        deadline = time.monotonic() + timeout
+        try:
+            received = 0
+            while received < batch_count:
+                try:
+                    batch, jobs = results.get(timeout=max(0, min(1, deadline - time.monotonic())))
+                except queue.Empty:
+                    if any(process.exitcode not in (None, 0) for process in processes):
+                        raise RuntimeError("a worker process died")
+                    if time.monotonic() >= deadline:
+                        raise RuntimeError(f"workers not done after {timeout} seconds")
+                    continue
+                if isinstance(jobs, str):
+                    raise RuntimeError(jobs)
+                jobs = pickle.loads(jobs)
+                # Each batch has its own copy of a hierarchy its jobs share
+                adopted = {}
+                for _, record, _ in jobs:
+                    hierarchy = adopted.get(record.org_hierarchy)
+                    if hierarchy is None:
+                        hierarchy = adopted[record.org_hierarchy] = org_index.adopt(record.org_hierarchy)
+                    record.org_hierarchy = hierarchy
+                prepared[batch] = jobs
+                received += 1
+        except RuntimeError as e:
+            print(f"Warning: parallel processing failed, processing serially: {e}")
+            self.metrics.set('process_workers', 0)
+            for process in processes:
+                process.kill()
+            return None
+        finally:
+            for process in processes:
+                process.join()
+            # Batches killed workers left unread must not hold up this process's exit
+            batches.cancel_join_thread()
+
+        print(
+            f"Prepared {len(job_data)} jobs in {batch_count} batches on {workers} processes "
+            f"({context.get_start_method()})"
+        )
+        return [job for batch in prepared for job in batch]
 
-        # Remove camp level (2=lejr root) for regular jobs
-        if len(parts) > 1:
-            parts = parts[1:]  # Now: [6, 55, 131, 456]
+    def process_jobs(self, job_data):
+        """Process jobs from API data"""
+        print(f"Processing {len(job_data)} jobs...")
 
-        # We need to look up the org names for each ID in the path
-        # Build a reverse lookup: org_id -> org_name
-        org_id_lookup = {}
-        for name, path in self.org_lookup.items():
-            org_id = self.extract_org_id_from_path(path)
-            if org_id:
-                org_id_lookup[org_id] = name
-
-        # Map path indices to levels
-        # parts[0] = Area (level 3)
-        # parts[1] = Committee (level 4) if exists
-        # parts[2] = Team (level 5) if exists
-        # parts[3] = Workgroup (level 6) if exists
-
-        for idx, org_id in enumerate(parts):
-            org_full_name = org_id_lookup.get(org_id, f"ID-{org_id}")
-            org_numeric_id, org_clean_name = self.clean_org_name(org_full_name)
-
-            if idx == 0:
-                hierarchy['area'] = org_clean_name
-                hierarchy['area_full'] = org_full_name
-                hierarchy['full_path'].append(org_clean_name)
-            elif idx == 1:
-                hierarchy['committee'] = org_clean_name
-                hierarchy['committee_full'] = org_full_name
-                hierarchy['full_path'].append(org_clean_name)
-            elif idx == 2:
-                hierarchy['team'] = org_clean_name
-                hierarchy['team_full'] = org_full_name
-                hierarchy['full_path'].append(org_clean_name)
-            elif idx == 3:
-                hierarchy['workgroup'] = org_clean_name
-                hierarchy['workgroup_full'] = org_full_name
-                hierarchy['full_path'].append(org_clean_name)
+        prepared = self.prepare_jobs(job_data)
+        if prepared is None:
+            jobs = [self.process_job(job) for job in job_data]
+        else:
+            jobs = [record for _, record, _ in prepared]
 
-        # Fallback to org name if nothing found
-        if not hierarchy['area']:
-            hierarchy['area'] = self.clean_org_name(org_name)[1] or 'Unknown'
-            hierarchy['area_full'] = org_name
+        print(f"Processed {len(jobs)} jobs")
+        return jobs
 
-        return hierarchy
+    def iter_jobs_incremental(self, job_data, previous_jobs, job_state, keep_records=True, last_jobs=None,
+                              prepared=None):
+        """Process jobs lazily, reusing cached records for unchanged jobs
 
-    def process_jobs(self, job_data):
-        """Process jobs from API data"""
-        print(f"Processing {len(job_data)} jobs...")
+        previous_jobs is the 'jobs' section of the last run's state:
+        {job_id_str: JobState}, whose record may still be its JSON
+
+        Fills job_state with the new 'jobs' section while yielding
+        (job, changed) pairs, where changed is True for new or changed jobs.
+        With keep_records=False the processed records are not kept in the
+        state (so memory does not grow with the export), and every job is
+        reprocessed.
+
+        "modified" (a W3C datetime, used as the sitemap lastmod) is the
+        create_date of a new job and the time of the run that last saw the
+        job change. It is carried over from last_jobs, the last run's 'jobs'
+        section even when previous_jobs is emptied (default previous_jobs).
+        It is None while it is the job's create_date, which spares most
+        jobs a string in the state (see JobState.lastmod).
+
+        prepared: prepare_jobs(job_data), the hashes, records and slugs to
+        use instead of hashing and processing each job here.
+        """
+        if last_jobs is None:
+            last_jobs = previous_jobs
+        now = w3c_datetime(datetime.now(timezone.utc).isoformat())
+        for position, job in enumerate(job_data):
+            key = str(job.get('id'))
+            if prepared is None:
+                job_hash, record, slug = job_content_hash(job), None, None
+            else:
+                job_hash, record, slug = prepared[position]
+            cached = previous_jobs.get(key)
+            changed = cached is None or cached.hash != job_hash
+
+            if not changed and cached.record is not None:
+                record = cached.record
+                if not isinstance(record, JobRecord):
+                    # Loaded from the state file
+                    record = JobRecord.from_json(record, self.get_org_index())
+                slug = cached.slug
+            else:
+                if record is None:
+                    record = self.process_job(job)
+                if slug is None:
+                    slug = self.build_job_slug(record)
+
+            last = last_jobs.get(key)
+            created = w3c_datetime(job.get('create_date'))
+            if last is None:
+                modified = created or now
+            elif last.hash != job_hash:
+                modified = now
+            else:
+                modified = last.modified or created or now
+
+            job_state[key] = JobState(
+                job_hash, slug, None if modified == created else modified, record if keep_records else None
+            )
+            yield record, changed
 
+    def stale_slugs(self, previous_jobs, job_state):
+        """OG page slugs of removed jobs, or of jobs whose slug changed"""
+        current_slugs = {entry.slug for entry in job_state.values()}
+        return {entry.slug for entry in previous_jobs.values() if entry.slug not in current_slugs}
+
+    def process_jobs_incremental(self, job_data, previous_jobs, last_jobs=None):
+        """Process jobs, reusing cached records for jobs whose content is unchanged
+
+        last_jobs: see iter_jobs_incremental
+
+        Returns: (jobs, job_state, changed_jobs, stale_slugs)
+        - jobs: processed jobs in export order
+        - job_state: the new 'jobs' section for the state file
+        - changed_jobs: processed jobs that are new or changed
+        - stale_slugs: OG page slugs of removed jobs or jobs whose slug changed
+        """
+        job_state = {}
         jobs = []
+        changed_jobs = []
+        prepared = self.prepare_jobs(job_data)
+        for job, changed in self.iter_jobs_incremental(
+            job_data, previous_jobs, job_state, last_jobs=last_jobs, prepared=prepared
+        ):
+            jobs.append(job)
+            if changed:
+                changed_jobs.append(job)
+
+        stale_slugs = self.stale_slugs(previous_jobs, job_state)
+        self.report_jobs(len(jobs), len(changed_jobs), len(stale_slugs))
+        return jobs, job_state, changed_jobs, stale_slugs
+
+    def report_jobs(self, job_count, changed_count, removed_count):
+        print(
+            f"Processed {job_count} jobs ({changed_count} new or changed, "
+            f"{job_count - changed_count} unchanged, {removed_count} removed)"
+        )
+        self.metrics.set('jobs', job_count)
+        self.metrics.set('jobs_changed', changed_count)
+        self.metrics.set('jobs_removed', removed_count)
+
+    def state_file(self):
+        return self.state_dir / 'state.json'
+
+    def load_state(self):
+        """Load the state of the last run, or an empty state if unusable"""
+        try:
+            with open(self.state_file(), 'r', encoding='utf-8') as f:
+                # Job entries, the only objects with a "hash" and a "slug", are loaded as JobStates
+                state = json.load(f, object_hook=lambda data: (
+                    JobState.from_json(data) if 'hash' in data and 'slug' in data else data
+                ))
+        except (OSError, ValueError):
+            return {}
+
+        if state.get('version') != self.STATE_VERSION:
+            return {}
+        return state
+
+    def save_state(self, state):
+        """Persist run state (written to a temp file, then renamed)
+
+        The 'jobs' section goes last, encoded entry by entry, so the state
+        of a large export is never built as one string.
+        """
+        self.state_dir.mkdir(parents=True, exist_ok=True)
+        header = json.dumps({key: value for key, value in state.items() if key != 'jobs'}, ensure_ascii=False)
+        with open_atomic(self.state_file()) as f:
+            f.write(f'{header[:-1]}, "jobs": {{'.encode('utf-8'))
+            for position, (key, entry) in enumerate(state.get('jobs', {}).items()):
+                data = json.dumps(entry, ensure_ascii=False, default=lambda value: value.to_json())
+                f.write(f'{", " if position else ""}{json.dumps(key)}: {data}'.encode('utf-8'))
+            f.write(b'}}')
+        self.state = state
+        self.state_mtime = self.state_file().stat().st_mtime_ns
+
+    def current_state(self):
+        """State of the last run: kept in memory, unless the state file was
+        rewritten by another process since (e.g. --rollback)"""
+        try:
+            mtime = self.state_file().stat().st_mtime_ns
+        except OSError:
+            mtime = None
+        if self.state is not None and mtime == self.state_mtime:
+            return self.state
+        return self.load_state()
+
+    def history(self):
+        """The snapshot history, or None when disabled (history_size 0)"""
+        if self.state_dir is None or self.setting('history_size') <= 0:
+            return None
+        return ExportHistory(self.state_dir / 'history', self.setting('history_size'))
 
-        for job in job_data:
-            job_id = job.get('id')
-            job_name = job.get('name', 'Unnamed Job')
-            org_name = job.get('organization_id', 'Unknown')
-
-            # Get organizational hierarchy
-            org_hierarchy = self.get_org_hierarchy_for_job(org_name)
-
-            # Format dates
-            create_date_iso = None
-            create_date_danish = None
-            if job.get('create_date'):
-                create_date_iso = job.get('create_date')
-                create_date_danish = self.format_date_danish(create_date_iso)
-
-            # Build job object
-            job_obj = {
-                "id": job_id,
-                "name": job_name,
-                "teaser": job.get('teaser', ''),
-                "description": job.get('description', ''),
-                "description_time_and_scope": job.get('description_time_and_scope', ''),
-                "requirements": job.get('requirements'),
-                "application_count": job.get('application_count', 0),
-                "no_of_recruitment": job.get('no_of_recruitment', 0),
-                "no_of_hired_employee": job.get('application_count', 0),  # Using application_count as proxy
-                "min_age": job.get('min_age'),
-                "website_url": job.get('website_url', ''),
-                "create_date": create_date_iso,
-                "formatted_create_date": create_date_danish,
-                "org_hierarchy": {
-                    "area": org_hierarchy['area'],
-                    "area_full": org_hierarchy['area_full'],
-                    "committee": org_hierarchy['committee'],
-                    "committee_full": org_hierarchy['committee_full'],
-                    "team": org_hierarchy['team'],
-                    "team_full": org_hierarchy['team_full'],
-                    "workgroup": org_hierarchy['workgroup'],
-                    "workgroup_full": org_hierarchy['workgroup_full']
-                }
-            }
+    def commit_snapshot(self, snapshot, org_map, **fields):
+        """Record a published run in the history"""
+        pruned = snapshot.commit(org_map, **fields)
+        print(
+            f"Recorded run {snapshot.run} in the history ({snapshot.count} jobs, "
+            f"{snapshot.objects_written} new records, {pruned} old runs dropped)"
+        )
+        self.metrics.set('history_new_records', snapshot.objects_written)
 
-            jobs.append(job_obj)
+    def og_fingerprint(self, output_dir):
+        """Hash of the inputs shared by all OG pages (index.html, SITE_URL and og_pages_filter)
 
-        print(f"Processed {len(jobs)} jobs")
-        return jobs
+        Returns None when there is no index.html (no OG pages are generated).
+        """
+        index_path = Path(output_dir) / 'index.html'
+        if not index_path.exists():
+            return None
+        site_url = os.getenv('SITE_URL', 'https://jobs.spejderneslejr.dk').rstrip('/')
+        og_filter = self.setting('og_pages_filter')
+        return content_hash(index_path.read_bytes() + site_url.encode('utf-8') + og_filter.encode('utf-8'))
 
-    def write_output(self, jobs, org_map):
+    def write_output(self, jobs, org_map, snapshot=None, generated_at=None):
         """Write jobs and org_map to JSON file
 
         Output format: {"jobs": [...], "org_map": {"9": "Infrastruktur & Beredskab (IB)", ...}}
 
         org_map allows the Vue app to resolve ?organization=nnn (used by the old
         CampOS site) to the correct top-level area filter.
+
+        Depending on the settings, the same pass also writes the search index
+        (jobs-search-index.json) and the slim list (jobs-list.json) with
+        per-job details (job-data/<slug>.json). The list, details and search
+        index left by an earlier run are removed when their setting is off.
+        All of these files share the run's "generated_at" (run_timestamp(),
+        unless given), which is written last to jobs-generated.json, so the
+        app can tell whether they belong together. jobs may be any iterable,
+        e.g. a generator over a streamed export: every job is encoded as it
+        arrives and the job list is never held in memory.
+
+        jobs holds every job of the export: the files above get the jobs
+        passing export_filter, and each of export_variants gets its own
+        jobs-export.<name>.json with the jobs passing its filter (those of
+        variants no longer configured are removed). All of
+        them are added to snapshot (an ExportSnapshot), if given.
+
+        Returns: the number of jobs written to jobs-export.json
         """
         output_path = Path(self.output_file)
         output_path.parent.mkdir(parents=True, exist_ok=True)
+        compact = self.setting('compact_output')
+        if compact is None:
+            compact = os.getenv('COMPACT_OUTPUT', '') not in ('', '0', 'false')
+        generated_at = generated_at or self.run_timestamp()
+        job_filter = JOB_FILTERS[self.setting('export_filter')]
+
+        variants = []
+        for name, filter_name in self.setting('export_variants').items():
+            variant_path = output_path.with_name(f"{output_path.stem}.{name}{output_path.suffix}")
+            variants.append((
+                variant_path,
+                JOB_FILTERS[filter_name],
+                JsonExportWriter(variant_path, compact=compact),
+                ListingIndex() if self.setting('listing_index') else None,
+            ))
+
+        # Variants removed from export_variants since an earlier run
+        for path in output_path.parent.glob(f"{output_path.stem}.*{output_path.suffix}"):
+            name = path.name[len(output_path.stem) + 1:-len(output_path.suffix)]
+            if self.VARIANT_NAME_PATTERN.match(name) and name not in self.setting('export_variants'):
+                remove_published_file(path)
+                print(f"Removed {path.name} (no longer in export_variants)")
+
+        export_writer = JsonExportWriter(output_path, compact=compact)
+        search_index = None
+        if self.setting('search_index'):
+            search_index = SearchIndexWriter(output_path.with_name('jobs-search-index.json'))
+        listing_index = ListingIndex() if self.setting('listing_index') else None
+        list_writer = None
+        if self.setting('split_output'):
+            data_dir = output_path.parent / 'job-data'
+            data_dir.mkdir(exist_ok=True)
+            list_writer = JsonExportWriter(output_path.with_name('jobs-list.json'), compact=True)
+            detail_files = SpillSort()
+            details_written = 0
 
-        output_data = {
-            "jobs": jobs,
-            "org_map": org_map,
-        }
-
-        with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump(output_data, f, ensure_ascii=False, indent=2)
+        try:
+            for job in jobs:
+                # Records are serialised once, here at the output boundary
+                data = job.to_json()
+                if snapshot is not None:
+                    snapshot.add(data)
+                for _, variant_filter, variant_writer, variant_listing in variants:
+                    if variant_filter(job):
+                        variant_writer.add(data)
+                        if variant_listing is not None:
+                            variant_listing.add(job)
+
+                if not job_filter(job):
+                    continue
+                export_writer.add(data)
+                if search_index is not None:
+                    search_index.add(job)
+                if listing_index is not None:
+                    listing_index.add(job)
+                if list_writer is not None:
+                    list_writer.add({key: value for key, value in data.items() if key not in self.DETAIL_FIELDS})
+                    file_name, written = self.write_job_details(data_dir, job)
+                    detail_files.add(file_name)
+                    details_written += written
+        except BaseException:
+            export_writer.abort()
+            if search_index is not None:
+                search_index.abort()
+            if list_writer is not None:
+                list_writer.abort()
+            for _, _, variant_writer, _ in variants:
+                variant_writer.abort()
+            raise
+
+        sections = dict(listing_index.to_json() if listing_index is not None else {}, generated_at=generated_at)
+
+        # Details first, then the list referencing them, then the full export
+        if list_writer is not None:
+            # Both sorted (on disk, when large) and compared in one pass
+            existing_files = SpillSort()
+            with os.scandir(data_dir) as entries:
+                for entry in entries:
+                    existing_files.add(entry.name)
+            removed_count = 0
+            for name in sorted_difference(existing_files, detail_files):
+                (data_dir / name).unlink()
+                removed_count += 1
+            self.publish_file(list_writer.finish(org_map, sections), output_path.with_name('jobs-list.json'))
+            print(
+                f"Wrote jobs-list.json ({list_writer.size} bytes) and job details in {data_dir}: "
+                f"{details_written} written, {list_writer.count - details_written} unchanged, {removed_count} removed"
+            )
+            self.metrics.set('job_details', details_written, result='written')
+            self.metrics.set('job_details', list_writer.count - details_written, result='unchanged')
+            self.metrics.set('job_details', removed_count, result='removed')
+        else:
+            removed = remove_published_file(output_path.with_name('jobs-list.json'))
+            if (output_path.parent / 'job-data').is_dir():
+                shutil.rmtree(output_path.parent / 'job-data')
+                removed = True
+            if removed:
+                print("Removed jobs-list.json and job-data/ (split_output is off)")
+
+        if search_index is not None:
+            self.write_search_index(search_index, generated_at)
+        elif remove_published_file(output_path.with_name('jobs-search-index.json')):
+            print("Removed jobs-search-index.json (search_index is off)")
+
+        for variant_path, _, variant_writer, variant_listing in variants:
+            variant_sections = dict(
+                variant_listing.to_json() if variant_listing is not None else {}, generated_at=generated_at
+            )
+            self.publish_file(variant_writer.finish(org_map, variant_sections), variant_path)
+            print(f"Wrote {variant_writer.count} jobs to {variant_path} ({variant_writer.size} bytes)")
+            self.metrics.set('exported_jobs', variant_writer.count, variant=variant_path.stem.split('.', 1)[1])
+
+        tmp_name = export_writer.finish(org_map, sections)
+        if self.setting('hashed_output'):
+            self.write_hashed_copy(output_path, tmp_name, export_writer.digest.hexdigest())
+        elif remove_published_file(output_path.with_name(f"{output_path.stem}.manifest.json")):
+            # Before the copies, so the app stops asking for them first
+            self.remove_hashed_copies(output_path)
+            print(f"Removed {output_path.stem}.manifest.json and the hashed copies (hashed_output is off)")
+        self.publish_file(tmp_name, output_path)
+
+        print(
+            f"Wrote {export_writer.count} jobs and {len(org_map)} org mappings to {self.output_file} "
+            f"({export_writer.size} bytes)"
+        )
+        self.metrics.set('output_bytes', export_writer.size)
+        self.metrics.set('exported_jobs', export_writer.count, variant='default')
+
+        # Last, so a list older than it is known to be stale
+        write_file_atomic(
+            output_path.with_name('jobs-generated.json'),
+            json.dumps({'generated_at': generated_at}).encode('utf-8'),
+        )
+        return export_writer.count
+
+    def write_job_details(self, data_dir, job):
+        """Write job-data/<slug>.json ({"id": ..., <DETAIL_FIELDS>}) if changed
+
+        Returns: (file_name, written)
+        """
+        file_name = f"{self.build_job_slug(job)}.json"
+        details = {'id': job.get('id')}
+        details.update((field, job.get(field)) for field in self.DETAIL_FIELDS)
+        data = json.dumps(details, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        return file_name, self.write_if_changed(data_dir / file_name, data)
+
+    def run_timestamp(self):
+        """UTC time the run started, written as "generated_at" by the files of the run"""
+        return datetime.fromtimestamp(self.metrics.started_at, timezone.utc).isoformat(timespec='milliseconds')
+
+    def write_search_index(self, search_index, generated_at=None):
+        """Publish the search index of a SearchIndexWriter next to the output file"""
+        index_path = Path(self.output_file).with_name('jobs-search-index.json')
+        self.publish_file(search_index.finish(generated_at), index_path)
+        print(
+            f"Wrote search index with {len(search_index.token_numbers)} tokens to {index_path} "
+            f"({search_index.size} bytes)"
+        )
+
+    def publish_file(self, tmp_name, path, chunk_size=1 << 20):
+        """Move a finished temp file into place, after its precompressed siblings
+
+        The .gz/.br siblings are written first (streamed from the temp file),
+        so they are never older than the file they belong to. Siblings that
+        are not written (precompress_output off, brotli not installed) are
+        removed, since the web server would serve a stale one in preference
+        to the file.
+        """
+        try:
+            written = set()
+            if self.setting('precompress_output'):
+                with open(tmp_name, 'rb') as src, open_atomic(f"{path}.gz") as dst:
+                    with gzip.GzipFile(filename='', mode='wb', fileobj=dst, compresslevel=9, mtime=0) as gz:
+                        shutil.copyfileobj(src, gz, chunk_size)
+                written.add('.gz')
+                if brotli is not None:
+                    with open(tmp_name, 'rb') as src, open_atomic(f"{path}.br") as dst:
+                        compressor = brotli.Compressor()
+                        for chunk in iter(lambda: src.read(chunk_size), b''):
+                            dst.write(compressor.process(chunk))
+                        dst.write(compressor.finish())
+                    written.add('.br')
+            for suffix in PRECOMPRESSED_SUFFIXES:
+                if suffix not in written:
+                    Path(f"{path}{suffix}").unlink(missing_ok=True)
+            replace_file(tmp_name, path)
+        except BaseException:
+            os.unlink(tmp_name)
+            raise
+
+    def write_hashed_copy(self, output_path, tmp_name, sha256):
+        """Write <stem>.<hash>.json (a copy of tmp_name) and a manifest naming it
+
+        Browsers can cache the hashed file forever; only the small manifest
+        needs revalidating. The previous hashed copy is kept for clients that
+        loaded the old manifest; older ones are removed.
+        """
+        hashed_path = output_path.with_name(f"{output_path.stem}.{sha256[:16]}{output_path.suffix}")
+        manifest_path = output_path.with_name(f"{output_path.stem}.manifest.json")
 
-        print(f"Wrote {len(jobs)} jobs and {len(org_map)} org mappings to {self.output_file}")
+        previous_name = None
+        try:
+            with open(manifest_path, 'r', encoding='utf-8') as f:
+                previous_name = json.load(f).get('file')
+        except (OSError, ValueError):
+            pass
+
+        if not hashed_path.exists():
+            fd, copy_name = make_temp_file(hashed_path)
+            os.close(fd)
+            shutil.copyfile(tmp_name, copy_name)
+            self.publish_file(copy_name, hashed_path)
+        write_file_atomic(manifest_path, json.dumps({'file': hashed_path.name, 'sha256': sha256}).encode('utf-8'))
+
+        self.remove_hashed_copies(output_path, keep={hashed_path.name, previous_name})
+
+    def remove_hashed_copies(self, output_path, keep=()):
+        """Remove the hashed copies of output_path not named in keep, with their siblings"""
+        # Matches hashed copies and their .gz/.br siblings; group 1 is the copy
+        pattern = re.compile(
+            rf'({re.escape(output_path.stem)}\.[0-9a-f]{{16}}{re.escape(output_path.suffix)})(\.gz|\.br)?$'
+        )
+        for path in output_path.parent.iterdir():
+            match = pattern.match(path.name)
+            if match and match.group(1) not in keep:
+                path.unlink()
 
     def build_job_slug(self, job):
-        """Build a URL-friendly slug from job name + id (mirrors JS buildJobSlug in App.vue)"""
-        name = (job.get('name', '') or '').lower()
-        for old, new in [('æ', 'ae'), ('ø', 'oe'), ('å', 'aa'), ('é', 'e')]:
-            name = name.replace(old, new)
-        name = re.sub(r'[\u2011\u2013\u2014]', '-', name)  # en/em-dash variants
-        name = re.sub(r'[^a-z0-9-]+', '-', name)
-        name = re.sub(r'-{2,}', '-', name)
-        name = name.strip('-')
-        job_id = job.get('id')
-        return f"{name}-{job_id}" if name else str(job_id)
+        """Build a URL-friendly slug from job name + id (mirrors JS buildJobSlug in App.vue)
+
+        Kept identical to the JS version by scripts/testdata/job-slugs.json.
+        """
+        return job_slug(slugify(job.get('name', '')), job.get('id'))
+
+    def build_job_slugs(self, jobs):
+        """build_job_slug() for a list of jobs, slugifying their names in one batch"""
+        name_slugs = slugify_many([job.get('name', '') for job in jobs])
+        return [job_slug(name_slug, job.get('id')) for name_slug, job in zip(name_slugs, jobs)]
 
     def strip_html_tags(self, text):
         """Strip HTML tags from text"""
-        return re.sub(r'<[^>]+>', '', text or '').strip()
+        return HTML_TAG_PATTERN.sub('', text or '').strip()
 
-    def generate_og_pages(self, jobs, output_dir):
+    def generate_og_pages(self, jobs, output_dir, stale_slugs=None):
         """Generate per-job OG HTML pages alongside index.html.
 
         Reads the deployed index.html from output_dir, injects per-job OG meta
         tags, and writes {output_dir}/job/{slug}/index.html for each job.
 
+        With stale_slugs=None, jobs is the full job list and any page not
+        belonging to it is removed. Otherwise jobs holds only new or changed
+        jobs, and just the pages in stale_slugs are removed.
+
+        Pages are rendered from a pre-parsed template on a thread pool and
+        only written when their bytes differ from what is on disk, so mtimes
+        (and CDN caches) of unchanged pages stay stable.
+
         Skips silently if index.html is not present (e.g. local dev where
         output_dir is public/ and no build has run).
+
+        Returns: {"written": n, "unchanged": n, "removed": n}, or None if skipped
         """
-        index_path = Path(output_dir) / 'index.html'
-        if not index_path.exists():
+        template = self.get_og_template(output_dir)
+        if template is None:
             print("Skipping OG page generation: index.html not found in output directory")
             return
 
-        base_html = index_path.read_text(encoding='utf-8')
+        job_dir = Path(output_dir) / 'job'
+        job_dir.mkdir(exist_ok=True)
 
-        # Use the title already baked into the deployed index.html
-        title_match = re.search(r'<title>([^<]*)</title>', base_html)
-        site_title = title_match.group(1) if title_match else 'Jobbank - Spejdernes Lejr 2026'
+        jobs = list(jobs)
 
-        site_url = os.getenv('SITE_URL', 'https://jobs.spejderneslejr.dk').rstrip('/')
-        og_image_url = f"{site_url}/og-jobbank.jpg"
+        def write_page(job, slug):
+            return self.write_og_page(template, job_dir, job, slug)
 
-        job_dir = Path(output_dir) / 'job'
-        job_dir.mkdir(exist_ok=True)
+        with ThreadPoolExecutor(max_workers=self.setting('og_page_workers')) as executor:
+            results = list(executor.map(write_page, jobs, self.build_job_slugs(jobs)))
 
-        generated_slugs = set()
+        generated_slugs = {slug for slug, _ in results}
+        written_count = sum(1 for _, written in results if written)
+        removed_count = self.remove_stale_og_pages(job_dir, generated_slugs, stale_slugs)
+        return self.report_og_pages(job_dir, written_count, len(results) - written_count, removed_count)
 
-        for job in jobs:
+    def write_og_page(self, template, job_dir, job, slug=None):
+        """Render a job's OG page and write it if changed
+
+        Returns: (slug, written)
+        """
+        if slug is None:
             slug = self.build_job_slug(job)
-            generated_slugs.add(slug)
+        page = template.render(job, slug, self.strip_html_tags(job.get('teaser', '')))
+        return slug, self.write_if_changed(job_dir / slug / 'index.html', page)
 
-            job_name = html_module.escape(job.get('name', ''))
-            teaser = html_module.escape(self.strip_html_tags(job.get('teaser', ''))[:300])
-            canonical_url = f"{site_url}/job/{slug}"
+    def remove_stale_og_pages(self, job_dir, generated_slugs, stale_slugs=None):
+        """Remove OG pages for jobs no longer in the export
 
-            # Replace <title> with job-specific title
-            page_html = re.sub(
-                r'<title>[^<]*</title>',
-                f'<title>{job_name} — {html_module.escape(site_title)}</title>',
-                base_html,
+        With stale_slugs=None every page not in generated_slugs is removed,
+        otherwise only the pages in stale_slugs. Returns the number removed.
+        """
+        if stale_slugs is None:
+            stale_dirs = [d for d in job_dir.iterdir() if d.name not in generated_slugs]
+        else:
+            stale_dirs = [job_dir / slug for slug in stale_slugs if slug not in generated_slugs]
+
+        removed_count = 0
+        for existing_dir in stale_dirs:
+            if existing_dir.is_dir():
+                shutil.rmtree(existing_dir)
+                removed_count += 1
+        return removed_count
+
+    def report_og_pages(self, job_dir, written_count, unchanged_count, removed_count):
+        print(
+            f"OG pages in {job_dir}: {written_count} written, "
+            f"{unchanged_count} unchanged, {removed_count} removed"
+        )
+        self.metrics.set('og_pages', written_count, result='written')
+        self.metrics.set('og_pages', unchanged_count, result='unchanged')
+        self.metrics.set('og_pages', removed_count, result='removed')
+        return {'written': written_count, 'unchanged': unchanged_count, 'removed': removed_count}
+
+    def export_jobs_streaming(self, job_export, org_map, previous_jobs, job_state, full_og, snapshot=None,
+                              last_jobs=None):
+        """Process a spooled job export as a generator pipeline
+
+        Job records are parsed one at a time from the spooled export,
+        resolved against the org index, given an OG page if new or changed
+        (every job with full_og), added to the sitemap and encoded into the
+        output files, so memory use does not grow with the size of the
+        export.
+        """
+        output_dir = Path(self.output_file).parent
+        job_dir = output_dir / 'job'
+        template = self.get_og_template(output_dir)
+        sitemap = self.new_sitemap(template)
+        og_filter = JOB_FILTERS[self.setting('og_pages_filter')]
+        og_slugs = set()
+        filtered_slugs = set()
+        og_counts = {'written': 0, 'unchanged': 0}
+        changed_count = 0
+
+        def with_og_pages(processed):
+            nonlocal changed_count
+            for job, changed in processed:
+                changed_count += changed
+                if template is None:
+                    pass
+                elif og_filter(job):
+                    entry = job_state[str(job.get('id'))]
+                    if changed or full_og:
+                        slug, written = self.write_og_page(template, job_dir, job, entry.slug)
+                        og_slugs.add(slug)
+                        og_counts['written' if written else 'unchanged'] += 1
+                    if sitemap is not None:
+                        sitemap.add(job, entry.slug, entry.lastmod(job))
+                elif changed or full_og:
+                    filtered_slugs.add(self.build_job_slug(job))
+                yield job
+
+        if template is not None:
+            job_dir.mkdir(exist_ok=True)
+
+        with open(job_export.path, 'rb') as f:
+            records = iter_json_array(f)
+            processed = self.iter_jobs_incremental(
+                records, previous_jobs, job_state, keep_records=False, last_jobs=last_jobs
             )
+            job_count = self.write_output(with_og_pages(processed), org_map, snapshot)
 
-            og_meta = (
-                f'  <meta property="og:type" content="website" />\n'
-                f'  <meta property="og:site_name" content="{html_module.escape(site_title)}" />\n'
-                f'  <meta property="og:title" content="{job_name}" />\n'
-                f'  <meta property="og:description" content="{teaser}" />\n'
-                f'  <meta property="og:url" content="{canonical_url}" />\n'
-                f'  <meta property="og:image" content="{og_image_url}" />\n'
-                f'  <meta name="twitter:card" content="summary_large_image" />\n'
-                f'  <meta name="twitter:title" content="{job_name}" />\n'
-                f'  <meta name="twitter:description" content="{teaser}" />\n'
-                f'  <meta name="description" content="{teaser}" />\n'
-            )
-            page_html = page_html.replace('</head>', og_meta + '</head>', 1)
+        stale_slugs = self.stale_slugs(previous_jobs, job_state)
+        self.report_jobs(job_count, changed_count, len(stale_slugs))
 
-            slug_dir = job_dir / slug
-            slug_dir.mkdir(exist_ok=True)
-            (slug_dir / 'index.html').write_text(page_html, encoding='utf-8')
+        if template is None:
+            print("Skipping OG page generation: index.html not found in output directory")
+            return
+        removed_count = self.remove_stale_og_pages(
+            job_dir, og_slugs, None if full_og else stale_slugs | filtered_slugs
+        )
+        self.report_og_pages(job_dir, og_counts['written'], og_counts['unchanged'], removed_count)
+        if sitemap is not None:
+            self.write_sitemaps(sitemap, output_dir)
+        else:
+            self.remove_sitemaps(output_dir)
+
+    def new_sitemap(self, template):
+        """A SitemapBuilder for the site of an OG template, or None if disabled"""
+        if template is None or not self.setting('sitemap'):
+            return None
+        return SitemapBuilder(template.site_url, template.escaped_site_title, self.setting('feed_size'))
 
-        print(f"Generated {len(generated_slugs)} OG pages in {job_dir}")
+    def write_sitemaps(self, sitemap, output_dir):
+        """Write sitemap.xml (or a sitemap index and its parts) and feed.xml
 
-        # Remove OG pages for jobs no longer in the export
-        stale_count = 0
-        for existing_dir in job_dir.iterdir():
-            if existing_dir.is_dir() and existing_dir.name not in generated_slugs:
-                shutil.rmtree(existing_dir)
-                stale_count += 1
-        if stale_count:
-            print(f"Cleaned up {stale_count} stale OG page(s)")
+        Each file is published atomically, with precompressed siblings, and
+        only when its content changed, so crawlers see an unchanged
+        Last-Modified when no job page changed.
+        """
+        output_dir = Path(output_dir)
+        files = []
+        written_count = 0
+        for name, data in sitemap.sitemaps():
+            files.append(name)
+            written_count += self.publish_if_changed(output_dir / name, data)
+        if sitemap.feed_size > 0:
+            files.append('feed.xml')
+            written_count += self.publish_if_changed(output_dir / 'feed.xml', sitemap.feed())
+
+        # Parts of an earlier, larger sitemap, and the feed with feed_size 0
+        for path in [*output_dir.glob('sitemap-*.xml'), output_dir / 'feed.xml']:
+            if path.name not in files:
+                remove_published_file(path)
+
+        print(f"Sitemap with {sitemap.url_count} job pages: {written_count} of {len(files)} files written")
+        self.metrics.set('sitemap_urls', sitemap.url_count)
+
+    def remove_sitemaps(self, output_dir):
+        """Remove the sitemap and feed of an earlier run (sitemap off, or no index.html)
+
+        Left in place, they would keep advertising pages of removed jobs.
+        """
+        output_dir = Path(output_dir)
+        paths = [output_dir / 'sitemap.xml', *output_dir.glob('sitemap-*.xml'), output_dir / 'feed.xml']
+        removed = [path.name for path in paths if remove_published_file(path)]
+        if removed:
+            print(f"Removed {', '.join(removed)} (no sitemap in this run)")
+
+    def publish_if_changed(self, path, data):
+        """Publish data at path unless it already holds exactly data; returns whether written
+
+        data is bytes or an iterable of bytes, which is written to a temp
+        file and compared with path by hash, so it is never held in memory
+        as a whole.
+        """
+        if isinstance(data, bytes):
+            data = [data]
+        fd, tmp_name = make_temp_file(path)
+        digest = hashlib.sha256()
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                for chunk in data:
+                    f.write(chunk)
+                    digest.update(chunk)
+            unchanged = path.exists() and file_hash(path) == digest.hexdigest()
+        except BaseException:
+            os.unlink(tmp_name)
+            raise
+        if unchanged:
+            os.unlink(tmp_name)
+            return False
+        self.publish_file(tmp_name, path)
+        return True
+
+    def get_og_template(self, output_dir):
+        """Return the OG page template for output_dir/index.html, or None
+
+        The template is only re-parsed when index.html or SITE_URL changes.
+        """
+        index_path = Path(output_dir) / 'index.html'
+        if not index_path.exists():
+            return None
+
+        base_html = index_path.read_text(encoding='utf-8')
+        site_url = os.getenv('SITE_URL', 'https://jobs.spejderneslejr.dk').rstrip('/')
+        template = self.og_template
+        if (
+            template is None
+            or template.site_url != site_url
+            or template.source_hash != content_hash(base_html.encode('utf-8'))
+        ):
+            template = self.og_template = OgPageTemplate(base_html, site_url)
+        return template
+
+    def write_if_changed(self, path, data):
+        """Write bytes to path unless it already holds exactly those bytes
+
+        Returns True if the file was written.
+        """
+        try:
+            if path.read_bytes() == data:
+                return False
+        except FileNotFoundError:
+            path.parent.mkdir(parents=True, exist_ok=True)
+        write_file_atomic(path, data)
+        return True
+
+    @contextmanager
+    def state_lock(self):
+        """Hold an exclusive lock on the state dir for the duration
+
+        Exports and rollbacks both rewrite the state and the output, so one
+        from another process (e.g. --rollback next to a --daemon) must not
+        run in between. Waits up to state_lock_timeout_seconds for the lock,
+        then exits with an error. Not locked without a state dir or fcntl.
+        """
+        if self.state_dir is None or fcntl is None:
+            yield
+            return
+        self.state_dir.mkdir(parents=True, exist_ok=True)
+        with open(self.state_dir / 'lock', 'a+') as lock_file:
+            deadline = time.monotonic() + self.setting('state_lock_timeout_seconds')
+            waiting = False
+            while True:
+                try:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    break
+                except BlockingIOError:
+                    if not waiting:
+                        print(f"Waiting for another export to release {self.state_dir}", flush=True)
+                        waiting = True
+                    if time.monotonic() >= deadline:
+                        lock_file.seek(0)
+                        print(f"Error: {self.state_dir} is locked by another export (pid {lock_file.read().strip() or '?'})")
+                        sys.exit(1)
+                    time.sleep(0.2)
+            lock_file.seek(0)
+            lock_file.truncate()
+            lock_file.write(str(os.getpid()))
+            lock_file.flush()
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
 
     def run(self):
-        """Main execution flow"""
+        """Main execution flow
+
+        Logs the run metrics (and writes the metrics textfile, if set)
+        however the run ends, including on sys.exit().
+        """
+        self.metrics = RunMetrics()
+        success = False
+        try:
+            self.export()
+            success = True
+        finally:
+            summary = self.metrics.finish(success, self.output_file)
+            if self.metrics_file:
+                self.metrics.write_textfile(self.metrics_file, summary)
+
+    def export(self):
+        """Fetch the exports and write every output file, holding the state lock"""
         print("=" * 60)
         print("CampOS Job Export Fetcher")
         print("=" * 60)
@@ -499,44 +3373,502 @@ class JobExportFetcher:
         # Load configuration
         self.load_config()
 
-        # Fetch organization data first (needed for hierarchy lookup)
-        print("\nFetching organization data...")
-        org_data = self.fetch_json(self.config['org_export_url'])
-        print(f"Fetched {len(org_data)} organizations")
+        with self.state_lock():
+            self._export()
+
+    def _export(self):
+        """export(), with the configuration loaded and the state lock held"""
+        output_dir = str(Path(self.output_file).parent)
+
+        streaming = self.setting('stream_jobs')
+        with self.metrics.stage('fetch') as fields:
+            org_raw, job_raw = self.fetch_exports(spool_jobs=streaming)
+            fields['bytes'] = len(org_raw) + (job_raw.size if streaming else len(job_raw))
+
+        if self.full:
+            state = {}
+        else:
+            state = self.current_state()
+        org_hash = content_hash(org_raw)
+        job_hash = job_raw.sha256 if streaming else content_hash(job_raw)
+        og_fingerprint = self.og_fingerprint(output_dir)
+        config_hash = job_content_hash(self.config)
+        # Same org export, resolved the same way
+        org_unchanged = (
+            state.get('org_export_hash') == org_hash
+            and state.get('org_index_version') == self.ORG_INDEX_VERSION
+        )
+
+        if (
+            org_unchanged
+            and state.get('job_export_hash') == job_hash
+            and state.get('og_fingerprint') == og_fingerprint
+            and state.get('config_hash') == config_hash
+            and Path(self.output_file).exists()
+        ):
+            print("\nExports unchanged since last run, nothing to do")
+            self.metrics.set('run_unchanged', 1)
+            return
+        self.metrics.set('run_unchanged', 0)
+
+        if self.org_index is not None and self.org_export_hash == org_hash:
+            # Org export unchanged since the last run of this process
+            print("Organization export unchanged, reusing the org index")
+            self.metrics.set('organizations', self.org_index.organizations)
+            self.report_org_issues(quiet=True)
+            org_map = self.org_map
+        else:
+            with self.metrics.stage('build_org_lookup') as fields:
+                # The index saved by an earlier run with this org export, if
+                # any; otherwise built (and validated) from the export
+                org_index = None if self.full else self.load_org_index(org_hash)
+                if org_index is not None:
+                    print(f"Organization export unchanged, loaded the org index from {self.org_index_file()}")
+                    self.org_index = org_index
+                    self.report_org_issues()
+                else:
+                    org_data = json.loads(org_raw.decode('utf-8'))
+                    print(f"Fetched {len(org_data)} organizations")
+                    self.build_org_lookup(org_data)
+                    self.save_org_index(org_hash)
+                self.metrics.set('organizations', self.org_index.organizations)
+                fields.update(organizations=self.org_index.organizations, cached=org_index is not None)
+
+                # Build org ID -> area name map (for ?organization=nnn URL support)
+                org_map = self.build_org_map()
+                self.org_export_hash, self.org_map = org_hash, org_map
+
+        # Cached job records are only valid against the same org export and
+        # ORG_INDEX_VERSION, since the hierarchy is resolved from them
+        previous_jobs = state.get('jobs', {}) if org_unchanged else {}
+
+        # OG pages: everything is regenerated when index.html, SITE_URL or
+        # the org export changed, otherwise only pages of changed jobs
+        full_og = not (previous_jobs and state.get('og_fingerprint') == og_fingerprint)
+
+        # Every job written is also recorded in the snapshot history
+        history = self.history()
+        snapshot = history.snapshot() if history is not None else None
+
+        if streaming:
+            # Processing, output and OG pages are one interleaved pass
+            with self.metrics.stage('export_jobs_streaming') as fields:
+                job_state = {}
+                self.export_jobs_streaming(
+                    job_raw, org_map, previous_jobs, job_state, full_og, snapshot, last_jobs=state.get('jobs', {})
+                )
+                fields['jobs'] = len(job_state)
+        else:
+            with self.metrics.stage('process_jobs') as fields:
+                job_data = json.loads(job_raw.decode('utf-8'))
+                print(f"Fetched {len(job_data)} jobs")
+
+                jobs, job_state, changed_jobs, stale_slugs = self.process_jobs_incremental(
+                    job_data, previous_jobs, last_jobs=state.get('jobs', {})
+                )
+                fields.update(jobs=len(jobs), changed=len(changed_jobs))
+
+            # Write output (and the search index and list/detail files)
+            with self.metrics.stage('write_output'):
+                self.write_output(jobs, org_map, snapshot)
+
+            # Generate per-job OG HTML pages (only when index.html is present)
+            # for the jobs passing og_pages_filter; a changed job that no
+            # longer passes it loses its page. The sitemap lists them all
+            with self.metrics.stage('generate_og_pages'):
+                og_filter = JOB_FILTERS[self.setting('og_pages_filter')]
+                og_jobs = [job for job in jobs if og_filter(job)]
+                if full_og:
+                    self.generate_og_pages(og_jobs, output_dir)
+                else:
+                    stale_slugs |= set(self.build_job_slugs([job for job in changed_jobs if not og_filter(job)]))
+                    self.generate_og_pages(
+                        [job for job in changed_jobs if og_filter(job)], output_dir, stale_slugs
+                    )
+
+                sitemap = self.new_sitemap(self.get_og_template(output_dir))
+                if sitemap is not None:
+                    for job in og_jobs:
+                        entry = job_state[str(job.get('id'))]
+                        sitemap.add(job, entry.slug, entry.lastmod(job))
+                    self.write_sitemaps(sitemap, output_dir)
+                else:
+                    self.remove_sitemaps(output_dir)
+
+        if snapshot is not None:
+            self.commit_snapshot(
+                snapshot, org_map, job_export_hash=job_hash, org_export_hash=org_hash,
+                generated_at=self.run_timestamp(),
+            )
 
-        # Build organization lookup
-        self.build_org_lookup(org_data)
+        with self.metrics.stage('save_state'):
+            self.save_state({
+                'version': self.STATE_VERSION,
+                'org_export_hash': org_hash,
+                'org_index_version': self.ORG_INDEX_VERSION,
+                'job_export_hash': job_hash,
+                'og_fingerprint': og_fingerprint,
+                'config_hash': config_hash,
+                'jobs': job_state,
+            })
 
-        # Build org ID -> area name map (for ?organization=nnn URL support)
-        org_map = self.build_org_map()
+        print("\n" + "=" * 60)
+        print("Export complete!")
+        print("=" * 60)
 
-        # Fetch job data
-        print("\nFetching job data...")
-        job_data = self.fetch_json(self.config['job_export_url'])
-        print(f"Fetched {len(job_data)} jobs")
+    def open_history(self):
+        """The snapshot history for the --history/--diff/--rollback commands"""
+        history = self.history()
+        if history is None or not history.runs():
+            print("No snapshot history (history_size is 0, or no run has been recorded yet)")
+            sys.exit(1)
+        return history
 
-        # Process jobs
-        jobs = self.process_jobs(job_data)
+    def resolve_run(self, history, run):
+        """A run number from the command line; 0 is the latest run, -1 the one before, ..."""
+        runs = history.runs()
+        try:
+            run = int(run)
+            if run <= 0:
+                run = runs[run - 1]
+        except (ValueError, IndexError):
+            run = None
+        if run not in runs:
+            print(f"Unknown run: available runs are {', '.join(map(str, runs))}")
+            sys.exit(1)
+        return run
 
-        # Write output
-        self.write_output(jobs, org_map)
+    def print_history(self):
+        """List the recorded runs (--history)"""
+        self.load_config()
+        history = self.open_history()
+        rolled_back_to = self.load_state().get('rolled_back_to')
+        for run in history.runs():
+            manifest = history.manifest(run)
+            marker = '  (published by --rollback)' if run == rolled_back_to else ''
+            print(f"{run:>6}  {manifest['created_at']}  {len(manifest['jobs']):>6} jobs{marker}")
 
-        # Generate per-job OG HTML pages (only when index.html is present)
-        self.generate_og_pages(jobs, str(Path(self.output_file).parent))
+    def print_diff(self, old_run=-1, new_run=0):
+        """List the jobs added, removed and changed between two runs (--diff)
 
-        print("\n" + "=" * 60)
-        print("Export complete!")
-        print("=" * 60)
+        By default the latest run is compared with the one before it.
+        """
+        self.load_config()
+        history = self.open_history()
+        old_run = self.resolve_run(history, old_run)
+        new_run = self.resolve_run(history, new_run)
+        changes = history.diff(old_run, new_run)
+        print(
+            f"Run {old_run} -> {new_run}: {len(changes['added'])} added, "
+            f"{len(changes['removed'])} removed, {len(changes['changed'])} changed"
+        )
+        for job in changes['added']:
+            print(f"+ {job['id']:>6}  {job['name']}")
+        for job in changes['removed']:
+            print(f"- {job['id']:>6}  {job['name']}")
+        for old_job, new_job, fields in changes['changed']:
+            print(f"~ {new_job['id']:>6}  {new_job['name']}  ({', '.join(fields)})")
+        return changes
+
+    def rollback(self, run):
+        """Republish the jobs of a recorded run (--rollback)
+
+        Every output file (export, variants, list, details, search index, OG
+        pages) is rebuilt from the snapshot with the current settings and
+        published atomically, file by file, as in a normal run, with the
+        run's generated_at. The state keeps the hashes of the current CampOS
+        exports (those of the latest run when there is no state), so later
+        runs leave the rollback in place until CampOS serves a different
+        export; its job records are dropped, so that run reprocesses every
+        job. Holds the state lock, so it never interleaves
+        with a run of a daemon.
+        """
+        self.load_config()
+        with self.state_lock():
+            history = self.open_history()
+            run = self.resolve_run(history, run)
+            manifest = history.manifest(run)
+            print(f"Rolling back to run {run} from {manifest['created_at']} ({len(manifest['jobs'])} jobs)")
+
+            # A throwaway index just for interning the snapshot's hierarchies
+            org_index = OrgTreeIndex([], self.clean_org_name)
+            jobs = [
+                JobRecord.from_json(history.load_object(object_hash), org_index)
+                for _, object_hash in manifest['jobs']
+            ]
+            # As published by the run (older runs did not record generated_at)
+            self.write_output(jobs, history.load_object(manifest['org_map']), generated_at=manifest.get('generated_at'))
+
+            output_dir = Path(self.output_file).parent
+            og_filter = JOB_FILTERS[self.setting('og_pages_filter')]
+            og_jobs = [job for job in jobs if og_filter(job)]
+            self.generate_og_pages(og_jobs, str(output_dir))
+
+            # The run's modification dates are not in the history: jobs are
+            # listed as last modified when created, or now
+            sitemap = self.new_sitemap(self.get_og_template(output_dir))
+            if sitemap is not None:
+                now = w3c_datetime(datetime.now(timezone.utc).isoformat())
+                for job, slug in zip(og_jobs, self.build_job_slugs(og_jobs)):
+                    sitemap.add(job, slug, w3c_datetime(job.create_date) or now)
+                self.write_sitemaps(sitemap, output_dir)
+            else:
+                self.remove_sitemaps(output_dir)
+
+            state = self.load_state()
+            if not state:
+                # No state (first deploy, or wiped): record the exports of
+                # the latest run as current, as its run would have
+                latest = history.manifest(history.runs()[-1])
+                state = {
+                    'version': self.STATE_VERSION,
+                    'org_export_hash': latest.get('org_export_hash'),
+                    'org_index_version': self.ORG_INDEX_VERSION,
+                    'job_export_hash': latest.get('job_export_hash'),
+                    'og_fingerprint': self.og_fingerprint(str(output_dir)),
+                    'config_hash': job_content_hash(self.config),
+                }
+            self.save_state(dict(state, jobs={}, rolled_back_to=run))
+
+
+def prepare_spawned_batches(config, org_index_json, batches, results):
+    """Spawned worker process of JobExportFetcher.prepare_jobs
+
+    Builds a fetcher with the run's config and org index (from its
+    to_json()), then prepares the (batch number, jobs) batches it is sent.
+    """
+    fetcher = JobExportFetcher(None, None)
+    fetcher.config = config
+    fetcher.org_index = OrgTreeIndex.from_json(org_index_json, fetcher.clean_org_name)
+    fetcher._prepare_batches(None, batches, results)
+
+
+class TriggerHandler(BaseHTTPRequestHandler):
+    """HTTP endpoint of the export daemon
+
+    POST /refresh  trigger a run (202 Accepted)
+    GET /status    the daemon's state as JSON
+    """
+
+    def send_json(self, status, data):
+        body = json.dumps(data).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def authorized(self):
+        token = self.server.export_daemon.fetcher.setting('trigger_token')
+        if not token:
+            return True
+        # Compared as bytes: compare_digest refuses str with non-ASCII
+        # characters, and header values arrive decoded as Latin-1
+        return hmac.compare_digest(
+            self.headers.get('Authorization', '').encode('latin-1'), f"Bearer {token}".encode('utf-8')
+        )
+
+    def do_POST(self):
+        if self.path.split('?')[0] != '/refresh':
+            self.send_json(404, {'error': 'not found'})
+        elif not self.authorized():
+            self.send_json(401, {'error': 'unauthorized'})
+        else:
+            self.send_json(202, {'status': self.server.export_daemon.trigger()})
+
+    def do_GET(self):
+        if self.path.split('?')[0] != '/status':
+            self.send_json(404, {'error': 'not found'})
+        elif not self.authorized():
+            self.send_json(401, {'error': 'unauthorized'})
+        else:
+            self.send_json(200, self.server.export_daemon.status())
+
+    def log_message(self, format, *args):
+        print(f"Trigger endpoint: {self.address_string()} {format % args}", flush=True)
+
+
+class ExportDaemon:
+    """Run the export repeatedly in one long-lived process (--daemon)
+
+    The fetcher is kept between runs, and with it the org index, OG page
+    template and run state, so a run where CampOS answers 304 Not Modified
+    (or both exports are unchanged) does no further work. Runs are spaced
+    by daemon_interval_seconds plus up to +/- daemon_jitter_seconds.
+
+    trigger() (POST /refresh on the trigger endpoint) brings the next run
+    forward. Triggers are debounced: the run starts once they have been
+    quiet for trigger_debounce_seconds, or trigger_max_delay_seconds after
+    the first one. Runs only ever happen on the daemon's own thread, so a
+    trigger during a run never starts a second one; it queues a single
+    follow-up run instead.
+
+    stop() (the SIGTERM/SIGINT handler) lets a run in progress finish, since
+    its output files are replaced atomically anyway, and ends the loop.
+    """
+
+    def __init__(self, fetcher, rng=None):
+        self.fetcher = fetcher
+        fetcher.daemon = True
+        self.rng = rng or random.Random()
+        self.stopping = threading.Event()
+        # Guards the trigger state below; an RLock, so stop() is safe to
+        # call from a signal handler interrupting the daemon thread
+        self.condition = threading.Condition(threading.RLock())
+        self.first_trigger = None
+        self.last_trigger = None
+        self.running = False
+        self.runs = 0
+        self.last_summary = None
+        self.trigger_server = None
+
+    def next_delay(self):
+        """Seconds until the next scheduled run"""
+        interval = self.fetcher.setting('daemon_interval_seconds')
+        jitter = self.fetcher.setting('daemon_jitter_seconds')
+        return max(0.0, interval + self.rng.uniform(-jitter, jitter))
+
+    def trigger(self):
+        """Request a run soon; returns 'scheduled', or 'queued' during a run"""
+        with self.condition:
+            now = time.monotonic()
+            if self.first_trigger is None:
+                self.first_trigger = now
+            self.last_trigger = now
+            self.condition.notify_all()
+            return 'queued' if self.running else 'scheduled'
+
+    def status(self):
+        with self.condition:
+            return {
+                'running': self.running,
+                'pending': self.first_trigger is not None,
+                'runs': self.runs,
+                'last_run': self.last_summary,
+            }
+
+    def wait_for_next_run(self, delay):
+        """Wait for the scheduled run or a debounced trigger
+
+        Returns False when stopped while waiting.
+        """
+        deadline = time.monotonic() + delay
+        with self.condition:
+            while not self.stopping.is_set():
+                due = deadline
+                if self.first_trigger is not None:
+                    due = min(
+                        due,
+                        self.last_trigger + self.fetcher.setting('trigger_debounce_seconds'),
+                        self.first_trigger + self.fetcher.setting('trigger_max_delay_seconds'),
+                    )
+                now = time.monotonic()
+                if now >= due:
+                    return True
+                self.condition.wait(due - now)
+            return False
+
+    def run_once(self):
+        """Run the export once; a failed run is logged, not raised"""
+        with self.condition:
+            self.running = True
+            # This run covers every trigger received so far
+            self.first_trigger = self.last_trigger = None
+        try:
+            self.fetcher.run()
+        except SystemExit as e:
+            # Fetch and config errors exit in one-shot mode
+            print(f"Export run failed (exit code {e.code}), retrying at the next run")
+        except Exception:
+            traceback.print_exc()
+            print("Export run failed, retrying at the next run")
+        finally:
+            with self.condition:
+                self.running = False
+                self.runs += 1
+                self.last_summary = self.fetcher.metrics.summary
+            # Only the first run honours --full
+            self.fetcher.full = False
+
+    def start_trigger_server(self):
+        """Serve the trigger endpoint on a background thread, if configured"""
+        if self.fetcher.config is None:
+            self.fetcher.load_config()
+        port = self.fetcher.setting('trigger_port')
+        if port is None:
+            return None
+        self.trigger_server = ThreadingHTTPServer((self.fetcher.setting('trigger_host'), port), TriggerHandler)
+        self.trigger_server.export_daemon = self
+        threading.Thread(target=self.trigger_server.serve_forever, daemon=True).start()
+        host, port = self.trigger_server.server_address[:2]
+        print(f"Trigger endpoint listening on http://{host}:{port}/refresh", flush=True)
+        return self.trigger_server
+
+    def run(self):
+        """Run the export until stop() is called"""
+        print(f"Starting export daemon (pid {os.getpid()})")
+        self.start_trigger_server()
+        try:
+            while True:
+                self.run_once()
+                if self.stopping.is_set():
+                    break
+                delay = self.next_delay()
+                print(f"Next run in {delay:.0f}s, or on trigger", flush=True)
+                if not self.wait_for_next_run(delay):
+                    break
+        finally:
+            if self.trigger_server is not None:
+                self.trigger_server.shutdown()
+                self.trigger_server.server_close()
+        print(f"Export daemon stopped after {self.runs} runs", flush=True)
+
+    def stop(self, signum=None, frame=None):
+        """Stop after the current run (usable as a signal handler)"""
+        with self.condition:
+            self.stopping.set()
+            self.condition.notify_all()
 
 
 def main():
     """Main entry point"""
+    parser = argparse.ArgumentParser(description="Fetch the CampOS job export and generate jobs-export.json")
+    parser.add_argument(
+        '--full', action='store_true',
+        help="ignore the state of the last run and reprocess every job",
+    )
+    parser.add_argument(
+        '--daemon', action='store_true',
+        help="keep running, re-fetching every daemon_interval_seconds, until SIGTERM",
+    )
+    parser.add_argument(
+        '--config', type=Path,
+        help="path to config.json (default: config.json next to this script)",
+    )
+    history_commands = parser.add_mutually_exclusive_group()
+    history_commands.add_argument(
+        '--history', action='store_true',
+        help="list the runs in the snapshot history",
+    )
+    history_commands.add_argument(
+        '--diff', nargs='*', metavar='RUN',
+        help="list jobs added, removed and changed between two runs "
+             "(default: the one before the latest, -1, and the latest, 0)",
+    )
+    history_commands.add_argument(
+        '--rollback', metavar='RUN',
+        help="republish the jobs of a run from the snapshot history",
+    )
+    args = parser.parse_args()
+    if args.diff is not None and len(args.diff) > 2:
+        parser.error("--diff takes at most two runs")
+
     # Get the script directory
     script_dir = Path(__file__).parent
     project_root = script_dir.parent
 
     # File paths
-    config_file = script_dir / 'config.json'
+    config_file = args.config or script_dir / 'config.json'
 
     # Check for OUTPUT_DIR environment variable (for Docker)
     output_dir = os.getenv('OUTPUT_DIR')
@@ -547,8 +3879,23 @@ def main():
         output_file = project_root / 'public' / 'jobs-export.json'
 
     # Create processor and run
-    processor = JobExportFetcher(config_file, output_file)
-    processor.run()
+    processor = JobExportFetcher(
+        config_file, output_file, state_dir=os.getenv('STATE_DIR'), full=args.full,
+        metrics_file=os.getenv('METRICS_FILE'),
+    )
+    if args.history:
+        processor.print_history()
+    elif args.diff is not None:
+        processor.print_diff(*args.diff)
+    elif args.rollback is not None:
+        processor.rollback(args.rollback)
+    elif args.daemon:
+        daemon = ExportDaemon(processor)
+        signal.signal(signal.SIGTERM, daemon.stop)
+        signal.signal(signal.SIGINT, daemon.stop)
+        daemon.run()
+    else:
+        processor.run()
 
 
 if __name__ == '__main__':
@@ -0,0 +1,1570 @@
+"""
+Tests for fetch-job-export.py
+
+Run with:
+    python3 -m unittest discover -s scripts -p '*_test.py'
+"""
+
+import gzip
+import http.client
+import importlib.util
+import io
+import json
+import multiprocessing
+import os
+import random
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from contextlib import redirect_stdout
+from pathlib import Path
+from unittest import mock
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+from xml.etree import ElementTree
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+def load_fetcher_module():
+    """Import fetch-job-export.py (hyphenated, so not importable by name)"""
+    # Loaded once and registered by name, so the job records sent back by
+    # process workers unpickle as this module's classes
+    if 'fetch_job_export' in sys.modules:
+        return sys.modules['fetch_job_export']
+    script_path = Path(__file__).parent / 'fetch-job-export.py'
+    spec = importlib.util.spec_from_file_location('fetch_job_export', script_path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def load_stand_in_module():
+    """Import campos-stand-in.py (hyphenated, so not importable by name)"""
+    script_path = Path(__file__).parent / 'campos-stand-in.py'
+    spec = importlib.util.spec_from_file_location('campos_stand_in', script_path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+fetch_job_export = load_fetcher_module()
+campos_stand_in = load_stand_in_module()
+
+ORGS = [
+    {'name': 'Spejderne', 'parent_path': '1/'},
+    {'name': '0002 - Spejdernes Lejr 2026', 'parent_path': '1/2/'},
+    {'name': '5500 - Lejrplads & Lejrliv (LEJ)', 'parent_path': '1/2/6/'},
+    {'name': '5590 - Handel, mad & Indkøb', 'parent_path': '1/2/6/55/'},
+    {'name': '5598 - Voksenområde', 'parent_path': '1/2/6/55/131/'},
+    {'name': '55982 - Bar 2', 'parent_path': '1/2/6/55/131/456/'},
+    {'name': '5532 - Havet', 'parent_path': '1/2/9/'},
+    {'name': '5533 - Orphan', 'parent_path': '1/2/9/77/78/'},
+]
+
+
+def make_fetcher(orgs=ORGS):
+    fetcher = fetch_job_export.JobExportFetcher(None, None)
+    with redirect_stdout(io.StringIO()):
+        fetcher.build_org_lookup(orgs)
+    return fetcher
+
+
+class OrgHierarchyTest(unittest.TestCase):
+    def test_workgroup_resolves_full_ancestry(self):
+        hierarchy = make_fetcher().get_org_hierarchy_for_job('55982 - Bar 2')
+        self.assertEqual(hierarchy['area'], 'Lejrplads & Lejrliv (LEJ)')
+        self.assertEqual(hierarchy['committee'], 'Handel, mad & Indkøb')
+        self.assertEqual(hierarchy['team'], 'Voksenområde')
+        self.assertEqual(hierarchy['workgroup'], 'Bar 2')
+        self.assertEqual(hierarchy['workgroup_full'], '55982 - Bar 2')
+        self.assertEqual(
+            hierarchy['full_path'],
+            ['Lejrplads & Lejrliv (LEJ)', 'Handel, mad & Indkøb', 'Voksenområde', 'Bar 2'],
+        )
+
+    def test_camp_level_org(self):
+        hierarchy = make_fetcher().get_org_hierarchy_for_job('0002 - Spejdernes Lejr 2026')
+        self.assertEqual(hierarchy['area'], 'Spejdernes Lejr 2026')
+        self.assertEqual(hierarchy['area_full'], '0002 - Spejdernes Lejr 2026')
+        self.assertIsNone(hierarchy['committee'])
+
+    def test_overrides_applied_to_ancestors(self):
+        hierarchy = make_fetcher().get_org_hierarchy_for_job('5533 - Orphan')
+        self.assertEqual(hierarchy['area'], 'Havet (underlejr)')
+        # Missing ancestors fall back to an ID placeholder
+        self.assertEqual(hierarchy['committee'], 'ID-77')
+
+    def test_unknown_org(self):
+        hierarchy = make_fetcher().get_org_hierarchy_for_job('9999 - Nowhere')
+        self.assertEqual(hierarchy['area'], 'Unknown')
+        self.assertEqual(hierarchy['full_path'], ['9999 - Nowhere'])
+
+    def test_jobs_of_an_organization_share_one_hierarchy(self):
+        fetcher = make_fetcher()
+        jobs = fetcher.process_jobs([
+            {'id': 1, 'organization_id': '55982 - Bar 2'},
+            {'id': 2, 'organization_id': '55982 - Bar 2'},
+            {'id': 3, 'organization_id': '9999 - Nowhere'},
+            {'id': 4, 'organization_id': '9999 - Nowhere'},
+        ])
+        self.assertIs(jobs[0].org_hierarchy, jobs[1].org_hierarchy)
+        self.assertIs(jobs[2].org_hierarchy, jobs[3].org_hierarchy)
+        self.assertEqual(list(jobs[0].to_json()['org_hierarchy']), list(fetch_job_export.OrgHierarchy.FIELDS))
+        with self.assertRaises(AttributeError):
+            jobs[0].extra = 1
+
+    def test_index_is_keyed_by_numeric_id(self):
+        index = make_fetcher().get_org_index()
+        self.assertEqual(index.nodes[131].name, '5598 - Voksenområde')
+        self.assertEqual(index.nodes[456].ancestor_ids, [1, 2, 6, 55, 131])
+        self.assertEqual(index.ids_by_name['55982 - Bar 2'], 456)
+
+    def test_org_export_is_validated(self):
+        fetcher = make_fetcher(ORGS + [
+            {'name': '5590 - Handel, mad & Indkøb', 'parent_path': '1/2/6/57/'},
+            {'name': 'Ingen sti', 'parent_path': None},
+            {'name': 'Ugyldig', 'parent_path': '1/2/x/'},
+            {'name': 'Ring', 'parent_path': '1/2/6/2/'},
+            {'name': 'Flyttet', 'parent_path': '1/2/9/55/300/'},
+            {'parent_path': '1/2/301/'},
+        ])
+        index = fetcher.get_org_index()
+        self.assertEqual(index.issue_counts, {
+            'duplicate_name': 1, 'malformed_path': 2, 'cycle': 1, 'missing_name': 1,
+            'dangling_parent': 1, 'path_mismatch': 1,
+        })
+        self.assertEqual(index.issues['dangling_parent'], ["'5533 - Orphan': 77 not in the export"])
+        self.assertEqual(fetcher.get_org_hierarchy_for_job('Ring')['area'], 'Unknown')
+        # The later entry wins the name, but the earlier one still names its
+        # descendants, instead of an ID-<n> placeholder
+        self.assertEqual(fetcher.get_org_hierarchy_for_job('5590 - Handel, mad & Indkøb')['committee_full'],
+                         '5590 - Handel, mad & Indkøb')
+        self.assertEqual(fetcher.get_org_hierarchy_for_job('55982 - Bar 2')['committee'], 'Handel, mad & Indkøb')
+
+    def test_index_json_round_trip(self):
+        fetcher = make_fetcher()
+        index = fetcher.get_org_index()
+        restored = fetch_job_export.OrgTreeIndex.from_json(
+            json.loads(json.dumps(index.to_json())), fetcher.clean_org_name
+        )
+        for org in ORGS:
+            original = index.hierarchy_for(org['name'])
+            self.assertEqual(restored.hierarchy_for(org['name']).key(), original.key())
+            self.assertEqual(restored.hierarchy_for(org['name']).full_path, original.full_path)
+        self.assertEqual(restored.area_names, index.area_names)
+        self.assertEqual(restored.issue_counts, {'dangling_parent': 1})
+
+    def test_org_map_points_every_descendant_at_its_area(self):
+        fetcher = make_fetcher()
+        with redirect_stdout(io.StringIO()):
+            org_map = fetcher.build_org_map()
+        self.assertEqual(org_map['6'], 'Lejrplads & Lejrliv (LEJ)')
+        self.assertEqual(org_map['456'], 'Lejrplads & Lejrliv (LEJ)')
+        self.assertEqual(org_map['78'], 'Havet (underlejr)')
+        self.assertNotIn('2', org_map)
+
+    def test_clean_org_name(self):
+        fetcher = make_fetcher()
+        self.assertEqual(fetcher.clean_org_name('5532 - Havet'), ('5532', 'Havet (underlejr)'))
+        self.assertEqual(fetcher.clean_org_name('0050 Korpsansatte'), ('0050', 'Korpsansatte'))
+        self.assertEqual(fetcher.clean_org_name('GRAS'), (None, 'GRAS'))
+
+
+class SlugTest(unittest.TestCase):
+    # Shared with src/App.buildJobSlug.test.js, so both implementations are
+    # held to the same slugs and existing /job/<slug> links keep working
+    CORPUS = json.loads((Path(__file__).parent / 'testdata' / 'job-slugs.json').read_text(encoding='utf-8'))
+
+    def test_slugs_match_golden_corpus(self):
+        fetcher = fetch_job_export.JobExportFetcher(None, None)
+        for entry in self.CORPUS:
+            with self.subTest(name=entry['name']):
+                self.assertEqual(fetcher.build_job_slug(entry), entry['slug'])
+
+    def test_batch_matches_single_slugs(self):
+        fetcher = fetch_job_export.JobExportFetcher(None, None)
+        self.assertEqual(fetcher.build_job_slugs(self.CORPUS), [entry['slug'] for entry in self.CORPUS])
+        self.assertEqual(fetcher.build_job_slugs([]), [])
+        # A NUL in a name falls back to slugifying one by one
+        jobs = [{'id': 1, 'name': 'a\0b'}, {'id': 2, 'name': 'Øl'}]
+        self.assertEqual(fetcher.build_job_slugs(jobs), ['a-b-1', 'oel-2'])
+
+
+JOBS = [
+    {'id': 1, 'name': 'Barchef', 'teaser': 'Styr baren', 'organization_id': '55982 - Bar 2'},
+    {'id': 2, 'name': 'Kok', 'teaser': 'Lav mad', 'organization_id': '5590 - Handel, mad & Indkøb'},
+]
+
+INDEX_HTML = '<html><head><title>Jobbank</title></head><body></body></html>'
+
+
+class ExportRunTest(unittest.TestCase):
+    """Runs the exporter against in-memory exports in a temp output dir"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.output_dir = Path(self.tmp.name)
+        (self.output_dir / 'index.html').write_text(INDEX_HTML, encoding='utf-8')
+        self.config_file = self.output_dir / 'config.json'
+        self.settings = {}
+        self.exports = {
+            'http://campos.test/jobs': JOBS,
+            'http://campos.test/orgs': ORGS,
+        }
+
+    def make_export_fetcher(self, **kwargs):
+        self.config_file.write_text(json.dumps(dict(
+            self.settings,
+            job_export_url='http://campos.test/jobs',
+            org_export_url='http://campos.test/orgs',
+        )))
+        fetcher = fetch_job_export.JobExportFetcher(
+            self.config_file, self.output_dir / 'jobs-export.json', **kwargs
+        )
+        fetcher.fetch_bytes = lambda url, spool=False: self.fake_fetch_bytes(url, spool)
+        return fetcher
+
+    def run_export(self, **kwargs):
+        fetcher = self.make_export_fetcher(**kwargs)
+        fetcher.process_job_calls = []
+        process_job = fetcher.process_job
+
+        def counting_process_job(job, *args):
+            fetcher.process_job_calls.append(job['id'])
+            return process_job(job, *args)
+
+        fetcher.process_job = counting_process_job
+        self.stdout = io.StringIO()
+        with redirect_stdout(self.stdout):
+            fetcher.run()
+        return fetcher
+
+    def fake_fetch_bytes(self, url, spool=False):
+        body = json.dumps(self.exports[url]).encode('utf-8')
+        if not spool:
+            return body
+        path = self.output_dir / f"spooled-{fetch_job_export.content_hash(url.encode())}"
+        path.write_bytes(body)
+        return fetch_job_export.SpooledBody(path, fetch_job_export.content_hash(body), len(body))
+
+    def read_output(self):
+        return json.loads((self.output_dir / 'jobs-export.json').read_text(encoding='utf-8'))
+
+
+class IncrementalExportTest(ExportRunTest):
+    def test_unchanged_exports_short_circuit(self):
+        self.run_export()
+        output_mtime = (self.output_dir / 'jobs-export.json').stat().st_mtime_ns
+
+        fetcher = self.run_export()
+        self.assertEqual(fetcher.process_job_calls, [])
+        self.assertEqual((self.output_dir / 'jobs-export.json').stat().st_mtime_ns, output_mtime)
+
+    def test_only_changed_jobs_are_reprocessed(self):
+        self.run_export()
+        self.exports['http://campos.test/jobs'] = [
+            JOBS[0],
+            dict(JOBS[1], name='Køkkenchef'),
+            {'id': 3, 'name': 'Vagt', 'organization_id': '5532 - Havet'},
+        ]
+
+        fetcher = self.run_export()
+        self.assertEqual(fetcher.process_job_calls, [2, 3])
+        self.assertEqual([job['name'] for job in self.read_output()['jobs']], ['Barchef', 'Køkkenchef', 'Vagt'])
+
+        job_dir = self.output_dir / 'job'
+        self.assertEqual(
+            sorted(path.name for path in job_dir.iterdir()),
+            ['barchef-1', 'koekkenchef-2', 'vagt-3'],
+        )
+
+    def test_cached_records_are_restored_from_state(self):
+        self.run_export()
+        output = self.read_output()
+        self.exports['http://campos.test/jobs'] = [JOBS[0], dict(JOBS[1], name='Køkkenchef')]
+
+        fetcher = self.run_export()
+        self.assertEqual(fetcher.process_job_calls, [2])
+        self.assertEqual(self.read_output()['jobs'][0], output['jobs'][0])
+        records = [entry.record for entry in fetcher.state['jobs'].values()]
+        self.assertTrue(all(isinstance(record, fetch_job_export.JobRecord) for record in records))
+        # The restored record shares the hierarchy resolved from the org export
+        index = fetcher.get_org_index()
+        self.assertIs(records[0].org_hierarchy, index.hierarchy_for('55982 - Bar 2'))
+
+    def test_org_index_is_reused_while_org_export_is_unchanged(self):
+        self.run_export()
+        self.assertTrue((self.output_dir / '.export-state' / 'org-index.json').exists())
+        self.exports['http://campos.test/jobs'] = [JOBS[0], dict(JOBS[1], name='Køkkenchef')]
+
+        fetcher = self.make_export_fetcher()
+        fetcher.build_org_lookup = mock.Mock(side_effect=AssertionError("org index rebuilt"))
+        with redirect_stdout(io.StringIO()):
+            fetcher.run()
+        self.assertEqual(self.read_output()['jobs'][1]['org_hierarchy']['area'], 'Lejrplads & Lejrliv (LEJ)')
+
+        self.exports['http://campos.test/orgs'] = ORGS + [{'name': 'Ny', 'parent_path': '1/2/99/'}]
+        fetcher = self.run_export()
+        self.assertEqual(fetcher.get_org_index().hierarchy_for('Ny')['area'], 'Ny')
+
+    def test_org_export_change_reprocesses_everything(self):
+        self.run_export()
+        self.exports['http://campos.test/orgs'] = ORGS + [{'name': 'Ny', 'parent_path': '1/2/99/'}]
+
+        fetcher = self.run_export()
+        self.assertEqual(fetcher.process_job_calls, [1, 2])
+
+    def test_org_index_version_bump_reprocesses_everything(self):
+        self.exports['http://campos.test/jobs'] = [JOBS[0], {'id': 3, 'name': 'Vagt', 'organization_id': '5532 - Havet'}]
+        self.run_export()
+        self.exports['http://campos.test/jobs'].append({'id': 4, 'name': 'Bager', 'organization_id': '5532 - Havet'})
+
+        overrides = dict(fetch_job_export.JobExportFetcher.ORG_NAME_OVERRIDES, Havet='Havet (ny)')
+        with mock.patch.object(fetch_job_export.JobExportFetcher, 'ORG_NAME_OVERRIDES', overrides), \
+                mock.patch.object(fetch_job_export.JobExportFetcher, 'ORG_INDEX_VERSION', 2):
+            fetcher = self.run_export()
+        self.assertEqual(fetcher.process_job_calls, [1, 3, 4])
+        self.assertEqual(
+            [job['org_hierarchy']['area'] for job in self.read_output()['jobs'][1:]],
+            ['Havet (ny)', 'Havet (ny)'],
+        )
+
+    def test_config_change_rewrites_output(self):
+        self.run_export()
+        self.settings = {'compact_output': True}
+        self.run_export()
+        self.assertNotIn(b'\n', (self.output_dir / 'jobs-export.json').read_bytes())
+
+    def test_full_ignores_state(self):
+        self.run_export()
+        fetcher = self.run_export(full=True)
+        self.assertEqual(fetcher.process_job_calls, [1, 2])
+
+
+class ParallelProcessingTest(ExportRunTest):
+    def setUp(self):
+        super().setUp()
+        self.exports['http://campos.test/jobs'] = [
+            dict(JOBS[n % 2], id=n, name=f"{JOBS[n % 2]['name']} {n}", create_date=f"2026-0{n % 9 + 1}-1{n % 10}")
+            for n in range(1, 26)
+        ]
+
+    @unittest.skipUnless('fork' in multiprocessing.get_all_start_methods(), "needs fork")
+    def test_parallel_output_matches_serial(self):
+        self.settings = {'process_workers': 3, 'parallel_min_jobs': 0, 'parallel_batch_size': 4}
+        fetcher = self.run_export()
+        self.assertEqual(fetcher.metrics.counters[('process_workers', ())], 3)
+        self.assertIn('in 7 batches on 3 processes', self.stdout.getvalue())
+        # The records were built by the workers
+        self.assertEqual(fetcher.process_job_calls, [])
+        if fetch_job_export.resource is not None:
+            self.assertGreater(fetcher.metrics.summary['worker_peak_rss_bytes'], 0)
+        parallel = self.read_output()['jobs']
+        pages = sorted(path.name for path in (self.output_dir / 'job').iterdir())
+
+        self.settings = {'process_workers': 1}
+        fetcher = self.run_export(full=True)
+        self.assertEqual(fetcher.metrics.counters[('process_workers', ())], 0)
+        self.assertIsNone(fetcher.metrics.summary['worker_peak_rss_bytes'])
+        self.assertEqual(self.read_output()['jobs'], parallel)
+        self.assertEqual(sorted(path.name for path in (self.output_dir / 'job').iterdir()), pages)
+        self.assertEqual(pages[:2], ['barchef-10-10', 'barchef-12-12'])
+
+    def test_small_exports_are_processed_serially(self):
+        self.settings = {'process_workers': 4, 'parallel_min_jobs': 26}
+        fetcher = self.run_export()
+        self.assertEqual(fetcher.metrics.counters[('process_workers', ())], 0)
+        self.assertEqual(len(self.read_output()['jobs']), 25)
+
+    @unittest.skipUnless('fork' in multiprocessing.get_all_start_methods(), "needs fork")
+    def test_failing_worker_falls_back_to_serial(self):
+        self.settings = {'process_workers': 2, 'parallel_min_jobs': 0, 'parallel_batch_size': 10}
+        fetcher = self.make_export_fetcher()
+        fetcher.load_config()
+        fetcher.prepare_job = mock.Mock(side_effect=ValueError("broken job"))
+        with redirect_stdout(io.StringIO()) as stdout:
+            prepared = fetcher.prepare_jobs(self.exports['http://campos.test/jobs'])
+        self.assertIsNone(prepared)
+        self.assertIn('ValueError: broken job', stdout.getvalue())
+        self.assertEqual(fetcher.metrics.counters[('process_workers', ())], 0)
+
+    @unittest.skipUnless('fork' in multiprocessing.get_all_start_methods(), "needs fork")
+    def test_hung_worker_times_out(self):
+        self.settings = {
+            'process_workers': 2, 'parallel_min_jobs': 0, 'parallel_batch_size': 10,
+            'parallel_timeout_seconds': 0.5,
+        }
+        fetcher = self.make_export_fetcher()
+        fetcher.load_config()
+        fetcher.prepare_job = mock.Mock(side_effect=lambda job: time.sleep(60))
+        started = time.monotonic()
+        with redirect_stdout(io.StringIO()) as stdout:
+            prepared = fetcher.prepare_jobs(self.exports['http://campos.test/jobs'])
+        self.assertIsNone(prepared)
+        self.assertLess(time.monotonic() - started, 10)
+        self.assertIn('workers not done after 0.5 seconds', stdout.getvalue())
+
+    @unittest.skipUnless('fork' in multiprocessing.get_all_start_methods(), "needs fork")
+    def test_worker_records_share_the_index_hierarchies(self):
+        self.exports['http://campos.test/jobs'][3]['organization_id'] = '9999 - Nowhere'
+        self.settings = {'process_workers': 2, 'parallel_min_jobs': 0, 'parallel_batch_size': 10}
+        fetcher = self.make_export_fetcher()
+        fetcher.load_config()
+        with redirect_stdout(io.StringIO()):
+            fetcher.build_org_lookup(ORGS)
+            prepared = fetcher.prepare_jobs(self.exports['http://campos.test/jobs'])
+        records = [record for _, record, _ in prepared]
+        org_index = fetcher.get_org_index()
+        self.assertIs(records[1].org_hierarchy, org_index.hierarchy_for('55982 - Bar 2'))
+        self.assertIs(records[23].org_hierarchy, records[1].org_hierarchy)
+        self.assertIs(records[3].org_hierarchy, org_index.unknown_hierarchy_for('9999 - Nowhere'))
+        self.assertEqual(records[3].org_hierarchy.full_path, ['9999 - Nowhere'])
+
+    @unittest.skipUnless('fork' in multiprocessing.get_all_start_methods(), "needs fork")
+    def test_workers_are_spawned_by_daemons_and_next_to_threads(self):
+        fetcher = self.make_export_fetcher()
+        self.assertEqual(fetcher.process_context().get_start_method(), 'fork')
+        with mock.patch.object(fetch_job_export.threading, 'active_count', return_value=2):
+            self.assertEqual(fetcher.process_context().get_start_method(), 'spawn')
+        fetch_job_export.ExportDaemon(fetcher)
+        self.assertEqual(fetcher.process_context().get_start_method(), 'spawn')
+
+    @unittest.skipUnless('fork' in multiprocessing.get_all_start_methods(), "needs fork")
+    def test_worker_count_follows_available_cpus(self):
+        fetcher = self.make_export_fetcher()
+        with mock.patch.object(fetch_job_export, 'available_cpus', return_value=4):
+            fetcher.config = {'parallel_min_jobs': 0, 'parallel_batch_size': 5}
+            self.assertEqual(fetcher.parallel_workers(25), 4)
+            fetcher.config['process_workers'] = 0
+            self.assertEqual(fetcher.parallel_workers(25), 0)
+
+
+class OgPagesTest(ExportRunTest):
+    def generate(self, jobs):
+        fetcher = make_fetcher()
+        with redirect_stdout(io.StringIO()):
+            return fetcher.generate_og_pages(fetcher.process_jobs(jobs), str(self.output_dir))
+
+    def test_page_has_job_title_and_meta(self):
+        self.generate(JOBS)
+        page = (self.output_dir / 'job' / 'barchef-1' / 'index.html').read_text(encoding='utf-8')
+        self.assertIn('<title>Barchef — Jobbank</title>', page)
+        self.assertIn('<meta property="og:description" content="Styr baren" />', page)
+        self.assertIn('<meta name="description" content="Styr baren" />\n</head>', page)
+
+    def test_unchanged_pages_are_not_rewritten(self):
+        self.assertEqual(self.generate(JOBS), {'written': 2, 'unchanged': 0, 'removed': 0})
+        page_path = self.output_dir / 'job' / 'barchef-1' / 'index.html'
+        mtime = page_path.stat().st_mtime_ns
+
+        counts = self.generate([JOBS[0], dict(JOBS[1], teaser='Lav god mad')])
+        self.assertEqual(counts, {'written': 1, 'unchanged': 1, 'removed': 0})
+        self.assertEqual(page_path.stat().st_mtime_ns, mtime)
+
+    def test_pages_of_removed_jobs_are_deleted(self):
+        self.generate(JOBS)
+        self.assertEqual(self.generate(JOBS[:1]), {'written': 0, 'unchanged': 1, 'removed': 1})
+        self.assertEqual([path.name for path in (self.output_dir / 'job').iterdir()], ['barchef-1'])
+
+
+class OutputTest(ExportRunTest):
+    def test_default_output_is_indented_with_gzip_sibling(self):
+        self.run_export()
+        data = (self.output_dir / 'jobs-export.json').read_bytes()
+        self.assertIn(b'\n  "jobs": [', data)
+        self.assertEqual(gzip.decompress((self.output_dir / 'jobs-export.json.gz').read_bytes()), data)
+
+    def test_compact_output(self):
+        self.settings = {'compact_output': True, 'precompress_output': False}
+        self.run_export()
+        data = (self.output_dir / 'jobs-export.json').read_bytes()
+        self.assertNotIn(b'\n', data)
+        self.assertEqual(len(json.loads(data)['jobs']), 2)
+        self.assertFalse((self.output_dir / 'jobs-export.json.gz').exists())
+
+    def test_compact_output_follows_the_environment_by_default(self):
+        with mock.patch.dict(os.environ, {'COMPACT_OUTPUT': '1'}):
+            self.run_export()
+            self.assertNotIn(b'\n', (self.output_dir / 'jobs-export.json').read_bytes())
+
+            self.settings = {'compact_output': False}
+            self.run_export()
+            self.assertIn(b'\n  "jobs": [', (self.output_dir / 'jobs-export.json').read_bytes())
+
+    def test_siblings_not_written_are_removed(self):
+        self.run_export()
+        stale_br = self.output_dir / 'jobs-export.json.br'
+        stale_br.write_bytes(b'stale')
+
+        self.exports['http://campos.test/jobs'] = JOBS[:1]
+        with mock.patch.object(fetch_job_export, 'brotli', None):
+            self.run_export()
+        self.assertFalse(stale_br.exists())
+        data = (self.output_dir / 'jobs-export.json').read_bytes()
+        self.assertEqual(gzip.decompress((self.output_dir / 'jobs-export.json.gz').read_bytes()), data)
+
+        self.settings = {'precompress_output': False}
+        self.run_export()
+        self.assertEqual(list(self.output_dir.glob('jobs-*.json.gz')), [])
+
+    def test_no_temp_files_left_behind(self):
+        self.run_export()
+        self.assertEqual([path.name for path in self.output_dir.glob('.*.tmp')], [])
+
+    def test_split_output(self):
+        self.exports['http://campos.test/jobs'] = [dict(JOBS[0], description='<p>Lang tekst</p>'), JOBS[1]]
+        self.run_export()
+        listing = json.loads((self.output_dir / 'jobs-list.json').read_text(encoding='utf-8'))
+        self.assertEqual(listing['org_map'], self.read_output()['org_map'])
+        self.assertEqual(listing['jobs'][0]['name'], 'Barchef')
+        self.assertNotIn('description', listing['jobs'][0])
+
+        details = json.loads((self.output_dir / 'job-data' / 'barchef-1.json').read_text(encoding='utf-8'))
+        self.assertEqual(details, {
+            'id': 1, 'description': '<p>Lang tekst</p>',
+            'description_time_and_scope': '', 'requirements': None,
+        })
+
+        self.exports['http://campos.test/jobs'] = JOBS[1:]
+        self.run_export()
+        self.assertEqual([path.name for path in (self.output_dir / 'job-data').iterdir()], ['kok-2.json'])
+
+    def test_list_and_details_are_removed_when_split_output_is_off(self):
+        self.run_export()
+        self.settings = {'split_output': False}
+        self.exports['http://campos.test/jobs'] = JOBS[1:]
+        self.run_export()
+        self.assertEqual(list(self.output_dir.glob('jobs-list.json*')), [])
+        self.assertFalse((self.output_dir / 'job-data').exists())
+        self.assertEqual(len(self.read_output()['jobs']), 1)
+
+    def test_files_of_a_run_share_generated_at(self):
+        self.run_export()
+        stamps = {
+            name: json.loads((self.output_dir / name).read_text(encoding='utf-8'))['generated_at']
+            for name in ('jobs-export.json', 'jobs-list.json', 'jobs-search-index.json', 'jobs-generated.json')
+        }
+        self.assertEqual(len(set(stamps.values())), 1, stamps)
+
+    def test_search_index_is_removed_when_disabled(self):
+        self.run_export()
+        self.assertTrue((self.output_dir / 'jobs-search-index.json.gz').exists())
+
+        self.settings = {'search_index': False}
+        self.run_export()
+        self.assertEqual(list(self.output_dir.glob('jobs-search-index.json*')), [])
+        self.assertIn('Removed jobs-search-index.json', self.stdout.getvalue())
+
+    def test_hashed_copy_and_manifest(self):
+        self.settings = {'hashed_output': True}
+        self.run_export()
+        first = json.loads((self.output_dir / 'jobs-export.manifest.json').read_text())
+        self.assertEqual(
+            (self.output_dir / first['file']).read_bytes(),
+            (self.output_dir / 'jobs-export.json').read_bytes(),
+        )
+
+        # The previous copy is kept, the one before that is pruned
+        for name in ('Kok 2', 'Kok 3'):
+            self.exports['http://campos.test/jobs'] = [JOBS[0], dict(JOBS[1], name=name)]
+            self.run_export()
+        latest = json.loads((self.output_dir / 'jobs-export.manifest.json').read_text())
+        hashed = sorted(path.name for path in self.output_dir.glob('jobs-export.*.json'))
+        self.assertNotIn(first['file'], hashed)
+        self.assertIn(latest['file'], hashed)
+        self.assertEqual(len(hashed), 3)  # two copies + manifest
+
+        # Turned off, the manifest goes, so the app loads jobs-export.json
+        self.settings = {}
+        self.run_export()
+        self.assertEqual(list(self.output_dir.glob('jobs-export.*.json*')), [])
+
+
+class SitemapTest(ExportRunTest):
+    def setUp(self):
+        super().setUp()
+        self.exports['http://campos.test/jobs'] = [
+            dict(JOBS[0], create_date='2025-05-01T10:00:00+02:00'),
+            dict(JOBS[1], create_date='2025-05-02T10:00:00.5+02:00'),
+        ]
+
+    def sitemap(self):
+        root = ElementTree.parse(self.output_dir / 'sitemap.xml').getroot()
+        namespace = '{http://www.sitemaps.org/schemas/sitemap/0.9}'
+        return {
+            url.findtext(f'{namespace}loc'): url.findtext(f'{namespace}lastmod')
+            for url in root.iter(f'{namespace}url')
+        }
+
+    def test_sitemap_and_feed(self):
+        self.run_export()
+        self.assertEqual(self.sitemap(), {
+            'https://jobs.spejderneslejr.dk/': '2025-05-02T08:00:00+00:00',
+            'https://jobs.spejderneslejr.dk/job/barchef-1': '2025-05-01T08:00:00+00:00',
+            'https://jobs.spejderneslejr.dk/job/kok-2': '2025-05-02T08:00:00+00:00',
+        })
+        self.assertTrue((self.output_dir / 'sitemap.xml.gz').exists())
+
+        feed = ElementTree.parse(self.output_dir / 'feed.xml').getroot()
+        namespace = '{http://www.w3.org/2005/Atom}'
+        self.assertEqual(feed.findtext(f'{namespace}title'), 'Jobbank')
+        self.assertEqual([entry.findtext(f'{namespace}title') for entry in feed.iter(f'{namespace}entry')], ['Kok', 'Barchef'])
+        self.assertEqual(feed.find(f'{namespace}entry').findtext(f'{namespace}summary'), 'Lav mad')
+
+    def test_lastmod_follows_content_changes(self):
+        self.run_export()
+        sitemap_path = self.output_dir / 'sitemap.xml'
+        mtime = sitemap_path.stat().st_mtime_ns
+
+        # Reprocessing every job (new org export) keeps the dates
+        self.exports['http://campos.test/orgs'] = ORGS + [{'name': 'Ny', 'parent_path': '1/2/99/'}]
+        self.run_export()
+        self.assertEqual(sitemap_path.stat().st_mtime_ns, mtime)
+
+        self.exports['http://campos.test/jobs'][1] = dict(self.exports['http://campos.test/jobs'][1], teaser='Lav god mad')
+        self.run_export()
+        lastmod = self.sitemap()
+        self.assertEqual(lastmod['https://jobs.spejderneslejr.dk/job/barchef-1'], '2025-05-01T08:00:00+00:00')
+        # The time of the run that saw the change
+        self.assertGreater(lastmod['https://jobs.spejderneslejr.dk/job/kok-2'], '2025-05-02T08:00:00+00:00')
+
+        # Only a date other than the create_date is kept in the state
+        with open(self.output_dir / '.export-state' / 'state.json', encoding='utf-8') as f:
+            state_jobs = json.load(f)['jobs']
+        self.assertIsNone(state_jobs['1']['modified'])
+        self.assertEqual(state_jobs['2']['modified'], lastmod['https://jobs.spejderneslejr.dk/job/kok-2'])
+
+    def test_sitemap_and_feed_are_removed_when_disabled(self):
+        self.run_export()
+        self.settings = {'feed_size': 0}
+        self.run_export()
+        self.assertEqual(list(self.output_dir.glob('feed.xml*')), [])
+        self.assertTrue((self.output_dir / 'sitemap.xml').exists())
+
+        self.settings = {'sitemap': False}
+        self.run_export()
+        self.assertEqual(list(self.output_dir.glob('sitemap*')), [])
+
+    def test_sitemap_is_removed_without_template(self):
+        self.run_export()
+        (self.output_dir / 'index.html').unlink()
+        self.exports['http://campos.test/jobs'] = self.exports['http://campos.test/jobs'][:1]
+        self.run_export()
+        self.assertEqual(list(self.output_dir.glob('sitemap*')) + list(self.output_dir.glob('feed*')), [])
+
+    def test_index_of_large_sitemaps(self):
+        self.exports['http://campos.test/jobs'] = [
+            {'id': job_id, 'name': 'Vagt', 'organization_id': '5532 - Havet', 'create_date': '2025-05-01T10:00:00+02:00'}
+            for job_id in range(1, 6)
+        ]
+        with mock.patch.object(fetch_job_export.SitemapBuilder, 'MAX_URLS', 4):
+            self.run_export()
+        index = (self.output_dir / 'sitemap.xml').read_text(encoding='utf-8')
+        self.assertIn('<loc>https://jobs.spejderneslejr.dk/sitemap-2.xml</loc>', index)
+        self.assertIn('/job/vagt-5</loc>', (self.output_dir / 'sitemap-2.xml').read_text(encoding='utf-8'))
+
+        self.exports['http://campos.test/jobs'] = self.exports['http://campos.test/jobs'][:2]
+        with mock.patch.object(fetch_job_export.SitemapBuilder, 'MAX_URLS', 4):
+            self.run_export()
+        self.assertEqual(sorted(path.name for path in self.output_dir.glob('sitemap*.xml')), ['sitemap.xml'])
+
+
+class ListingIndexTest(ExportRunTest):
+    def test_sort_keys(self):
+        names = ['Åben', 'Zebra', 'Øl', 'Éclair', 'bar', 'Æble', 'Aften']
+        self.assertEqual(
+            sorted(names, key=fetch_job_export.danish_sort_key),
+            ['Aften', 'bar', 'Éclair', 'Zebra', 'Æble', 'Øl', 'Åben'],
+        )
+        job = make_fetcher().process_job({'id': 1, 'name': 'Øl', 'create_date': '2025-05-06T23:59:57.525504+02:00'})
+        self.assertEqual(job['create_timestamp'], 1746568797525)
+        self.assertEqual(job['title_sort_key'], '|l')
+
+    def test_facets_and_orderings(self):
+        self.exports['http://campos.test/jobs'] = [
+            dict(JOBS[0], no_of_recruitment=2, application_count=2, create_date='2025-05-02T10:00:00+02:00'),
+            dict(JOBS[1], no_of_recruitment=3, application_count=1, create_date='2025-05-01T10:00:00+02:00'),
+            {'id': 3, 'name': 'Ølbrygger', 'organization_id': '5532 - Havet', 'no_of_recruitment': 1},
+            {'id': 4, 'name': 'Afløser', 'organization_id': 'Ukendt'},
+        ]
+        self.run_export()
+        output = self.read_output()
+        self.assertEqual(output['facets'], {
+            'open': 2,
+            'staffed': 2,
+            'areas': [
+                {'name': 'Havet (underlejr)', 'total': 1, 'open': 1, 'committees': []},
+                {'name': 'Lejrplads & Lejrliv (LEJ)', 'total': 2, 'open': 1, 'committees': [
+                    {'name': 'Handel, mad & Indkøb', 'total': 2, 'open': 1},
+                ]},
+                {'name': 'Unknown', 'total': 1, 'open': 0, 'committees': []},
+            ],
+        })
+        self.assertEqual(output['orderings'], {'title': [4, 1, 2, 3], 'created': [3, 4, 2, 1]})
+
+        listing = json.loads((self.output_dir / 'jobs-list.json').read_text(encoding='utf-8'))
+        self.assertEqual((listing['facets'], listing['orderings']), (output['facets'], output['orderings']))
+
+    def test_writer_matches_json_dumps(self):
+        document = {
+            'jobs': [{'id': 1, 'name': 'Øl', 'tags': [1, 2]}, {'id': 2, 'nested': {'a': None}}],
+            'org_map': {'9': 'Havet'},
+        }
+        for compact in (False, True):
+            writer = fetch_job_export.JsonExportWriter(self.output_dir / 'out.json', compact=compact)
+            for job in document['jobs']:
+                writer.add(job)
+            # Orderings are written from JsonArrays, in batches
+            orderings = {
+                'title': fetch_job_export.JsonArray(lambda: iter([2, 1])),
+                'created': fetch_job_export.JsonArray(lambda: iter([])),
+            }
+            with mock.patch.object(fetch_job_export.JsonArray, 'BATCH_SIZE', 1):
+                tmp_name = writer.finish(document['org_map'], {'orderings': orderings})
+            expected = json.dumps(
+                dict(document, orderings={'title': [2, 1], 'created': []}),
+                ensure_ascii=False, **({'separators': (',', ':')} if compact else {'indent': 2})
+            )
+            self.assertEqual(Path(tmp_name).read_text(encoding='utf-8'), expected)
+            Path(tmp_name).unlink()
+
+
+class ExportFilterTest(ExportRunTest):
+    def setUp(self):
+        super().setUp()
+        # Barchef is fully staffed, Kok still needs people
+        self.exports['http://campos.test/jobs'] = [
+            dict(JOBS[0], no_of_recruitment=1, application_count=1),
+            dict(JOBS[1], no_of_recruitment=2, application_count=1),
+        ]
+
+    def test_open_filter_leaves_out_staffed_jobs(self):
+        self.settings = {'export_filter': 'open', 'export_variants': {'all': 'all'}}
+        self.run_export()
+        self.assertEqual([job['id'] for job in self.read_output()['jobs']], [2])
+        self.assertEqual(self.read_output()['facets']['staffed'], 0)
+        listing = json.loads((self.output_dir / 'jobs-list.json').read_text(encoding='utf-8'))
+        self.assertEqual([job['id'] for job in listing['jobs']], [2])
+        self.assertEqual(sorted(path.name for path in (self.output_dir / 'job-data').iterdir()), ['kok-2.json'])
+
+        variant = json.loads((self.output_dir / 'jobs-export.all.json').read_text(encoding='utf-8'))
+        self.assertEqual([job['id'] for job in variant['jobs']], [1, 2])
+        self.assertEqual(variant['facets']['staffed'], 1)
+        self.assertTrue((self.output_dir / 'jobs-export.all.json.gz').exists())
+
+    def test_removed_variant_is_deleted(self):
+        self.settings = {'export_variants': {'all': 'all', 'open': 'open'}}
+        self.run_export()
+        self.settings = {'export_variants': {'all': 'all'}}
+        self.run_export()
+        self.assertTrue((self.output_dir / 'jobs-export.all.json').exists())
+        self.assertEqual(list(self.output_dir.glob('jobs-export.open.json*')), [])
+        self.assertIn('Removed jobs-export.open.json', self.stdout.getvalue())
+
+    def test_og_pages_of_staffed_jobs_are_removed(self):
+        for stream_jobs in (False, True):
+            shutil.rmtree(self.output_dir / 'job', ignore_errors=True)
+            self.settings = {'og_pages_filter': 'open', 'stream_jobs': stream_jobs}
+            self.exports['http://campos.test/jobs'] = [dict(job, no_of_recruitment=1) for job in JOBS]
+            self.run_export(full=True)
+            self.assertEqual(
+                sorted(path.name for path in (self.output_dir / 'job').iterdir()),
+                ['barchef-1', 'kok-2'],
+            )
+
+            self.exports['http://campos.test/jobs'][1]['application_count'] = 1
+            self.run_export()
+            self.assertEqual([path.name for path in (self.output_dir / 'job').iterdir()], ['barchef-1'])
+            self.assertEqual(len(self.read_output()['jobs']), 2)
+
+    def test_unknown_filter_is_refused(self):
+        self.settings = {'export_filter': 'closed'}
+        with self.assertRaises(SystemExit):
+            self.run_export()
+
+
+class StreamingTest(ExportRunTest):
+    def output_files(self):
+        return {
+            str(path.relative_to(self.output_dir)): path.read_bytes()
+            for path in sorted(self.output_dir.rglob('*'))
+            if path.is_file() and path.name != 'config.json'
+            and '.export-state' not in path.parts and not path.name.startswith('spooled-')
+        }
+
+    def test_iter_json_array_across_chunk_boundaries(self):
+        data = [{'id': 1, 'name': 'Bar "ø" [1]', 'tags': [1, {'a': None}]}, 2, 'tre', []]
+        raw = json.dumps(data, ensure_ascii=False, indent=2).encode('utf-8')
+        for chunk_size in (1, 3, 64 * 1024):
+            records = fetch_job_export.iter_json_array(io.BytesIO(raw), chunk_size=chunk_size)
+            self.assertEqual(list(records), data)
+        self.assertEqual(list(fetch_job_export.iter_json_array(io.BytesIO(b' [ ] '))), [])
+
+    def test_iter_json_array_waits_for_the_end_of_numbers(self):
+        raw = b'[1.5, -2e3,12,true,null ,false,{"id": 7.25}, 3]'
+        for chunk_size in (1, 2, 3):
+            records = fetch_job_export.iter_json_array(io.BytesIO(raw), chunk_size=chunk_size)
+            self.assertEqual(list(records), json.loads(raw))
+
+    def test_iter_json_array_rejects_truncated_input(self):
+        with self.assertRaises(ValueError):
+            list(fetch_job_export.iter_json_array(io.BytesIO(b'[{"id": 1}, {"id"')))
+        with self.assertRaises(ValueError):
+            list(fetch_job_export.iter_json_array(io.BytesIO(b'{"id": 1}')))
+
+    def test_output_matches_list_mode(self):
+        # Dated, so the sitemap does not depend on the time of the run
+        self.exports['http://campos.test/jobs'] = [
+            dict(JOBS[0], description='<p>Lang</p>', create_date='2025-05-01T10:00:00+02:00'),
+            dict(JOBS[1], create_date='2025-05-02T10:00:00+02:00'),
+        ]
+        for compact in (False, True):
+            for path in self.output_dir.glob('jobs-export.*'):
+                path.unlink()
+            self.settings = {'compact_output': compact, 'hashed_output': True}
+            with mock.patch.object(fetch_job_export.JobExportFetcher, 'run_timestamp', return_value='2026-05-01'):
+                self.run_export(full=True)
+                expected = self.output_files()
+
+                self.settings['stream_jobs'] = True
+                self.run_export(full=True)
+            self.assertEqual(self.output_files(), expected)
+
+    def test_spilled_output_matches_list_mode(self):
+        # Orderings, detail file names and search postings all spill to disk
+        self.exports['http://campos.test/jobs'] = [
+            {'id': job_id, 'name': f'Vagt {job_id % 3}', 'organization_id': '5532 - Havet',
+             'create_date': f'2025-05-{job_id:02d}T10:00:00+02:00'}
+            for job_id in range(1, 8)
+        ]
+        (self.output_dir / 'job-data').mkdir()
+        (self.output_dir / 'job-data' / 'fjernet-99.json').write_text('{}')
+        with mock.patch.object(fetch_job_export.JobExportFetcher, 'run_timestamp', return_value='2026-05-01'):
+            self.run_export(full=True)
+            expected = self.output_files()
+            self.settings = {'stream_jobs': True}
+            (self.output_dir / 'job-data' / 'fjernet-99.json').write_text('{}')
+            with mock.patch.object(fetch_job_export.SpillSort, 'BUFFER_SIZE', 2), \
+                    mock.patch.object(fetch_job_export.SearchIndexWriter, 'SPILL_POSTINGS', 3):
+                self.run_export(full=True)
+        self.assertEqual(self.output_files(), expected)
+        self.assertNotIn('job-data/fjernet-99.json', expected)
+        self.assertEqual(self.read_output()['orderings']['title'], [3, 6, 1, 4, 7, 2, 5])
+
+    def test_only_pages_of_changed_jobs_are_written(self):
+        self.settings = {'stream_jobs': True}
+        self.run_export()
+        page_path = self.output_dir / 'job' / 'barchef-1' / 'index.html'
+        mtime = page_path.stat().st_mtime_ns
+
+        self.exports['http://campos.test/jobs'] = [JOBS[0], {'id': 3, 'name': 'Vagt', 'organization_id': '5532 - Havet'}]
+        self.run_export()
+        self.assertEqual(page_path.stat().st_mtime_ns, mtime)
+        self.assertEqual(
+            sorted(path.name for path in (self.output_dir / 'job').iterdir()),
+            ['barchef-1', 'vagt-3'],
+        )
+        self.assertEqual([job['name'] for job in self.read_output()['jobs']], ['Barchef', 'Vagt'])
+
+
+class MetricsTest(ExportRunTest):
+    def setUp(self):
+        super().setUp()
+        self.metrics_file = self.output_dir / 'metrics' / 'jobbank.prom'
+
+    def run_export(self, **kwargs):
+        return super().run_export(metrics_file=self.metrics_file, **kwargs)
+
+    def log_lines(self):
+        return [json.loads(line) for line in self.stdout.getvalue().splitlines() if line.startswith('{')]
+
+    def prom_samples(self):
+        samples = {}
+        for line in self.metrics_file.read_text(encoding='utf-8').splitlines():
+            if not line.startswith('#'):
+                name, value = line.rsplit(' ', 1)
+                samples[name] = float(value)
+        return samples
+
+    def test_stages_are_logged_as_json_lines(self):
+        self.run_export()
+        lines = self.log_lines()
+        self.assertEqual(
+            [line['stage'] for line in lines if line['event'] == 'stage'],
+            ['fetch', 'build_org_lookup', 'process_jobs', 'write_output', 'generate_og_pages', 'save_state'],
+        )
+        run = lines[-1]
+        self.assertEqual(run['event'], 'run')
+        self.assertTrue(run['success'])
+        self.assertEqual(run['counters']['jobs'], 2)
+        self.assertEqual(run['counters']['og_pages[result=written]'], 2)
+
+    def test_textfile(self):
+        self.run_export()
+        samples = self.prom_samples()
+        self.assertEqual(samples['jobbank_export_run_success'], 1)
+        self.assertEqual(samples['jobbank_export_jobs'], 2)
+        self.assertEqual(samples['jobbank_export_run_unchanged'], 0)
+        self.assertEqual(samples['jobbank_export_org_export_issues{kind="dangling_parent"}'], 1)
+        self.assertEqual(samples['jobbank_export_org_export_issues{kind="duplicate_name"}'], 0)
+        self.assertEqual(samples['jobbank_export_fetched_bytes{export="job"}'], len(json.dumps(JOBS)))
+        self.assertIn('jobbank_export_stage_duration_seconds{stage="generate_og_pages"}', samples)
+        self.assertEqual(
+            samples['jobbank_export_output_modified_timestamp_seconds'],
+            round((self.output_dir / 'jobs-export.json').stat().st_mtime, 3),
+        )
+        self.assertEqual(samples['jobbank_export_last_success_timestamp_seconds'],
+                         samples['jobbank_export_last_run_timestamp_seconds'])
+
+        self.run_export()
+        self.assertEqual(self.prom_samples()['jobbank_export_run_unchanged'], 1)
+
+    def test_failed_run_keeps_last_success(self):
+        self.run_export()
+        last_success = self.prom_samples()['jobbank_export_last_success_timestamp_seconds']
+
+        def failing_fetch_bytes(url, spool=False):
+            raise fetch_job_export.FetchError("HTTP Error 503: Service Unavailable")
+
+        self.fake_fetch_bytes = failing_fetch_bytes
+        with self.assertRaises(SystemExit):
+            self.run_export()
+        samples = self.prom_samples()
+        self.assertEqual(samples['jobbank_export_run_success'], 0)
+        self.assertEqual(samples['jobbank_export_last_success_timestamp_seconds'], last_success)
+        self.assertGreaterEqual(samples['jobbank_export_last_run_timestamp_seconds'], last_success)
+
+
+class HistoryTest(ExportRunTest):
+    def history(self):
+        return fetch_job_export.ExportHistory(self.output_dir / '.export-state' / 'history', 10)
+
+    def objects(self):
+        return sorted(path.name for path in (self.output_dir / '.export-state' / 'history' / 'objects').rglob('*.gz'))
+
+    def test_runs_share_unchanged_records(self):
+        self.run_export()
+        self.run_export()  # unchanged exports are not recorded again
+        objects = self.objects()
+        self.assertEqual(len(objects), 3)  # two jobs and the org map
+
+        self.exports['http://campos.test/jobs'] = [
+            JOBS[0], dict(JOBS[1], teaser='Lav god mad'), {'id': 3, 'name': 'Vagt', 'organization_id': '5532 - Havet'},
+        ]
+        self.run_export()
+        self.assertEqual(self.history().runs(), [1, 2])
+        self.assertEqual(len(self.objects()), 5)
+
+        self.exports['http://campos.test/jobs'] = [JOBS[0], dict(JOBS[1], teaser='Lav god mad')]
+        self.run_export()
+        with redirect_stdout(io.StringIO()) as stdout:
+            changes = self.make_export_fetcher().print_diff(1)
+        self.assertEqual([job['id'] for job in changes['added']], [])
+        self.assertEqual([job['id'] for job in changes['removed']], [])
+        self.assertEqual([(new['id'], fields) for _, new, fields in changes['changed']], [(2, ['teaser'])])
+        self.assertIn('Run 1 -> 3: 0 added, 0 removed, 1 changed', stdout.getvalue())
+
+        changes = self.history().diff(2, 3)
+        self.assertEqual([job['name'] for job in changes['removed']], ['Vagt'])
+
+    def test_history_is_bounded(self):
+        self.settings = {'history_size': 2}
+        for teaser in ('a', 'b', 'c'):
+            self.exports['http://campos.test/jobs'] = [JOBS[0], dict(JOBS[1], teaser=teaser)]
+            self.run_export()
+        self.assertEqual(self.history().runs(), [2, 3])
+        # Job 1 and the org map, plus job 2 as of runs 2 and 3
+        self.assertEqual(len(self.objects()), 4)
+
+    def test_rollback_republishes_a_run(self):
+        self.run_export()
+        published = (self.output_dir / 'jobs-export.json').read_bytes()
+        self.exports['http://campos.test/jobs'] = [dict(JOBS[1], name='Køkkenchef')]
+        self.run_export()
+
+        with redirect_stdout(io.StringIO()):
+            self.make_export_fetcher().rollback(-1)
+        self.assertEqual((self.output_dir / 'jobs-export.json').read_bytes(), published)
+        self.assertEqual(
+            sorted(path.name for path in (self.output_dir / 'job').iterdir()),
+            ['barchef-1', 'kok-2'],
+        )
+        self.assertEqual(sorted(path.name for path in (self.output_dir / 'job-data').iterdir()), ['barchef-1.json', 'kok-2.json'])
+
+        # The rollback stays until CampOS serves a different export
+        fetcher = self.run_export()
+        self.assertEqual(fetcher.process_job_calls, [])
+        self.assertEqual((self.output_dir / 'jobs-export.json').read_bytes(), published)
+
+        self.exports['http://campos.test/jobs'] = [dict(JOBS[1], name='Kokkepige')]
+        self.run_export()
+        self.assertEqual([job['name'] for job in self.read_output()['jobs']], ['Kokkepige'])
+        self.assertEqual([path.name for path in (self.output_dir / 'job').iterdir()], ['kokkepige-2'])
+
+    def test_rollback_without_state_stays_in_place(self):
+        self.run_export()
+        published = (self.output_dir / 'jobs-export.json').read_bytes()
+        self.exports['http://campos.test/jobs'] = [dict(JOBS[1], name='Køkkenchef')]
+        self.run_export()
+        (self.output_dir / '.export-state' / 'state.json').unlink()
+
+        with redirect_stdout(io.StringIO()):
+            self.make_export_fetcher().rollback(-1)
+        fetcher = self.run_export()
+        self.assertEqual(fetcher.process_job_calls, [])
+        self.assertEqual((self.output_dir / 'jobs-export.json').read_bytes(), published)
+        self.assertEqual(fetcher.load_state()['rolled_back_to'], 1)
+
+    def hold_state_lock(self):
+        state_dir = self.output_dir / '.export-state'
+        state_dir.mkdir(exist_ok=True)
+        lock_file = open(state_dir / 'lock', 'a+')
+        self.addCleanup(lock_file.close)
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        return lock_file
+
+    @unittest.skipIf(fcntl is None, "needs fcntl")
+    def test_rollback_and_runs_exclude_each_other(self):
+        self.run_export()
+        self.settings = {'state_lock_timeout_seconds': 0.2}
+        lock_file = self.hold_state_lock()
+        with redirect_stdout(io.StringIO()) as stdout, self.assertRaises(SystemExit):
+            self.make_export_fetcher().rollback(0)
+        self.assertIn('is locked by another export', stdout.getvalue())
+        with self.assertRaises(SystemExit):
+            self.run_export()
+
+        # A held lock is waited for
+        self.settings = {'state_lock_timeout_seconds': 5}
+        timer = threading.Timer(0.3, fcntl.flock, (lock_file, fcntl.LOCK_UN))
+        timer.start()
+        self.addCleanup(timer.join)
+        self.run_export(full=True)
+        self.assertIn('Waiting for another export', self.stdout.getvalue())
+
+    def test_unknown_run(self):
+        self.run_export()
+        with redirect_stdout(io.StringIO()), self.assertRaises(SystemExit):
+            self.make_export_fetcher().rollback(5)
+
+
+class DaemonTest(ExportRunTest):
+    def test_warm_runs_reuse_org_index_and_state(self):
+        fetcher = self.make_export_fetcher()
+        calls = []
+        for name in ('build_org_lookup', 'load_state'):
+            method = getattr(fetcher, name)
+            setattr(fetcher, name, lambda *args, _name=name, _method=method: calls.append(_name) or _method(*args))
+
+        with redirect_stdout(io.StringIO()):
+            fetcher.run()
+            self.exports['http://campos.test/jobs'] = [JOBS[0], dict(JOBS[1], name='Køkkenchef')]
+            fetcher.run()
+        self.assertEqual(calls, ['load_state', 'build_org_lookup'])
+        self.assertEqual([job['name'] for job in self.read_output()['jobs']], ['Barchef', 'Køkkenchef'])
+
+    def test_failed_runs_do_not_stop_the_daemon(self):
+        fetcher = self.make_export_fetcher(full=True)
+        fetcher.config = {'daemon_interval_seconds': 0, 'daemon_jitter_seconds': 0}
+        daemon = fetch_job_export.ExportDaemon(fetcher)
+        full_flags = []
+
+        def run():
+            full_flags.append(fetcher.full)
+            if len(full_flags) == 2:
+                sys.exit(1)
+            if len(full_flags) == 3:
+                daemon.stop()
+
+        fetcher.run = run
+        with redirect_stdout(io.StringIO()):
+            daemon.run()
+        self.assertEqual(full_flags, [True, False, False])
+        self.assertEqual(daemon.runs, 3)
+
+    def test_delay_is_interval_with_jitter(self):
+        fetcher = fetch_job_export.JobExportFetcher(None, None)
+        fetcher.config = {'daemon_interval_seconds': 600, 'daemon_jitter_seconds': 30}
+        daemon = fetch_job_export.ExportDaemon(fetcher, rng=random.Random(1))
+        delays = [daemon.next_delay() for _ in range(100)]
+        self.assertTrue(all(570 <= delay <= 630 for delay in delays))
+        self.assertGreater(len(set(delays)), 1)
+
+
+class SearchIndexTest(unittest.TestCase):
+    JOBS = [
+        {'id': 10, 'name': 'Barchef', 'teaser': 'Styr <b>baren</b>',
+         'description': '<p>Kaffe&amp;kage</p><p>Øl</p>', 'org_hierarchy': {'area': 'Havet (underlejr)'}},
+        {'id': 20, 'name': 'Kok i køkkenet', 'teaser': '', 'description': '<p>Café på pladsen</p>',
+         'org_hierarchy': {'area': 'Lejrplads & Lejrliv (LEJ)'}},
+    ]
+
+    def setUp(self):
+        self.index = fetch_job_export.SearchIndex.build(self.JOBS)
+
+    def test_tokenize_strips_html_and_folds_danish_letters(self):
+        self.assertEqual(
+            fetch_job_export.SearchIndex.tokenize('<p>Kaffe&amp;kage</p><p>Øl på Café</p>'),
+            ['kaffe', 'kage', 'oel', 'paa', 'cafe'],
+        )
+
+    def test_search_matches_substrings_of_all_query_tokens(self):
+        self.assertEqual(self.index.search('køk'), [20])
+        self.assertEqual(self.index.search('KOEKKEN'), [20])
+        self.assertEqual(self.index.search('bar'), [10])
+        self.assertEqual(self.index.search('havet kaffe'), [10])
+        self.assertEqual(self.index.search('havet kok'), [])
+        self.assertEqual(self.index.search('lejr'), [10, 20])
+
+    def test_search_matches_parts_of_compound_words(self):
+        index = fetch_job_export.SearchIndex.build([
+            {'id': 1, 'name': 'Teamleder', 'description': 'Morgenkaffe'},
+            {'id': 2, 'name': 'Køkkenhjælper'},
+        ])
+        self.assertEqual(index.search('leder'), [1])
+        self.assertEqual(index.search('hjælper'), [2])
+        self.assertEqual(index.search('kaffe'), [1])
+        self.assertEqual(index.search('hjælper kaffe'), [])
+
+    def test_empty_query_matches_everything_in_export_order(self):
+        self.assertEqual(self.index.search(''), [10, 20])
+        self.assertEqual(self.index.search(' – '), [10, 20])
+
+    def test_json_round_trip(self):
+        data = json.loads(json.dumps(self.index.to_json()))
+        self.assertEqual(data['version'], 1)
+        self.assertEqual(fetch_job_export.SearchIndex.from_json(data).search('cafe'), [20])
+
+    def test_writer_matches_the_index_across_spilled_runs(self):
+        jobs = self.JOBS + [{'id': 30, 'name': 'Barista', 'teaser': 'Kaffe i baren'}, {'id': 40}]
+        expected = dict(fetch_job_export.SearchIndex.build(jobs).to_json(), generated_at='2026-05-01')
+        with tempfile.TemporaryDirectory() as tmp:
+            for spill_postings in (1, 3, 1 << 20):
+                with mock.patch.object(fetch_job_export.SearchIndexWriter, 'SPILL_POSTINGS', spill_postings):
+                    writer = fetch_job_export.SearchIndexWriter(Path(tmp) / 'jobs-search-index.json')
+                    for job in jobs:
+                        writer.add(job)
+                    tmp_name = writer.finish('2026-05-01')
+                self.assertEqual(Path(tmp_name).read_bytes(), json.dumps(
+                    expected, ensure_ascii=False, separators=(',', ':')
+                ).encode('utf-8'))
+                Path(tmp_name).unlink()
+
+
+def start_stand_in(test_case, exports=None):
+    """A CampOSStandIn serving exports {path: bytes}, stopped at cleanup"""
+    stand_in = campos_stand_in.CampOSStandIn(exports if exports is not None else {}).start()
+    test_case.addCleanup(stand_in.stop)
+    return stand_in
+
+
+class HttpCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.stand_in = start_stand_in(self)
+        self.exports = self.stand_in.server.exports
+        self.fetcher = fetch_job_export.JobExportFetcher(
+            None, None, state_dir=self.tmp.name
+        )
+
+    def fetch(self, path):
+        with redirect_stdout(io.StringIO()):
+            return self.fetcher.fetch_bytes(self.stand_in.base_url + path)
+
+    def test_gzip_body_is_decoded(self):
+        self.exports['/jobs'] = b'[{"id": 1}]'
+        self.assertEqual(self.fetch('/jobs'), b'[{"id": 1}]')
+        # Sent gzipped, as Accept-Encoding asked
+        self.assertEqual(len(self.stand_in.server.gzipped), 1)
+
+    def test_not_modified_reuses_cached_body(self):
+        self.exports['/jobs'] = b'[{"id": 1}]'
+        self.fetch('/jobs')
+        self.assertEqual(self.fetch('/jobs'), b'[{"id": 1}]')
+        self.assertEqual(self.stand_in.stats, {200: 1, 304: 1})
+
+    def test_changed_body_replaces_cache(self):
+        self.exports['/jobs'] = b'[{"id": 1}]'
+        self.fetch('/jobs')
+        self.exports['/jobs'] = b'[{"id": 2}]'
+        self.assertEqual(self.fetch('/jobs'), b'[{"id": 2}]')
+        self.assertEqual(self.fetch('/jobs'), b'[{"id": 2}]')
+
+    def test_url_not_stored_in_cache_file_names(self):
+        self.exports['/jobs'] = b'[]'
+        self.fetch('/jobs?api_key=secret')
+        names = [path.name for path in Path(self.tmp.name, 'http-cache').iterdir()]
+        self.assertEqual(len(names), 2)
+        self.assertFalse(any('secret' in name for name in names))
+
+    def test_spooled_body_is_written_to_cache(self):
+        self.exports['/jobs'] = b'[{"id": 1}]'
+        with redirect_stdout(io.StringIO()):
+            body = self.fetcher.fetch_bytes(self.stand_in.base_url + '/jobs', spool=True)
+            cached = self.fetcher.fetch_bytes(self.stand_in.base_url + '/jobs', spool=True)
+        self.assertEqual(Path(body.path).read_bytes(), b'[{"id": 1}]')
+        self.assertEqual(body.sha256, fetch_job_export.content_hash(b'[{"id": 1}]'))
+        self.assertEqual((cached.path, cached.sha256, cached.size), (body.path, body.sha256, 11))
+
+
+class FetchExportsTest(unittest.TestCase):
+    def setUp(self):
+        self.stand_in = start_stand_in(self, {'/orgs': b'[]', '/jobs': b'[{"id": 1}]'})
+        self.fetcher = fetch_job_export.JobExportFetcher(None, None)
+        self.fetcher.config = {
+            'org_export_url': self.stand_in.base_url + '/orgs',
+            'job_export_url': self.stand_in.base_url + '/jobs',
+            'fetch_backoff_seconds': 0,
+        }
+
+    def inject(self, **faults):
+        self.stand_in.server.faults = campos_stand_in.Faults(**faults)
+
+    def fetch_exports(self):
+        with redirect_stdout(io.StringIO()):
+            return self.fetcher.fetch_exports()
+
+    def test_exports_are_fetched_concurrently(self):
+        self.inject(latency=0.3)
+        start = time.perf_counter()
+        self.assertEqual(self.fetch_exports(), (b'[]', b'[{"id": 1}]'))
+        self.assertLess(time.perf_counter() - start, 0.55)
+
+    def test_transient_errors_are_retried(self):
+        self.inject(fail_first=2)
+        self.assertEqual(self.fetch_exports(), (b'[]', b'[{"id": 1}]'))
+        self.assertEqual(self.stand_in.stats, {503: 2, 200: 2})
+
+    def test_gives_up_after_configured_attempts(self):
+        self.inject(error_rate=1.0, error_burst=1000)
+        with self.assertRaises(SystemExit):
+            self.fetch_exports()
+        self.assertEqual(self.stand_in.stats, {503: 6})
+
+    def test_client_errors_are_not_retried(self):
+        with redirect_stdout(io.StringIO()):
+            with self.assertRaises(fetch_job_export.FetchError):
+                self.fetcher.fetch_bytes(self.stand_in.base_url + '/missing')
+        self.assertEqual(self.stand_in.stats, {404: 1})
+
+
+class ResilienceTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.stand_in = start_stand_in(self, campos_stand_in.generate_exports(20, depth=2, width=2))
+        self.fetcher = fetch_job_export.JobExportFetcher(None, None, state_dir=self.tmp.name)
+        self.fetcher.config = {
+            'org_export_url': self.stand_in.org_export_url,
+            'job_export_url': self.stand_in.job_export_url,
+            'fetch_backoff_seconds': 0,
+        }
+
+    def inject(self, **faults):
+        self.stand_in.server.faults = campos_stand_in.Faults(**faults)
+
+    def fetch_exports(self):
+        with redirect_stdout(io.StringIO()):
+            return self.fetcher.fetch_exports()
+
+    def stale_exports(self):
+        return {
+            dict(labels)['export']: value
+            for (name, labels), value in self.fetcher.metrics.counters.items() if name == 'stale_exports'
+        }
+
+    def test_truncated_body_is_retried(self):
+        self.inject(truncate_rate=1.0)
+        self.fetcher.config['fetch_attempts'] = 2
+        with redirect_stdout(io.StringIO()):
+            with self.assertRaises(fetch_job_export.FetchError) as raised:
+                self.fetcher.fetch_bytes(self.stand_in.job_export_url)
+        self.assertIsInstance(raised.exception.__cause__, (http.client.IncompleteRead, EOFError))
+        self.assertEqual(self.stand_in.stats, {200: 2})
+
+    def test_corrupt_body_falls_back_to_the_cached_copy(self):
+        for spool in (False, True):
+            with self.subTest(spool=spool):
+                with redirect_stdout(io.StringIO()):
+                    _, job_raw = self.fetcher.fetch_exports(spool_jobs=spool)
+                cached = Path(job_raw.path).read_bytes() if spool else job_raw
+
+                # A new export arrives corrupted: full length, invalid JSON
+                exports = self.stand_in.server.exports
+                path = campos_stand_in.JOB_EXPORT_PATH
+                exports[path] = exports[path].replace(b'"name"', b'"Name"', 1)
+                self.inject(corrupt_rate=1.0)
+                with redirect_stdout(io.StringIO()) as stdout:
+                    _, stale = self.fetcher.fetch_exports(spool_jobs=spool)
+                self.assertIn('Invalid export in the response body', stdout.getvalue())
+                self.assertEqual(Path(stale.path).read_bytes() if spool else stale, cached)
+                self.assertEqual(self.fetcher.http_cache.load(self.stand_in.job_export_url)[1], cached)
+
+                # Served intact, the new export replaces the cached copy
+                self.inject()
+                with redirect_stdout(io.StringIO()):
+                    _, job_raw = self.fetcher.fetch_exports(spool_jobs=spool)
+                fresh = Path(job_raw.path).read_bytes() if spool else job_raw
+                self.assertEqual(fresh, exports[path])
+
+    def test_slow_drip_hits_the_body_timeout(self):
+        self.inject(drip=500)
+        self.fetcher.config.update(fetch_attempts=1, fetch_body_timeout_seconds=0.3)
+        start = time.perf_counter()
+        with redirect_stdout(io.StringIO()):
+            with self.assertRaises(fetch_job_export.FetchError) as raised:
+                self.fetcher.fetch_bytes(self.stand_in.job_export_url)
+        self.assertLess(time.perf_counter() - start, 1.5)
+        self.assertIn('not received within 0.3s', str(raised.exception))
+
+    def test_retry_after_is_honoured(self):
+        self.fetcher.config['fetch_backoff_seconds'] = 0.01
+        error = HTTPError('url', 429, 'Too Many Requests', {'Retry-After': '1'}, None)
+        self.assertEqual(self.fetcher.retry_after(error), 1.0)
+        self.assertIsNone(self.fetcher.retry_after(HTTPError('url', 503, 'Unavailable', {}, None)))
+
+        self.inject(rate_limit=1)
+        self.stand_in.server.faults.decide()
+        start = time.perf_counter()
+        with redirect_stdout(io.StringIO()):
+            self.fetcher.fetch_bytes(self.stand_in.job_export_url)
+        self.assertGreaterEqual(time.perf_counter() - start, 0.9)
+        self.assertEqual(self.stand_in.stats, {429: 1, 200: 1})
+
+    def test_retry_past_the_deadline_gives_up(self):
+        self.inject(rate_limit=0.01)
+        self.stand_in.server.faults.decide()
+        self.fetcher.config['fetch_deadline_seconds'] = 10
+        with redirect_stdout(io.StringIO()):
+            with self.assertRaises(fetch_job_export.FetchError) as raised:
+                self.fetcher.fetch_bytes(self.stand_in.job_export_url)
+        self.assertIn('fetch deadline', str(raised.exception))
+        self.assertEqual(self.stand_in.stats, {429: 1})
+
+    def test_outage_falls_back_to_cached_exports(self):
+        org_raw, job_raw = self.fetch_exports()
+        self.assertEqual(self.stale_exports(), {'organization': 0, 'job': 0})
+
+        self.inject(error_rate=1.0, error_burst=1000)
+        self.fetcher.metrics = fetch_job_export.RunMetrics()
+        self.assertEqual(self.fetch_exports(), (org_raw, job_raw))
+        self.assertEqual(self.stale_exports(), {'organization': 1, 'job': 1})
+
+    def test_spooled_export_falls_back_to_cached_copy(self):
+        with redirect_stdout(io.StringIO()):
+            _, job_raw = self.fetcher.fetch_exports(spool_jobs=True)
+            self.inject(error_rate=1.0, error_burst=1000)
+            _, stale = self.fetcher.fetch_exports(spool_jobs=True)
+        self.assertEqual((stale.path, stale.sha256), (job_raw.path, job_raw.sha256))
+
+    def test_cached_exports_too_old_fail_the_run(self):
+        self.fetch_exports()
+        self.inject(error_rate=1.0, error_burst=1000)
+        self.fetcher.config['fetch_stale_max_age_seconds'] = 0
+        with self.assertRaises(SystemExit):
+            self.fetch_exports()
+
+    def test_not_modified_refreshes_the_cached_copy_age(self):
+        self.fetch_exports()
+        cache = self.fetcher.http_cache
+        url = self.stand_in.job_export_url
+        meta_path = cache._paths(url)[0]
+        meta = json.loads(meta_path.read_text())
+        meta_path.write_text(json.dumps(dict(meta, fetched_at=meta['fetched_at'] - 3600)))
+        self.assertGreater(cache.age(url), 3500)
+
+        self.fetch_exports()
+        self.assertLess(cache.age(url), 60)
+        self.assertEqual(self.stand_in.stats[304], 2)
+
+
+class TriggerTest(ExportRunTest):
+    def setUp(self):
+        super().setUp()
+        self.settings = {
+            'daemon_interval_seconds': 60, 'daemon_jitter_seconds': 0,
+            'trigger_port': 0, 'trigger_debounce_seconds': 0.2, 'trigger_max_delay_seconds': 0.6,
+        }
+        self.run_starts = []
+        self.run_seconds = 0
+        self.active = 0
+        self.max_active = 0
+
+    def start_daemon(self):
+        fetcher = self.make_export_fetcher()
+
+        def fake_run():
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+            self.run_starts.append(time.monotonic())
+            time.sleep(self.run_seconds)
+            self.active -= 1
+
+        fetcher.run = fake_run
+        self.daemon = fetch_job_export.ExportDaemon(fetcher)
+
+        def run_daemon():
+            with redirect_stdout(io.StringIO()):
+                self.daemon.run()
+
+        thread = threading.Thread(target=run_daemon)
+        thread.start()
+        self.addCleanup(thread.join)
+        self.addCleanup(self.daemon.stop)
+        self.wait_for_runs(1)
+        self.base_url = 'http://127.0.0.1:%d' % self.daemon.trigger_server.server_address[1]
+
+    def wait_for_runs(self, count, timeout=5):
+        deadline = time.monotonic() + timeout
+        while len(self.run_starts) < count:
+            self.assertLess(time.monotonic(), deadline, f"expected {count} runs, got {len(self.run_starts)}")
+            time.sleep(0.01)
+
+    def request(self, method, path, headers=None):
+        request = Request(self.base_url + path, method=method, headers=headers or {})
+        try:
+            with urlopen(request, timeout=5) as response:
+                return response.status, json.loads(response.read())
+        except HTTPError as e:
+            return e.code, json.loads(e.read())
+
+    def test_burst_of_triggers_is_one_run(self):
+        self.start_daemon()
+        for _ in range(5):
+            self.assertEqual(self.request('POST', '/refresh'), (202, {'status': 'scheduled'}))
+        self.wait_for_runs(2)
+        time.sleep(0.4)
+        self.assertEqual(len(self.run_starts), 2)
+        self.assertEqual(self.request('GET', '/status')[1]['runs'], 2)
+
+    def test_trigger_during_run_queues_a_single_follow_up(self):
+        self.start_daemon()
+        self.run_seconds = 0.4
+        self.request('POST', '/refresh')
+        self.wait_for_runs(2)
+        self.assertEqual(self.request('POST', '/refresh'), (202, {'status': 'queued'}))
+        self.assertEqual(self.request('POST', '/refresh'), (202, {'status': 'queued'}))
+        self.wait_for_runs(3)
+        time.sleep(0.8)
+        self.assertEqual(len(self.run_starts), 3)
+        self.assertEqual(self.max_active, 1)
+
+    def test_steady_triggers_run_after_max_delay(self):
+        self.start_daemon()
+        first = time.monotonic()
+        while len(self.run_starts) < 2 and time.monotonic() - first < 2:
+            self.request('POST', '/refresh')
+            time.sleep(0.05)
+        self.assertEqual(len(self.run_starts), 2)
+        self.assertLess(self.run_starts[1] - first, 1)
+
+    def test_token(self):
+        self.settings['trigger_token'] = 's3cret'
+        self.start_daemon()
+        self.assertEqual(self.request('POST', '/refresh')[0], 401)
+        self.assertEqual(self.request('POST', '/refresh', {'Authorization': 'Bearer wrong'})[0], 401)
+        self.assertEqual(self.request('POST', '/refresh', {'Authorization': 'Bearer s3crét'})[0], 401)
+        self.assertEqual(self.request('POST', '/refresh', {'Authorization': 'Bearer s3cret'})[0], 202)
+        self.assertEqual(self.request('GET', '/nope', {'Authorization': 'Bearer s3cret'})[0], 404)
+
+    def test_token_required_beyond_loopback(self):
+        self.settings['trigger_host'] = '0.0.0.0'
+        fetcher = self.make_export_fetcher()
+        with redirect_stdout(io.StringIO()) as stdout, self.assertRaises(SystemExit):
+            fetcher.load_config()
+        self.assertIn('trigger_token is required', stdout.getvalue())
+
+        self.settings['trigger_token'] = 's3cret'
+        with redirect_stdout(io.StringIO()):
+            self.assertTrue(self.make_export_fetcher().load_config())
+        for host in ('127.0.0.1', '::1', 'localhost'):
+            self.assertTrue(fetch_job_export.is_loopback_host(host))
+        self.assertFalse(fetch_job_export.is_loopback_host('exporter'))
+
+
+class DaemonProcessTest(unittest.TestCase):
+    def test_sigterm_stops_the_daemon(self):
+        stand_in = start_stand_in(self, {'/orgs': json.dumps(ORGS).encode(), '/jobs': json.dumps(JOBS).encode()})
+        base_url = stand_in.base_url
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        output_dir = Path(tmp.name)
+        config_file = output_dir / 'config.json'
+        config_file.write_text(json.dumps({
+            'org_export_url': base_url + '/orgs',
+            'job_export_url': base_url + '/jobs',
+            'daemon_interval_seconds': 60,
+        }))
+
+        process = subprocess.Popen(
+            [sys.executable, str(Path(__file__).parent / 'fetch-job-export.py'), '--daemon', '--config', str(config_file)],
+            env=dict(os.environ, OUTPUT_DIR=str(output_dir)),
+            stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True,
+        )
+        self.addCleanup(process.kill)
+        deadline = time.monotonic() + 10
+        while not (output_dir / '.export-state' / 'state.json').exists():
+            self.assertLess(time.monotonic(), deadline, "daemon did not complete a run")
+            time.sleep(0.05)
+
+        process.send_signal(signal.SIGTERM)
+        output, _ = process.communicate(timeout=10)
+        self.assertEqual(process.returncode, 0, output)
+        self.assertIn('Export daemon stopped after 1 runs', output)
+
+    def test_daemon_spawns_its_workers(self):
+        jobs = [dict(JOBS[n % 2], id=n) for n in range(1, 7)]
+        stand_in = start_stand_in(self, {'/orgs': json.dumps(ORGS).encode(), '/jobs': json.dumps(jobs).encode()})
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        output_dir = Path(tmp.name)
+        settings = {
+            'org_export_url': stand_in.base_url + '/orgs',
+            'job_export_url': stand_in.base_url + '/jobs',
+            'process_workers': 2,
+            'parallel_min_jobs': 0,
+            'parallel_batch_size': 2,
+        }
+        config_file = output_dir / 'config.json'
+        config_file.write_text(json.dumps(settings))
+
+        process = subprocess.Popen(
+            [sys.executable, str(Path(__file__).parent / 'fetch-job-export.py'), '--daemon', '--config', str(config_file)],
+            env=dict(os.environ, OUTPUT_DIR=str(output_dir)),
+            stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True,
+        )
+        self.addCleanup(process.kill)
+        deadline = time.monotonic() + 20
+        while not (output_dir / '.export-state' / 'state.json').exists():
+            self.assertLess(time.monotonic(), deadline, "daemon did not complete a run")
+            time.sleep(0.05)
+        process.send_signal(signal.SIGTERM)
+        output, _ = process.communicate(timeout=10)
+        self.assertIn('Prepared 6 jobs in 3 batches on 2 processes (spawn)', output)
+        with open(output_dir / 'jobs-export.json', encoding='utf-8') as f:
+            spawned = json.load(f)['jobs']
+
+        serial_dir = output_dir / 'serial'
+        serial_dir.mkdir()
+        config_file.write_text(json.dumps(dict(settings, process_workers=1)))
+        fetcher = fetch_job_export.JobExportFetcher(config_file, serial_dir / 'jobs-export.json')
+        with redirect_stdout(io.StringIO()):
+            fetcher.run()
+        with open(serial_dir / 'jobs-export.json', encoding='utf-8') as f:
+            self.assertEqual(json.load(f)['jobs'], spawned)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -16,6 +16,11 @@
 #   SITE_URL   Base URL used in OG page meta tags (default: https://jobs.spejderneslejr.dk)
 #              Override for local testing, e.g.:
 #                SITE_URL=http://localhost:5173 ./run-export.sh ./dist
+#   METRICS_DIR  node-exporter textfile collector directory; when set, run
+#                metrics are written to $METRICS_DIR/jobbank_export.prom
+#   STATE_DIR  Directory for the export state, HTTP cache and history
+#              (default: .<output dir name>-export-state next to the output
+#              directory, so it is not published with it)
 #
 
 set -e
@@ -40,6 +45,11 @@ OUTPUT_DIR=$(cd "$(dirname "$OUTPUT_DIR")" && pwd)/$(basename "$OUTPUT_DIR")
 # Create output directory if it doesn't exist
 mkdir -p "$OUTPUT_DIR"
 
+# Keep the state outside the output directory, which is published
+STATE_DIR="${STATE_DIR:-$(dirname "$OUTPUT_DIR")/.$(basename "$OUTPUT_DIR")-export-state}"
+mkdir -p "$STATE_DIR"
+STATE_DIR=$(cd "$STATE_DIR" && pwd)
+
 # Get the directory where this script is located
 SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
 
@@ -63,6 +73,7 @@ echo "=================================="
 echo "SL2026 Job Export Runner"
 echo "=================================="
 echo "Output directory: $OUTPUT_DIR"
+echo "State directory:  $STATE_DIR"
 echo "Script directory: $SCRIPT_DIR"
 echo "Site URL:         $SITE_URL"
 echo ""
@@ -72,11 +83,20 @@ echo "Building Docker image..."
 docker build -t "$IMAGE_NAME" "$SCRIPT_DIR"
 echo ""
 
+# Mount the textfile collector directory, if given
+METRICS_ARGS=()
+if [ -n "$METRICS_DIR" ]; then
+    mkdir -p "$METRICS_DIR"
+    METRICS_ARGS=(-v "$(cd "$METRICS_DIR" && pwd):/metrics" -e METRICS_FILE=/metrics/jobbank_export.prom)
+fi
+
 # Run the container
 echo "Running export..."
 docker run --rm \
     -v "$OUTPUT_DIR:/output" \
+    -v "$STATE_DIR:/state" \
     -e SITE_URL="$SITE_URL" \
+    "${METRICS_ARGS[@]}" \
     "$IMAGE_NAME"
 
 echo ""
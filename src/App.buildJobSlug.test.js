@@ -0,0 +1,13 @@
+import { describe, it, expect } from 'vitest'
+import AppVue from './App.vue'
+import corpus from '../scripts/testdata/job-slugs.json'
+
+const { buildJobSlug } = AppVue.methods
+
+// Shared with SlugTest in scripts/fetch_job_export_test.py: the export script
+// writes job-data/<slug>.json and job/<slug>/ under the same slugs
+describe('buildJobSlug', () => {
+  it.each(corpus)('slugifies $name', (entry) => {
+    expect(buildJobSlug(entry)).toBe(entry.slug)
+  })
+})
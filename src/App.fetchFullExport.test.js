@@ -0,0 +1,47 @@
+import { describe, it, expect, vi, afterEach } from 'vitest'
+import AppVue from './App.vue'
+
+const { fetchFullExport } = AppVue.methods
+
+const HASHED = 'jobs-export.0123456789abcdef.json'
+
+// fetch() stand-in answering from { url: body }; unknown URLs get index.html
+function stubFetch(responses) {
+  const fetchMock = vi.fn(async (url) => {
+    if (!(url in responses)) {
+      return { ok: true, json: async () => JSON.parse('<!doctype html>') }
+    }
+    return { ok: true, url, json: async () => responses[url] }
+  })
+  vi.stubGlobal('fetch', fetchMock)
+  return fetchMock
+}
+
+afterEach(() => {
+  vi.unstubAllGlobals()
+})
+
+describe('fetchFullExport', () => {
+  it('loads the hashed copy named by the manifest', async () => {
+    const fetchMock = stubFetch({
+      '/jobs-export.manifest.json': { file: HASHED, sha256: '0123456789abcdef' },
+      [`/${HASHED}`]: { jobs: [] },
+    })
+    const response = await fetchFullExport()
+    expect(response.url).toBe(`/${HASHED}`)
+    expect(fetchMock).toHaveBeenCalledWith('/jobs-export.manifest.json', { cache: 'no-cache' })
+  })
+
+  it('falls back to jobs-export.json without a manifest', async () => {
+    stubFetch({ '/jobs-export.json': { jobs: [] } })
+    expect((await fetchFullExport()).url).toBe('/jobs-export.json')
+  })
+
+  it('ignores a manifest naming anything but a hashed copy', async () => {
+    stubFetch({
+      '/jobs-export.manifest.json': { file: '../secrets.json' },
+      '/jobs-export.json': { jobs: [] },
+    })
+    expect((await fetchFullExport()).url).toBe('/jobs-export.json')
+  })
+})
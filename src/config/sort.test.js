@@ -0,0 +1,41 @@
+import { describe, it, expect } from 'vitest'
+import { createdTimestamp, sortByOrdering, SORT_DIRECTIONS } from './sort.js'
+
+// `orderings.title` as written by scripts/fetch-job-export.py
+const ordering = [4, 1, 2, 3]
+const jobs = [1, 2, 3, 4].map((id) => ({ id }))
+
+describe('sortByOrdering', () => {
+  it('sorts ascending and descending', () => {
+    expect(sortByOrdering(jobs, ordering, SORT_DIRECTIONS.ASC).map((job) => job.id)).toEqual([4, 1, 2, 3])
+    expect(sortByOrdering(jobs, ordering, SORT_DIRECTIONS.DESC).map((job) => job.id)).toEqual([3, 2, 1, 4])
+  })
+
+  it('sorts a filtered subset', () => {
+    expect(sortByOrdering([jobs[2], jobs[0]], ordering, SORT_DIRECTIONS.ASC)).toEqual([jobs[0], jobs[2]])
+  })
+
+  it('does not modify the jobs array', () => {
+    const copy = [...jobs]
+    sortByOrdering(jobs, ordering, SORT_DIRECTIONS.DESC)
+    expect(jobs).toEqual(copy)
+  })
+
+  it('puts jobs without a date first in `orderings.created`', () => {
+    // As written by the script for [dated 2 May, dated 1 May, undated, undated]
+    const created = [3, 4, 2, 1]
+    expect(sortByOrdering(jobs, created, SORT_DIRECTIONS.ASC).map((job) => job.id)).toEqual([3, 4, 2, 1])
+    expect(sortByOrdering(jobs, created, SORT_DIRECTIONS.DESC).map((job) => job.id)).toEqual([1, 2, 4, 3])
+  })
+})
+
+describe('createdTimestamp', () => {
+  it('is the creation time in milliseconds', () => {
+    expect(createdTimestamp({ create_date: '2025-05-07T00:00:00Z' })).toBe(Date.UTC(2025, 4, 7))
+  })
+
+  it('is 0 without a date, so undated jobs sort first like in the export', () => {
+    expect(createdTimestamp({})).toBe(0)
+    expect(createdTimestamp({ create_date: 'not a date' })).toBe(0)
+  })
+})
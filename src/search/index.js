@@ -0,0 +1,79 @@
+/**
+ * Search over the prebuilt jobs-search-index.json
+ *
+ * Mirrors SearchIndex in scripts/fetch-job-export.py: text is lowercased,
+ * Danish letters are folded like job slugs (æ → ae, ø → oe, å → aa), other
+ * accents are removed, and a job matches when every query token is part of
+ * one of its indexed tokens, so "leder" finds "Teamleder" (Danish job titles
+ * are compound words).
+ */
+
+/**
+ * Split text into normalised search tokens
+ * @param {string} text
+ * @returns {string[]}
+ */
+export function tokenize(text) {
+  return (text || '')
+    .toLowerCase()
+    .replace(/æ/g, 'ae').replace(/ø/g, 'oe').replace(/å/g, 'aa')
+    .normalize('NFKD')
+    .replace(/[\u0300-\u036f]/g, '')
+    .match(/[a-z0-9]+/g) || []
+}
+
+/**
+ * Whether a loaded index was written with the loaded job list: by the same
+ * run (generated_at) and for the same jobs
+ * @param {{ids: number[], generated_at?: string}} indexData
+ * @param {{jobs: {id: number}[], generated_at?: string}} listData
+ * @returns {boolean}
+ */
+export function searchIndexMatches(indexData, listData) {
+  if (indexData.generated_at !== listData.generated_at) return false
+  const listIds = new Set(listData.jobs.map((job) => job.id))
+  return indexData.ids.length === listIds.size && indexData.ids.every((id) => listIds.has(id))
+}
+
+/**
+ * Prepare the index loaded from jobs-search-index.json for searching
+ * @param {{ids: number[], tokens: Object<string, number[]>}} data
+ */
+export function createSearchIndex(data) {
+  return {
+    ids: data.ids,
+    tokens: data.tokens,
+    tokenList: Object.keys(data.tokens),
+  }
+}
+
+// The token dictionary is small enough to scan for each query token
+function substringPostings(index, part) {
+  const positions = new Set()
+  for (const token of index.tokenList) {
+    if (!token.includes(part)) continue
+    for (const position of index.tokens[token]) positions.add(position)
+  }
+  return positions
+}
+
+/**
+ * Ids of the jobs matching every token of the query, in export order
+ * An empty query matches every job.
+ * @param {ReturnType<typeof createSearchIndex>} index
+ * @param {string} query
+ * @returns {number[]}
+ */
+export function searchJobIds(index, query) {
+  let matches = null
+  for (const part of tokenize(query)) {
+    const postings = substringPostings(index, part)
+    matches = matches === null
+      ? postings
+      : new Set([...matches].filter((position) => postings.has(position)))
+    if (matches.size === 0) return []
+  }
+
+  if (matches === null) return [...index.ids]
+  return [...matches].sort((a, b) => a - b).map((position) => index.ids[position])
+}
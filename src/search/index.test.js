@@ -0,0 +1,71 @@
+import { describe, it, expect } from 'vitest'
+import { tokenize, createSearchIndex, searchIndexMatches, searchJobIds } from './index.js'
+
+// Same shape as jobs-search-index.json written by scripts/fetch-job-export.py
+const index = createSearchIndex({
+  version: 1,
+  ids: [10, 20],
+  tokens: {
+    barchef: [0], styr: [0], baren: [0], kaffe: [0], kage: [0], oel: [0], havet: [0], underlejr: [0],
+    kok: [1], i: [1], koekkenet: [1], cafe: [1], paa: [1], pladsen: [1], lejrplads: [1], lejrliv: [1], lej: [1],
+  },
+})
+
+describe('tokenize', () => {
+  it('folds Danish letters and accents like the export script', () => {
+    expect(tokenize('Øl på Café')).toEqual(['oel', 'paa', 'cafe'])
+  })
+
+  it('returns no tokens for punctuation only', () => {
+    expect(tokenize(' – ')).toEqual([])
+  })
+})
+
+describe('searchJobIds', () => {
+  it('matches substrings of indexed tokens', () => {
+    expect(searchJobIds(index, 'køk')).toEqual([20])
+    expect(searchJobIds(index, 'KOEKKEN')).toEqual([20])
+    expect(searchJobIds(index, 'bar')).toEqual([10])
+    expect(searchJobIds(index, 'lejr')).toEqual([10, 20])
+  })
+
+  it('matches parts of compound words like the export script', () => {
+    const compounds = createSearchIndex({
+      version: 1,
+      ids: [1, 2],
+      tokens: { teamleder: [0], morgenkaffe: [0], koekkenhjaelper: [1] },
+    })
+    expect(searchJobIds(compounds, 'leder')).toEqual([1])
+    expect(searchJobIds(compounds, 'hjælper')).toEqual([2])
+    expect(searchJobIds(compounds, 'kaffe')).toEqual([1])
+    expect(searchJobIds(compounds, 'hjælper kaffe')).toEqual([])
+  })
+
+  it('requires every query token to match', () => {
+    expect(searchJobIds(index, 'havet kaffe')).toEqual([10])
+    expect(searchJobIds(index, 'havet kok')).toEqual([])
+  })
+
+  it('matches every job for an empty query, in export order', () => {
+    expect(searchJobIds(index, '')).toEqual([10, 20])
+  })
+})
+
+describe('searchIndexMatches', () => {
+  const indexData = { ids: [10, 20], generated_at: '2026-05-01T10:00:00.000+00:00', tokens: {} }
+  const listData = { jobs: [{ id: 20 }, { id: 10 }], generated_at: '2026-05-01T10:00:00.000+00:00' }
+
+  it('accepts an index of the same run and jobs', () => {
+    expect(searchIndexMatches(indexData, listData)).toBe(true)
+  })
+
+  it('rejects an index of another run', () => {
+    expect(searchIndexMatches({ ...indexData, generated_at: '2026-04-30T10:00:00.000+00:00' }, listData)).toBe(false)
+    expect(searchIndexMatches({ ...indexData, generated_at: undefined }, listData)).toBe(false)
+  })
+
+  it('rejects an index of other jobs', () => {
+    expect(searchIndexMatches(indexData, { ...listData, jobs: [{ id: 10 }, { id: 30 }] })).toBe(false)
+    expect(searchIndexMatches(indexData, { ...listData, jobs: [{ id: 10 }] })).toBe(false)
+  })
+})
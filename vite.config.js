@@ -1,6 +1,6 @@
 import { defineConfig } from 'vite'
 import vue from '@vitejs/plugin-vue'
-import { unlinkSync, existsSync } from 'fs'
+import { rmSync, existsSync, readdirSync } from 'fs'
 import { resolve } from 'path'
 
 export default defineConfig({
@@ -11,12 +11,36 @@ export default defineConfig({
     {
       name: 'exclude-public-files',
       closeBundle() {
-        // Delete jobs-export.json from dist after build
-        // This file should be generated on the server, not bundled
-        const filePath = resolve(__dirname, 'dist', 'jobs-export.json')
-        if (existsSync(filePath)) {
-          unlinkSync(filePath)
-          console.log('Removed jobs-export.json from dist (will be generated on server)')
+        // Delete the export script's output from dist after build
+        // These files should be generated on the server, not bundled
+        const exportFiles = [
+          'jobs-export.json',
+          'jobs-export.manifest.json',
+          'jobs-list.json',
+          'jobs-search-index.json',
+          'jobs-generated.json',
+          'sitemap.xml',
+          'feed.xml',
+        ]
+        // Export variants (jobs-export.<name>.json, see export_variants),
+        // content-hashed copies (jobs-export.<hash>.json, hashed_output)
+        // and parts of a large sitemap (sitemap-<n>.xml)
+        const distDir = resolve(__dirname, 'dist')
+        const variantFiles = existsSync(distDir)
+          ? readdirSync(distDir).filter(
+              (name) => /^jobs-export\.[a-z0-9][a-z0-9-]*\.json$/.test(name) || /^sitemap-\d+\.xml$/.test(name),
+            )
+          : []
+        const generated = [
+          ...[...exportFiles, ...variantFiles].flatMap((name) => [name, `${name}.gz`, `${name}.br`]),
+          'job-data',
+        ]
+        for (const name of generated) {
+          const filePath = resolve(__dirname, 'dist', name)
+          if (existsSync(filePath)) {
+            rmSync(filePath, { recursive: true })
+            console.log(`Removed ${name} from dist (will be generated on server)`)
+          }
         }
       },
     },